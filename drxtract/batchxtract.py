@@ -0,0 +1,243 @@
+#!/usr/bin/python3
+
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Script to extract the contents of many Macromedia Director files (all the
+# files inside a directory tree or the files in a list) by using a pool of
+# processes. A manifest.json file is written for every input file and the
+# inputs whose manifest says that they are complete are skipped. Every movie
+# of a projector EXE file with several movies goes to its own numbered
+# directory.
+#
+
+import sys
+import os
+import time
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+from .riff.file_operations import detect_byte_order, count_movies
+from .drxtract import extract_movie
+from .options import pop_option, pop_jobs, setup_logging
+from .transcode import AUDIO_FORMATS, DEFAULT_AUDIO_FORMAT
+from .cache import DecodeCache, open_cache
+
+MOVIE_EXTENSIONS = ('.DIR', '.DXR', '.DRX', '.DRI', '.EXE')
+
+MANIFEST_FILE = 'manifest.json'
+
+STATUS_COMPLETE = 'complete'
+STATUS_PARTIAL = 'partial'
+STATUS_FAILED = 'failed'
+
+# ==============================================================================
+# Returns the base directory and the list of files to extract
+def find_inputs(path: str) -> Tuple[str, List[str]]:
+    files: List[str] = []
+    if os.path.isdir(path):
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            for f in sorted(filenames):
+                if f.upper().endswith(MOVIE_EXTENSIONS):
+                    files.append(os.path.abspath(os.path.join(dirpath, f)))
+
+        return (os.path.abspath(path), files)
+
+    # A text file with a file path in every line
+    with open(path, mode='r', encoding='utf-8') as list_file:
+        for line in list_file:
+            line = line.strip()
+            if len(line) > 0 and not line.startswith('#'):
+                files.append(os.path.abspath(line))
+
+    if len(files) == 0:
+        return ('', files)
+
+    return (os.path.commonpath([os.path.dirname(f) for f in files]), files)
+
+# ==============================================================================
+# Reads the manifest of an output directory (if any)
+def read_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    manifest_file = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.isfile(manifest_file):
+        return None
+
+    try:
+        with open(manifest_file, mode='r', encoding='utf-8') as jsfile:
+            return json.loads(jsfile.read())
+    except ValueError:
+        logging.warning("Wrong manifest file: %s", manifest_file)
+
+    return None
+
+# ==============================================================================
+# Checks if a manifest says that an input file has already been extracted
+# (with the same audio format)
+def is_complete(manifest: Optional[Dict[str, Any]], input_file: str,
+                audio_format: str = DEFAULT_AUDIO_FORMAT) -> bool:
+    if manifest is None or manifest.get('status') != STATUS_COMPLETE:
+        return False
+
+    if manifest.get('audio_format') != audio_format:
+        return False
+
+    # The input file must not have changed
+    stat = os.stat(input_file)
+    return (manifest.get('input_bytes') == stat.st_size and
+            manifest.get('input_mtime') == stat.st_mtime)
+
+# ==============================================================================
+# Returns the number of bytes of the files inside a directory
+def directory_size(directory: str) -> int:
+    size = 0
+    for dirpath, dirnames, filenames in os.walk(directory):
+        for f in filenames:
+            size += os.path.getsize(os.path.join(dirpath, f))
+
+    return size
+
+# ==============================================================================
+# Extracts an input file and writes its manifest (runs in a worker process)
+def extract_input(input_file: str, directory: str,
+                  cache: Optional[DecodeCache],
+                  audio_format: str = DEFAULT_AUDIO_FORMAT) -> Dict[str, Any]:
+    stat = os.stat(input_file)
+    manifest: Dict[str, Any] = {
+        'input': input_file,
+        'input_bytes': stat.st_size,
+        'input_mtime': stat.st_mtime,
+        'audio_format': audio_format,
+        'status': STATUS_FAILED,
+        'started': time.time(),
+        'timings': {}
+    }
+
+    start = time.perf_counter()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        byte_order = detect_byte_order(input_file)
+        manifest['byte_order'] = 'pc' if byte_order == '<' else 'mac'
+
+        nmovies: int = count_movies(input_file)
+        if nmovies <= 1:
+            manifest.update(extract_movie(input_file, byte_order, directory,
+                                          1, cache, audio_format))
+        else:
+            # Every movie of a projector goes to <directory>/<movie number>
+            manifest['movies'] = []
+            manifest['failed_members'] = []
+            for movie in range(0, nmovies):
+                movie_dir = os.path.join(directory, str(movie + 1))
+                os.makedirs(movie_dir, exist_ok=True)
+                stats = extract_movie(input_file,
+                                      detect_byte_order(input_file, movie),
+                                      movie_dir, 1, cache, audio_format,
+                                      movie)
+                manifest['movies'].append(stats)
+                manifest['failed_members'] += [
+                    '%d/%d'%(movie + 1, elm)
+                    for elm in stats['failed_members']]
+        
+        if len(manifest['failed_members']) > 0:
+            manifest['status'] = STATUS_PARTIAL
+        else:
+            manifest['status'] = STATUS_COMPLETE
+
+    except Exception as e:
+        logging.exception("Can not extract %s", input_file)
+        manifest['error'] = '%s: %s'%(type(e).__name__, e)
+
+    manifest['timings']['total'] = time.perf_counter() - start
+    manifest['output_bytes'] = directory_size(directory)
+    if cache is not None:
+        manifest['cache'] = cache.take_stats()
+
+    # Write the manifest to a JSON file
+    with open(os.path.join(directory, MANIFEST_FILE), 'wb') as jsfile:
+        jsfile.write(json.dumps(manifest, indent=4, sort_keys=True
+                                ).encode('utf-8'))
+
+    return manifest
+
+# ==============================================================================
+def main():
+    setup_logging()
+
+    jobs: int = pop_jobs('0')
+    cache = open_cache(pop_option('--cache', ''),
+                       int(pop_option('--cache-size', '1024')))
+    audio_format: str = pop_option('--audio', DEFAULT_AUDIO_FORMAT)
+
+    if len(sys.argv) < 3:
+        print("USAGE: batchxtract <directory|file list> <output directory>"
+              + " [--jobs N] [--cache <directory> [--cache-size MB]]"
+              + " [--audio %s]"%('|'.join(AUDIO_FORMATS))
+              + " [--log-level LEVEL]")
+
+    else:
+        if audio_format not in AUDIO_FORMATS:
+            logging.error("Unknown audio format: %s", audio_format)
+            sys.exit(-1)
+
+        if not os.path.exists(sys.argv[1]):
+            logging.error("'%s' does not exist", sys.argv[1])
+            sys.exit(-1)
+
+        if not os.path.isdir(sys.argv[2]):
+            logging.error("'%s' is not a directory", sys.argv[2])
+            sys.exit(-1)
+
+        base_dir, inputs = find_inputs(sys.argv[1])
+
+        # Skip the files that have already been extracted
+        pending: List[Tuple[str, str]] = []
+        for input_file in inputs:
+            directory = os.path.join(sys.argv[2],
+                                     os.path.relpath(input_file, base_dir))
+            if is_complete(read_manifest(directory), input_file,
+                           audio_format):
+                logging.debug("Skipping %s (already extracted)", input_file)
+            else:
+                pending.append((input_file, directory))
+
+        logging.info("%d files to extract (%d already extracted)",
+                     len(pending), len(inputs) - len(pending))
+
+        nfiles = 0
+        nbytes = 0
+        failed = 0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=(jobs if jobs > 0 else None)
+                                 ) as executor:
+            futures = [executor.submit(extract_input, input_file, directory,
+                                       cache, audio_format)
+                       for input_file, directory in pending]
+            for future in as_completed(futures):
+                manifest = future.result()
+                nfiles += 1
+                nbytes += manifest['input_bytes']
+                if manifest['status'] != STATUS_COMPLETE:
+                    failed += 1
+                if cache is not None and 'cache' in manifest:
+                    cache.merge_stats(manifest['cache'])
+
+                elapsed = max(time.perf_counter() - start, 1e-6)
+                logging.info("[%d/%d] %s: %s (%.2f files/s, %.2f MB/s)",
+                             nfiles, len(pending), manifest['input'],
+                             manifest['status'], nfiles / elapsed,
+                             nbytes / elapsed / (1024 * 1024))
+
+        if cache is not None:
+            cache.report()
+        
+        if failed > 0:
+            logging.error("%d of %d files could not be fully extracted",
+                          failed, len(pending))
+            sys.exit(-1)
+
+if __name__ == '__main__':
+    main()
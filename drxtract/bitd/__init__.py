@@ -2,7 +2,11 @@
 # E-mail: system252001@yahoo.es
 # License: GNU GPL v2 (see LICENSE file for details).
 
-from .bitd2bmp import bitd2bmp
-from .decoder import PALETTES
+from .bitd2bmp import bitd2bmp, bitd2bitmap, bitmap2bmp
+from .bitmap import Bitmap
+from .matte import matte_mask, transparent_mask
+from .formats import pixel_view, palette_rgba, bitmap2rgba, bitmap2array
 
-__all__ = ['bitd2bmp', 'PALETTES']
+__all__ = ['bitd2bmp', 'bitd2bitmap', 'bitmap2bmp', 'Bitmap',
+           'matte_mask', 'transparent_mask', 'pixel_view', 'palette_rgba',
+           'bitmap2rgba', 'bitmap2array']
@@ -6,6 +6,7 @@ from typing import Any, Dict
 import logging
 from ..lingosrc.util import vsprintf, get_keys
 from .decoder import Decoder
+from .bitmap import Bitmap
 from .decoder1b import Decoder1b
 from .decoder4b import Decoder4b
 from .decoder8b import Decoder8b
@@ -23,12 +24,12 @@ DECODERS: Dict[int, Decoder] = {
 }
 
 #
-# Transforms the BITD data into a BMP image
+# Decodes the BITD data
 # =============================================================================
-def bitd2bmp(castData: Dict[str, Any], clutData: bytes,
-    fdata: bytes) -> bytes:
+def bitd2bitmap(castData: Dict[str, Any], clutData: bytes,
+    fdata: bytes) -> Bitmap:
     """
-    Parse a BITD file and return its content as a bitmap image.
+    Parse a BITD file and return its decoded pixels.
     
     Parameters
     ----------
@@ -41,8 +42,8 @@ def bitd2bmp(castData: Dict[str, Any], clutData: bytes,
         
     Returns
     -------
-    bytes
-        a byte array with the BMP image.
+    Bitmap
+        the decoded image.
 
     Raises
     ------
@@ -57,7 +58,7 @@ def bitd2bmp(castData: Dict[str, Any], clutData: bytes,
     bmp_padding_w:int = castData['w_padding']
     bmp_padding_h:int = castData['h_padding']
     bmp_palette: str = 'none'
-    if bmp_bpp == 8:
+    if bmp_bpp == 8 or bmp_bpp == 4:
         bmp_palette = str(castData['palette_txt'])
     elif bmp_bpp == 1:
         bmp_palette = 'black and white'          
@@ -71,7 +72,7 @@ def bitd2bmp(castData: Dict[str, Any], clutData: bytes,
 
 
     if bmp_bpp in get_keys(DECODERS):
-        return DECODERS[bmp_bpp].decode(fdata, bmp_width, bmp_height,
+        return DECODERS[bmp_bpp].decode_bitmap(fdata, bmp_width, bmp_height,
                bmp_padding_w, bmp_padding_h, bmp_palette, clutData)
 
     else:
@@ -79,3 +80,55 @@ def bitd2bmp(castData: Dict[str, Any], clutData: bytes,
         logging.error(msg)
         raise ValueError(msg)
 
+#
+# Transforms the BITD data into a BMP image
+# =============================================================================
+def bitd2bmp(castData: Dict[str, Any], clutData: bytes,
+    fdata: bytes) -> bytes:
+    """
+    Parse a BITD file and return its content as a bitmap image.
+    
+    Parameters
+    ----------
+    cast: Dict[str, Any]
+        Casting object information.
+    clutData: bytes
+        Custom color palette
+    fdata : bytes
+        The bytes in the BITD file that contains the image.
+        
+    Returns
+    -------
+    bytes
+        a byte array with the BMP image.
+
+    Raises
+    ------
+    ValueError
+        If some field inside the file is not compliant with the expected
+        file structure. 
+        
+    """
+    return bitmap2bmp(castData, bitd2bitmap(castData, clutData, fdata))
+
+#
+# Transforms a decoded BITD image into a BMP image
+# =============================================================================
+def bitmap2bmp(castData: Dict[str, Any], bitmap: Bitmap) -> bytes:
+    """
+    Return a decoded BITD image as a bitmap image.
+    
+    Parameters
+    ----------
+    cast: Dict[str, Any]
+        Casting object information.
+    bitmap: Bitmap
+        The decoded image.
+        
+    Returns
+    -------
+    bytes
+        a byte array with the BMP image.
+        
+    """
+    return DECODERS[castData['depth']].encodeBmp(bitmap)
@@ -0,0 +1,47 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+from typing import Dict
+from ..lingosrc.util import get_keys
+
+# Formats of the pixels (by bits per pixel)
+PIXEL_FORMATS: Dict[int, str] = {
+    8: 'indexed8',  # 1 byte palette index
+    16: 'rgb555',   # RGB 555, little endian
+    24: 'bgr24'     # 1 byte per color component: blue, green and red
+}
+
+#
+# Decoded BITD image.
+#
+class Bitmap:
+    """This class represents a decoded BITD image. The rows of pixels are
+    stored like in a BMP file (from the bottom row to the top row).
+    The pixels and the palette are immutable bytes, so a bitmap can be
+    shared between threads."""
+
+    __slots__ = ('width', 'height', 'bpp', 'pixel_format', 'stride',
+                 'palette', 'data')
+
+    def __init__(self, width: int, height: int, bpp: int, stride: int,
+                 palette: bytes, data: bytes):
+        self.width: int = width
+        self.height: int = height
+
+        self.bpp: int = bpp
+        """Bits per pixel of the data: 8 (palette index), 16 (RGB 555,
+        little endian) or 24 (BGR)"""
+
+        # Name of the format of the pixels (see PIXEL_FORMATS)
+        self.pixel_format: str = 'unknown'
+        if bpp in get_keys(PIXEL_FORMATS):
+            self.pixel_format = PIXEL_FORMATS[bpp]
+
+        self.stride: int = stride
+        """Number of bytes of every row"""
+
+        self.palette: bytes = bytes(palette)
+        """Color palette (4 bytes per color: blue, green, red and zero)"""
+
+        self.data: bytes = bytes(data)
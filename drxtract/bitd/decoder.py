@@ -6,88 +6,11 @@ from abc import ABCMeta, abstractmethod
 import io
 import struct
 import logging
-from typing import Dict
-from ..lingosrc.util import repeat_string, get_keys
-
-from ..palettes import GRAYSCALE_256COLORS_PALETTE, \
-    METALLIC_256COLORS_PALETTE, \
-    NTSC_256COLORS_PALETTE, PASTELS_256COLORS_PALETTE, \
-    RAINBOW_256COLORS_PALETTE, SYSTEM_MAC_256COLORS_PALETTE, \
-    SYSTEM_WINDOWS_DIR4_256COLORS_PALETTE, SYSTEM_WINDOWS_256COLORS_PALETTE, \
-    VIVID_256COLORS_PALETTE, WEB_256COLORS_PALETTE
-
-# ============================================ Default color palettes =========
-BW_PALETTE = (
-  255, 255, 255, 0, # white  
-  0, 0, 0, 0        # black  
-)
-
-SYSTEM_MAC_16COLORS_PALETTE = (
-
-  255, 255, 0, 0,   # yellow
-  255, 160, 0, 0,   # orange
-  255, 0, 0, 0,     # red
-  255, 0, 255, 0,   # magenta
-  128, 0, 128, 0,   # purple
-  0, 0, 255, 0,     # blue
-  0, 255, 255, 0,   # cyan
-
-  0, 128, 0, 0,     # green
-  0, 100, 0, 0,     # dark green
-  165, 42, 42, 0,   # brown
-  210, 180, 140, 0, # tan
-  211, 211, 211, 0, # light gray
-  128, 128, 128, 0, # gray
-  169, 169, 169, 0, # dark gray
-  0, 0, 0, 0        # black
- )
-
-
-SYSTEM_WINDOWS_16COLORS_PALETTE = (
-  255, 255, 255, 0, # white
-  0, 255, 255, 0,   # aqua
-  255, 0, 255, 0,   # fuchsia
-  0, 0, 255, 0,     # blue
-  255, 255, 0, 0,   # yellow
-  0, 255, 0, 0,     # lime
-  255, 0, 0, 0,     # red
-  128, 128, 128, 0, # gray
-
-  192, 192, 192, 0, # silver
-  0, 128, 128, 0,   # teal
-  128, 0, 128, 0,   # purple
-  0, 0, 128, 0,     # navy
-  128, 128, 0, 0,   # olive
-  0, 128, 0, 0,     # green
-  128, 0, 0, 0,     # maroon
-  0, 0, 0, 0        # black
- )
-
-
-PALETTES: Dict[int, Dict[str, tuple]] = {
-    1: {
-        'black and white': BW_PALETTE
-    },
-    4: {
-        'systemMac': SYSTEM_MAC_16COLORS_PALETTE,
-        'systemWin': SYSTEM_WINDOWS_16COLORS_PALETTE,
-        'default': SYSTEM_WINDOWS_16COLORS_PALETTE
-    },
-    8: {
-        'grayscale': GRAYSCALE_256COLORS_PALETTE,
-        'metallic': METALLIC_256COLORS_PALETTE,
-        'ntsc': NTSC_256COLORS_PALETTE,
-        'pastels': PASTELS_256COLORS_PALETTE,
-        'rainbow': RAINBOW_256COLORS_PALETTE,
-        'systemMac': SYSTEM_MAC_256COLORS_PALETTE,
-        'systemWinDir4': SYSTEM_WINDOWS_DIR4_256COLORS_PALETTE,
-        'systemWin': SYSTEM_WINDOWS_256COLORS_PALETTE,
-        'vivid': VIVID_256COLORS_PALETTE,
-        'web216': WEB_256COLORS_PALETTE,
-        'default': SYSTEM_WINDOWS_256COLORS_PALETTE
-    }
-}
+from typing import List
+from ..lingosrc.util import get_keys, write_bytes_step, bytes_view
+from .bitmap import Bitmap
 
+from ..palettes import has_palette, get_palette, DEFAULT_PALETTES
 
 
 #
@@ -100,11 +23,13 @@ class Decoder:
     def __init__(self, nbits: int, ncolors: int):
         self.nbits: int = nbits
         self.ncolors: int = ncolors
-        self.bytesIo: io.BytesIO = io.BytesIO()
+        self.hsize: int = 40
+        # The decoders don't keep any state of the images, so the same
+        # instance can decode several images at the same time (threads)
 
-    def writeBmpHeader(self, size:int, offset:int):
+    def writeBmpHeader(self, bytesIo: io.BytesIO, size:int, offset:int):
         # Write Windows bitmap file header
-        self.bytesIo.write('BM'.encode('ascii'))
+        bytesIo.write('BM'.encode('ascii'))
         
         values = (size, # The size of the BMP file in bytes
                   0, # Reserved
@@ -112,9 +37,10 @@ class Decoder:
                   offset # Data offset
                  )
         packed_data = struct.pack('<ihhi', *values)
-        self.bytesIo.write(packed_data)
+        bytesIo.write(packed_data)
         
-    def writeBitmapInfoHeader(self, width:int, height:int, bpp: int):
+    def writeBitmapInfoHeader(self, bytesIo: io.BytesIO, width:int,
+                              height:int, bpp: int):
         # Write BITMAPINFOHEADER
         values = (40, # the size of this header (40 bytes)
                   width, # the bitmap width in pixels (signed integer)
@@ -141,46 +67,124 @@ class Decoder:
                   self.ncolors  
                  )
         packed_data = struct.pack('<iiihhiiiiii', *values)
-        self.bytesIo.write(packed_data)
+        bytesIo.write(packed_data)
         
-    def writeColorPalette(self, palette_name: str, palette_data: bytes):
-        length = self.ncolors*4
-        fmt: str = repeat_string('B', length)
-        packed_data = bytes()
+    def getColorPalette(self, palette_name: str,
+                        palette_data: bytes) -> bytes:
         if len(palette_data) > 0:
             # Custom palette
             logging.debug('Using custom palette')
-            packed_data = struct.pack(fmt, *palette_data[0:length])
-        
-        else:
-            # System palette
-            nb = self.nbits
-            if nb in get_keys(PALETTES):
-                if palette_name in get_keys(PALETTES[nb]):
-                    logging.debug('Using %s palette', palette_name)
-                    palette = PALETTES[nb][palette_name]
-                    packed_data = struct.pack(fmt, *palette)
-                else:
-                    logging.warning("Using default windows color palette!")
-                    palette = PALETTES[nb]['default']
-                    packed_data = struct.pack(fmt, *palette)  
-        
-        self.bytesIo.write(packed_data)
-        
-    def writeData(self, data: bytes):
-        self.bytesIo.write(data)
-    
-    def getBmpImage(self) -> bytes:
-        data = self.bytesIo.getvalue()
-        self.bytesIo.close()
-        self.bytesIo = io.BytesIO()
+            return bytes(palette_data[0:self.ncolors*4])
+        
+        # System palette (already packed by the palette registry)
+        nb = self.nbits
+        if has_palette(nb, palette_name):
+            logging.debug('Using %s palette', palette_name)
+            return get_palette(nb, palette_name)
+        
+        if nb in get_keys(DEFAULT_PALETTES):
+            logging.warning("Using default windows color palette!")
+            return get_palette(nb, DEFAULT_PALETTES[nb])
+        
+        return bytes()
+        
+    def writeColorPalette(self, bytesIo: io.BytesIO, palette_name: str,
+                          palette_data: bytes):
+        bytesIo.write(self.getColorPalette(palette_name, palette_data))
+        
+    def writeData(self, bytesIo: io.BytesIO, data: bytes):
+        bytesIo.write(data)
+        
+
+    def encodeBmp(self, bitmap: Bitmap) -> bytes:
+        # The size of the BMP file in bytes
+        size: int = (bitmap.width*bitmap.height*int(bitmap.bpp/8)
+                     + (self.ncolors*4) + self.hsize + 14)
+        # Data offset
+        offset: int = (self.ncolors*4) + self.hsize + 14
+        
+        # Every image is written to its own buffer
+        bytesIo = io.BytesIO()
+        
+        self.writeBmpHeader(bytesIo, size, offset)
+        
+        self.writeBitmapInfoHeader(bytesIo, bitmap.width, bitmap.height,
+                                   bitmap.bpp)
+        
+        if self.ncolors > 0:
+            self.writeData(bytesIo, bitmap.palette)
+        
+        self.writeData(bytesIo, bitmap.data)
+        
+        data = bytesIo.getvalue()
+        bytesIo.close()
         return data
+
+    def read_raw_planes(self, fdata: bytes, w: int, h: int,
+                        padding_w: int, padding_h: int, row_size: int,
+                        w_size: int) -> bytearray:
+        # Uncompressed true color data: every row has w_size bytes with the
+        # color planes of the w - padding_w pixels that are not padding.
+        # The planes are copied to rows of row_size bytes (w pixels) from
+        # the bottom row to the top row, like the RLE decoders do.
+        data = bytearray(row_size * h)
+        nplanes = int(row_size / w) if w > 0 else 0
+        wp = w - padding_w
+        
+        # Pixels that are inside the image (the padding can be negative)
+        skip = max(0, -padding_w)
+        n = wp - skip
+        if n <= 0:
+            return data
         
+        view = bytes_view(fdata, 0, len(fdata))
+        y = h - 1 - padding_h
+        row = 0
+        while y >= 0:
+            src = y * w_size
+            dst = row * row_size + padding_w + skip
+            for i in range(0, nplanes):
+                start = src + i*wp + skip
+                data[dst + i*w:dst + i*w + n] = view[start:start + n]
+            
+            y = y - 1
+            row = row + 1
+        
+        return data
+
+    def merge_planes(self, data: bytes, w: int, h: int, row_size: int,
+                     planes: List[int]) -> bytearray:
+        # The rows of the true color images are stored as color planes (all
+        # the bytes of a channel, then all the bytes of the next one...).
+        # The planes are interleaved to get the pixels, whose bytes are the
+        # planes in the given order.
+        npixel = len(planes)
+        data_mix = bytearray(w * npixel * h)
+        if w <= 0:
+            return data_mix
+        
+        view = bytes_view(data, 0, len(data))
+        for y in range(0, h):
+            src = y * row_size
+            dst = y * w * npixel
+            for i in range(0, npixel):
+                start = src + planes[i] * w
+                write_bytes_step(data_mix, dst + i, npixel,
+                                 view[start:start + w])
+        
+        return data_mix
 
     @abstractmethod
+    def decode_bitmap(self, fdata:bytes, bmp_width: int, bmp_height: int,
+                      bmp_padding_w: int, bmp_padding_h: int,
+                      palette_name: str, palette_data: bytes) -> Bitmap:
+        pass
+
     def decode(self, fdata:bytes, bmp_width: int, bmp_height: int,
                bmp_padding_w: int, bmp_padding_h: int,
                palette_name: str, palette_data: bytes) -> bytes:
-        pass
+        return self.encodeBmp(self.decode_bitmap(fdata, bmp_width,
+                                                 bmp_height, bmp_padding_w,
+                                                 bmp_padding_h, palette_name,
+                                                 palette_data))
     
-__all__ = ['PALETTES']
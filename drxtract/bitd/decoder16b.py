@@ -3,6 +3,9 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 from .decoder import Decoder
+from .bitmap import Bitmap
+from ..lingosrc.util import repeat_byte, write_bytes
+import io
 import logging
 import struct
 
@@ -14,6 +17,7 @@ class Decoder16b(Decoder):
     
     def __init__(self):
         super().__init__(16, 0)
+        self.hsize = 124
 
     def decode_compressed_data(self, fdata: bytes,
                         w:int, h:int,
@@ -43,10 +47,9 @@ class Decoder16b(Decoder):
                     x = 0
                     y -= 1
     
-                for _ in range(0, run_length):
-                    p = y*width + x
-                    data[p] = run_value
-                    x += 1
+                write_bytes(data, y*width + x,
+                            repeat_byte(run_value, run_length))
+                x += run_length
                 
     
             else:
@@ -63,11 +66,16 @@ class Decoder16b(Decoder):
                     x = 0
                     y -= 1
     
-                for _ in range(0, run_length):
-                    p = y*width + x
-                    data[p] = fdata[idx]
-                    idx = idx + 1
-                    x += 1
+                if idx + run_length > len(fdata):
+                    raise IndexError('index out of range')
+    
+                # Write the run up to the end of every row
+                end = idx + run_length
+                while idx < end:
+                    n = min(end - idx, width - x)
+                    write_bytes(data, y*width + x, fdata[idx:idx + n])
+                    idx += n
+                    x += n
                     if x >= width:
                         x = 0
                         y -= 1
@@ -83,32 +91,20 @@ class Decoder16b(Decoder):
     
     
         # Sort lower and upper bytes
-        dataMix = bytearray(width * h)
-        w2 = w*2
-        w1 = w
-        w0 = 0
-        for y in range(0, h):
-            yw2 = y*w2
-            for x in range(0, w):
-                psu = yw2 + w1 + x
-                pdu = yw2 + x*2 + 0
-                dataMix[pdu] = data[psu]  # Upper
-                
-                psl = yw2 + w0 + x
-                pdl = yw2 + x*2 + 1
-                dataMix[pdl] = data[psl]  # Lower
-        
-        return dataMix
+        return self.merge_planes(data, w, h, width, [1, 0])
 
     def decode_raw_data(self, fdata: bytes,
                         w:int, h:int,
                         padding_w:int, padding_h:int,
                         width:int, w_size:int) -> bytes:
+        data = self.read_raw_planes(fdata, w, h, padding_w, padding_h,
+                                    width, w_size)
+        
+        # Sort lower and upper bytes
+        return self.merge_planes(data, w, h, width, [1, 0])
 
-          
-        raise NotImplementedError()
-
-    def writeBitmapInfoHeader(self, witdh:int, height:int, bpp: int):
+    def writeBitmapInfoHeader(self, bytesIo: io.BytesIO, witdh:int,
+                              height:int, bpp: int):
         # Write BITMAPINFOHEADER
         values = (124, # the size of this header (hsize bytes)
                   witdh, # the bitmap width in pixels (signed integer)
@@ -145,29 +141,19 @@ class Decoder16b(Decoder):
                   0, # Blue Gamma
                  )
         packed_data = struct.pack('<iiihhIIIIIIIIIIIIIIIIIIIIIIIIIII', *values)
-        self.writeData(packed_data)
+        self.writeData(bytesIo, packed_data)
 
-    def decode(self, fdata:bytes, bmp_width: int, bmp_height: int,
-               bmp_padding_w: int, bmp_padding_h: int,
-               palette_name: str, palette_data: bytes) -> bytes:
+    def decode_bitmap(self, fdata:bytes, bmp_width: int, bmp_height: int,
+                      bmp_padding_w: int, bmp_padding_h: int,
+                      palette_name: str, palette_data: bytes) -> Bitmap:
     
         bmp_bpp = 16
-        hsize = 124
         
         # Sometimes the padding is negative
         if bmp_padding_h < 0:
             bmp_height = bmp_height - bmp_padding_h
             bmp_padding_h = 0 
         
-        # The size of the BMP file in bytes
-        size: int = bmp_width*bmp_height*2+hsize+14
-        # Data offset
-        offset: int = hsize+14
-        
-        self.writeBmpHeader(size, offset)
-
-        self.writeBitmapInfoHeader(bmp_width, bmp_height, bmp_bpp)
-    
         width = bmp_width*2
     
         # get the pixel information
@@ -187,9 +173,5 @@ class Decoder16b(Decoder):
             bmp = self.decode_compressed_data(fdata, bmp_width, bmp_height,
                                        bmp_padding_w, bmp_padding_h,
                                        width, w_size)
-        
 
-    
-        self.writeData(bmp)
-        
-        return self.getBmpImage()
+        return Bitmap(bmp_width, bmp_height, bmp_bpp, width, bytes(), bmp)
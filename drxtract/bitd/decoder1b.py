@@ -3,8 +3,15 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 from .decoder import Decoder
+from .bitmap import Bitmap
+from ..lingosrc.util import is_debug_enabled, expand_bytes, write_bytes, \
+    bytes_view
 import logging
 
+# Pixels of every byte value (one byte per pixel, most significant bit first)
+BITS = [bytes([(v >> (7 - j)) & 1 for j in range(0, 8)])
+        for v in range(0, 256)]
+
 #
 # Black and White BITD decoder class.
 # 
@@ -28,85 +35,75 @@ class Decoder1b(Decoder):
         w = w - padding_w + inc
         logging.debug("w=%d, inc=%d", w, inc)
         
+        debug: bool = is_debug_enabled()
+        view = bytes_view(fdata, 0, len(fdata))
+        size = len(fdata)
         x = 0
         y = h - 1 - padding_h
         idx = 0
-        while (idx < len(fdata)) and (y>=0):
+        while (idx < size) and (y>=0):
             val = fdata[idx]
             if (val & 0x80) != 0:
                 # RLE encoded
                 run_length = 257 - val
-                if idx+1 >= len(fdata):
+                if idx+1 >= size:
                     logging.error("Unexpected end of data! (data length=%s)",
-                                  len(fdata))
+                                  size)
                     break
-                idx = idx + 1
-                run_value = fdata[idx]
-                idx = idx + 1
+                run_value = fdata[idx + 1]
+                idx = idx + 2
     
                 if x + run_length > w:
                     logging.error("Run too long! (%s, %s)", run_length, w-x)
-    
-                for _ in range(0, run_length):
-                    for j in range(0, 8):
-                        bitval = ((run_value >> (7-j)) & 1)
-                        if x >= w:
-                            logging.debug("Painting out of image (rle)! "
-                                          +"(x=%s y=%s col=%s)", x, y, bitval)
-                            break
-                        
-                        p = y*width + x + padding_w
-                        data[p] = bitval
-                        x += 1
                 
-                if x >= w:
-                    x = 0
-                    y -= 1
-                    if y < 0:
-                        break
+                # Every byte contains 8 pixels (the pixels out of the row
+                # are discarded)
+                n = min(run_length * 8, w - x)
+                if n > 0:
+                    write_bytes(data, y*width + x + padding_w,
+                                (BITS[run_value] * run_length)[0:n])
+                    x += n
+                
+                if debug and n < run_length * 8:
+                    logging.debug("Painting out of image (rle)! "
+                                  + "(x=%s y=%s)", x, y)
     
             else:
                 # Not RLE encoded
                 run_length = val + 1
                 idx = idx + 1
-                if idx + run_length > len(fdata):
+                if idx + run_length > size:
                     logging.error("Bad run length! (value=%s, available=%s)",
-                                  run_length, len(fdata)-idx)
+                                  run_length, size-idx)
                     break
+                
+                # Every byte contains 8 pixels (the pixels out of the row
+                # are discarded)
+                n = min(run_length * 8, w - x)
+                if n > 0:
+                    write_bytes(data, y*width + x + padding_w,
+                                expand_bytes(view[idx:idx + int((n + 7)/8)],
+                                             BITS)[0:n])
+                    x += n
+                
+                if debug and n < run_length * 8:
+                    logging.debug("Painting out of image (no-rle)! "
+                                  + "(x=%s y=%s)", x, y)
+                
+                idx = idx + run_length
     
-                for _ in range(0, run_length):
-                    for j in range(0, 8):
-                        bitval = ((fdata[idx] >> (7-j)) & 1)
-                        if x >= w:
-                            logging.debug("Painting out of image (no-rle)! "
-                                          + "(x=%s y=%s col=%s)", x, y,
-                                          bitval)
-                            break
-                        
-                        p = y*width + x + padding_w
-                        data[p] = bitval
-                        x += 1
-    
-                    idx = idx + 1
-                    if idx > len(fdata):
-                        logging.error("Bad run length! (value=%s)", run_length)
-                        break
-    
-    
-                if x >= w:
-                    x = 0
-                    y -= 1
-                    if y < 0:
-                        break
+            if x >= w:
+                x = 0
+                y -= 1
     
         if y!=-1 or x!=0:
             logging.warning("Not enough data to decode. Probably the image"
                             + " is not properly generated. (y=%s, x=%s)", y, x)
     
-        if idx != len(fdata):
+        if idx != size:
             logging.warning("there is more data to decode. Probably the image "
                             + "is not properly generated. (%s != %s)", idx,
-                            len(fdata))
+                            size)
         
         return data
 
@@ -116,27 +113,23 @@ class Decoder1b(Decoder):
                         width:int, w_size:int) -> bytes:
         # Create a white image
         data = bytearray(width * h)
+        view = bytes_view(fdata, 0, len(fdata))
         y = h - 1 - padding_h
         w = w - padding_w
-        idx = 0
         data_idx = 0
         while y>=0:
             # Fill left padding with white color
             data_idx = data_idx + padding_w
             
-            # Get colors from BITD data
-            idx = (y * w_size)
-            
-            x = 0
-            while x < w:
-                for j in range(0, 8):
-                    bitval = ((fdata[idx] >> (7-j)) & 1)
-                    data[data_idx] = bitval
-                    data_idx = data_idx + 1 
-                    x = x + 1
-                    if x >= w:
-                        break
-                idx = idx + 1
+            # Get colors from BITD data (8 pixels per byte)
+            if w > 0:
+                idx = (y * w_size)
+                nbytes = int((w + 7)/8)
+                if idx + nbytes > len(fdata):
+                    raise IndexError('index out of range')
+                write_bytes(data, data_idx,
+                            expand_bytes(view[idx:idx + nbytes], BITS)[0:w])
+                data_idx = data_idx + w
                 
             if width - w  - padding_w > 0:
                 # Fill with whites up to the end of the line
@@ -146,9 +139,9 @@ class Decoder1b(Decoder):
           
         return data    
 
-    def decode(self, fdata:bytes, bmp_width: int, bmp_height: int,
-               bmp_padding_w: int, bmp_padding_h: int,
-               palette_name: str, palette_data: bytes) -> bytes:
+    def decode_bitmap(self, fdata:bytes, bmp_width: int, bmp_height: int,
+                      bmp_padding_w: int, bmp_padding_h: int,
+                      palette_name: str, palette_data: bytes) -> Bitmap:
     
         bmp_bpp = 8
         
@@ -157,16 +150,7 @@ class Decoder1b(Decoder):
             bmp_height = bmp_height - bmp_padding_h
             bmp_padding_h = 0 
         
-        # The size of the BMP file in bytes
-        size: int = bmp_width*bmp_height+(self.ncolors*4)+40+14
-        # Data offset
-        offset: int = ((self.ncolors*4)+40+14)
-        
-        self.writeBmpHeader(size, offset)
-
-        self.writeBitmapInfoHeader(bmp_width, bmp_height, bmp_bpp)
-    
-        self.writeColorPalette(palette_name, palette_data)
+        palette: bytes = self.getColorPalette(palette_name, palette_data)
     
         width = bmp_width
         if (width%4) > 0:
@@ -195,9 +179,5 @@ class Decoder1b(Decoder):
             bmp = self.decode_compressed_data(fdata, bmp_width, bmp_height,
                                        bmp_padding_w, bmp_padding_h,
                                        width, w_size)
-        
 
-    
-        self.writeData(bmp)
-        
-        return self.getBmpImage()
+        return Bitmap(bmp_width, bmp_height, bmp_bpp, width, palette, bmp)
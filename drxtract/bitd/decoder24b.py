@@ -3,6 +3,8 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 from .decoder import Decoder
+from .bitmap import Bitmap
+from ..lingosrc.util import repeat_byte, write_bytes
 import logging
 
 #
@@ -32,35 +34,30 @@ class Decoder24b(Decoder):
                 idx = idx + 1
                 run_value = fdata[idx]
                 idx = idx + 1
-                for _ in range(0, run_length):
-                    p = y*width + x
-                    data[p] = run_value
-                    x += 1
-                    if x >= width:
-                        x = 0
-                        y -= 1
-                
+                values = repeat_byte(run_value, run_length)
     
             elif val != 0:
                 # Not RLE encoded
                 run_length = val + 1
                 idx = idx + 1
-                for _ in range(0, run_length):
-                    p = y*width + x
-                    data[p] = fdata[idx]
-                    idx = idx + 1
-                    x += 1
-                    if x >= width:
-                        x = 0
-                        y -= 1
+                if idx + run_length > len(fdata):
+                    raise IndexError('index out of range')
+                values = fdata[idx:idx + run_length]
+                idx = idx + run_length
     
             else: # val is zero
                 idx = idx + 1
                 run_value = fdata[idx]
                 idx = idx + 1
-                p = y*width + x
-                data[p] = run_value
-                x += 1
+                values = repeat_byte(run_value, 1)
+            
+            # Write the run up to the end of every row
+            i = 0
+            while i < len(values):
+                n = min(len(values) - i, width - x)
+                write_bytes(data, y*width + x, values[i:i + n])
+                i += n
+                x += n
                 if x >= width:
                     x = 0
                     y -= 1
@@ -76,60 +73,29 @@ class Decoder24b(Decoder):
     
     
         # Order RGB bytes and discard Alpha channel
-        dataMix = bytearray(w*3 * h)
-        w4 = w*4
-        w3 = w*3
-        w2 = w*2
-        w1 = w
-        for y in range(0, h):
-            yw4 = y*w4
-            yw3 = y*w3
-            for x in range(0, w):
-                sr = yw4 + w3 + x
-                dr = yw3 + x*3 + 0
-                dataMix[dr] = data[sr]  # Red
-                
-                sg = yw4 + w2 + x
-                dg = yw3 + x*3 + 1
-                dataMix[dg] = data[sg]  # Green
-                
-                sb = yw4 + w1 + x
-                db = yw3 + x*3 + 2
-                dataMix[db] = data[sb]  # Blue
-        
-        return dataMix
+        return self.merge_planes(data, w, h, width, [3, 2, 1])
 
     def decode_raw_data(self, fdata: bytes,
                         w:int, h:int,
                         padding_w:int, padding_h:int,
                         width:int, w_size:int) -> bytes:
+        data = self.read_raw_planes(fdata, w, h, padding_w, padding_h,
+                                    width, w_size)
+        
+        # Order RGB bytes and discard Alpha channel
+        return self.merge_planes(data, w, h, width, [3, 2, 1])
 
-          
-        raise NotImplementedError()
-
-
-
-    def decode(self, fdata:bytes, bmp_width: int, bmp_height: int,
-               bmp_padding_w: int, bmp_padding_h: int,
-               palette_name: str, palette_data: bytes) -> bytes:
+    def decode_bitmap(self, fdata:bytes, bmp_width: int, bmp_height: int,
+                      bmp_padding_w: int, bmp_padding_h: int,
+                      palette_name: str, palette_data: bytes) -> Bitmap:
     
         bmp_bpp = 24
-        hsize = 40
         
         # Sometimes the padding is negative
         if bmp_padding_h < 0:
             bmp_height = bmp_height - bmp_padding_h
             bmp_padding_h = 0 
         
-        # The size of the BMP file in bytes
-        size: int = bmp_width*bmp_height*3+hsize+14
-        # Data offset
-        offset: int = hsize+14
-        
-        self.writeBmpHeader(size, offset)
-
-        self.writeBitmapInfoHeader(bmp_width, bmp_height, bmp_bpp)
-    
         width = bmp_width*4
     
         # get the pixel information
@@ -138,7 +104,8 @@ class Decoder24b(Decoder):
         #   - RLE encoded Blue channel for 1 row
         #   - RLE encoded Green channel for 1 row
         #   - RLE encoded Red channel for 1 row
-        w_size = (bmp_width - bmp_padding_w) * 2
+        # Uncompressed rows have the same four planes
+        w_size = (bmp_width - bmp_padding_w) * 4
         
     
         if len(fdata) == w_size*(bmp_height-bmp_padding_h):
@@ -153,9 +120,6 @@ class Decoder24b(Decoder):
             bmp = self.decode_compressed_data(fdata, bmp_width, bmp_height,
                                        bmp_padding_w, bmp_padding_h,
                                        width, w_size)
-        
 
-    
-        self.writeData(bmp)
-        
-        return self.getBmpImage()
+        return Bitmap(bmp_width, bmp_height, bmp_bpp, bmp_width*3, bytes(),
+                      bmp)
@@ -3,8 +3,13 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 from .decoder import Decoder
+from .bitmap import Bitmap
+from ..lingosrc.util import expand_bytes, write_bytes, bytes_view
 import logging
 
+# Pixels of every byte value (one byte per pixel, high nibble first)
+NIBBLES = [bytes([v >> 4, v & 0x0F]) for v in range(0, 256)]
+
 #
 # 4 bits per pixel BITD decoder class.
 # 
@@ -18,35 +23,111 @@ class Decoder4b(Decoder):
                         w:int, h:int,
                         padding_w:int, padding_h:int,
                         width:int, w_size:int) -> bytes:
-        raise NotImplementedError()
+        # Create a white image
+        data = bytearray(width * h)
+        
+        # Every row has w_size bytes (2 pixels per byte) but only the
+        # first w pixels are inside the image
+        w = w - padding_w
+        row_pixels = w_size * 2
+        logging.debug("w=%d, row_pixels=%d", w, row_pixels)
+        
+        view = bytes_view(fdata, 0, len(fdata))
+        size = len(fdata)
+        x = 0
+        y = h - 1 - padding_h
+        idx = 0
+        while (idx < size) and (y>=0):
+            val = fdata[idx]
+            if (val & 0x80) != 0:
+                # RLE encoded
+                run_length = 257 - val
+                if idx+1 >= size:
+                    logging.error("Unexpected end of data! (data length=%s)",
+                                  size)
+                    break
+                pixels = NIBBLES[fdata[idx + 1]] * run_length
+                idx = idx + 2
+    
+            else:
+                # Not RLE encoded
+                run_length = val + 1
+                idx = idx + 1
+                if idx + run_length > size:
+                    logging.error("Bad run length! (value=%s, available=%s)",
+                                  run_length, size-idx)
+                    break
+                pixels = expand_bytes(view[idx:idx + run_length], NIBBLES)
+                idx = idx + run_length
+            
+            if x + len(pixels) > row_pixels:
+                logging.error("Run too long! (%s, %s)", len(pixels),
+                              row_pixels - x)
+            
+            # The pixels out of the image are discarded
+            n = min(len(pixels), w - x)
+            if n > 0:
+                write_bytes(data, y*width + x + padding_w, pixels[0:n])
+            x += len(pixels)
+            
+            if x >= row_pixels:
+                x = 0
+                y -= 1
+    
+        if y!=-1 or x!=0:
+            logging.warning("Not enough data to decode. Probably the image"
+                            + " is not properly generated. (y=%s, x=%s)", y, x)
+    
+        if idx != size:
+            logging.warning("there is more data to decode. Probably the image "
+                            + "is not properly generated. (%s != %s)", idx,
+                            size)
+        
+        return data
 
     def decode_raw_data(self, fdata: bytes,
                         w:int, h:int,
                         padding_w:int, padding_h:int,
                         width:int, w_size:int) -> bytes:
-        raise NotImplementedError()
+        # Create a white image
+        data = bytearray(width * h)
+        view = bytes_view(fdata, 0, len(fdata))
+        y = h - 1 - padding_h
+        w = w - padding_w
+        data_idx = 0
+        while y>=0:
+            # Fill left padding with white color
+            data_idx = data_idx + padding_w
+            
+            # Get colors from BITD data (2 pixels per byte)
+            if w > 0:
+                idx = (y * w_size)
+                nbytes = int((w + 1)/2)
+                write_bytes(data, data_idx,
+                            expand_bytes(view[idx:idx + nbytes], NIBBLES)[0:w])
+                data_idx = data_idx + w
+                
+            if width - w  - padding_w > 0:
+                # Fill with whites up to the end of the line
+                data_idx = data_idx + width - w - padding_w
+            
+            y = y - 1
+          
+        return data    
 
-    def decode(self, fdata:bytes, bmp_width: int, bmp_height: int,
-               bmp_padding_w: int, bmp_padding_h: int,
-               palette_name: str, palette_data: bytes) -> bytes:
+    def decode_bitmap(self, fdata:bytes, bmp_width: int, bmp_height: int,
+                      bmp_padding_w: int, bmp_padding_h: int,
+                      palette_name: str, palette_data: bytes) -> Bitmap:
     
-        bmp_bpp = 4
+        # One byte per pixel
+        bmp_bpp = 8
         
         # Sometimes the padding is negative
         if bmp_padding_h < 0:
             bmp_height = bmp_height - bmp_padding_h
             bmp_padding_h = 0 
         
-        # The size of the BMP file in bytes
-        size: int = bmp_width*bmp_height+(self.ncolors*4)+40+14
-        # Data offset
-        offset: int = ((self.ncolors*4)+40+14)
-        
-        self.writeBmpHeader(size, offset)
-
-        self.writeBitmapInfoHeader(bmp_width, bmp_height, bmp_bpp)
-    
-        self.writeColorPalette(palette_name, palette_data)
+        palette: bytes = self.getColorPalette(palette_name, palette_data)
     
         width = bmp_width
         if (width%4) > 0:
@@ -74,9 +155,5 @@ class Decoder4b(Decoder):
             bmp = self.decode_compressed_data(fdata, bmp_width, bmp_height,
                                        bmp_padding_w, bmp_padding_h,
                                        width, w_size)
-        
 
-    
-        self.writeColorData(bmp)
-        
-        return self.getBmpImage()
+        return Bitmap(bmp_width, bmp_height, bmp_bpp, width, palette, bmp)
@@ -3,6 +3,9 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 from .decoder import Decoder
+from .bitmap import Bitmap
+from ..lingosrc.util import is_debug_enabled, repeat_byte, write_bytes, \
+    bytes_view
 import logging
 
 #
@@ -30,81 +33,69 @@ class Decoder8b(Decoder):
         data = bytearray(bw * h)
         logging.debug("w=%d, h=%d, width=%d, padding_w=%d, bw=%d",
                      w, h-padding_h, width, padding_w, bw)
+        debug: bool = is_debug_enabled()
+        view = bytes_view(fdata, 0, len(fdata))
+        size = len(fdata)
         x = 0
         y = h - 1 - padding_h
         idx = 0
-        while (idx < len(fdata)) and (y>=0):
+        while (idx < size) and (y>=0):
             val = fdata[idx]
             if (val & 0x80) != 0:
                 # RLE encoded
                 run_length = 257 - val
-                if idx+1 >= len(fdata):
+                if idx+1 >= size:
                     logging.error("Unexpected end of data! (data length=%s)",
-                                  len(fdata))
+                                  size)
                     break
-                idx = idx + 1
-                run_value = fdata[idx]
-                idx = idx + 1
-    
-                if x + run_length > w:
+                run_value = fdata[idx + 1]
+                idx = idx + 2
+                
+                # The pixels out of the row are discarded
+                n = min(run_length, w - x)
+                if debug and n < run_length:
                     logging.debug("Run too long! (%s, %s)", run_length, w-x)
-    
-                for _ in range(0, run_length):
-                    if x >= w:
-                        logging.debug("Painting out of image (rle)! "
-                                      +"(x=%s y=%s col=%s)", x, y, run_value)
-                        break
-
-                    p = y*width + x + padding_w
-                    data[p] = run_value
-                    x += 1
                 
-                if x >= w:
-                    x = 0
-                    y -= 1
-                    if y < 0:
-                        break
+                if n > 0:
+                    write_bytes(data, y*width + x + padding_w,
+                                repeat_byte(run_value, n))
+                    x += n
     
             else:
                 # Not RLE encoded
                 run_length = val + 1
                 idx = idx + 1
-                if idx + run_length > len(fdata):
+                if idx + run_length > size:
                     logging.error("Bad run length! (value=%s, available=%s)",
-                                  run_length, len(fdata)-idx)
+                                  run_length, size-idx)
                     break
-    
-                for _ in range(0, run_length):
-                    if x >= w:
-                        logging.debug("Painting out of image (no-rle)! "
-                                      + "(x=%s y=%s col=%s)", x, y,
-                                      fdata[idx])
-                        break
-                    
-                    p = y*width + x + padding_w
-                    data[p] = fdata[idx]
-                    x += 1            
-    
-                    idx = idx + 1
-                    if idx > len(fdata):
-                        logging.error("Bad run length! (value=%s)", run_length)
-                        break
-    
-    
-                if x >= w:           
-                    x = 0
-                    y -= 1
-                    if y < 0:
-                        break
+                
+                # The pixels out of the row are not consumed (the next
+                # byte is read as a new run)
+                n = min(run_length, w - x)
+                if debug and n < run_length:
+                    logging.debug("Painting out of image (no-rle)! "
+                                  + "(x=%s y=%s col=%s)", x + max(n, 0), y,
+                                  fdata[idx + max(n, 0)])
+                
+                if n > 0:
+                    write_bytes(data, y*width + x + padding_w,
+                                view[idx:idx + n])
+                    x += n
+                    idx = idx + n
+            
+            if x >= w:
+                x = 0
+                y -= 1
     
         if y!=-1 or x!=0:
             logging.warning("Not enough data to decode. Probably the image"
                             + " is not properly generated. (y=%s, x=%s)", y, x)
     
-        if idx != len(fdata):
+        if idx != size:
             logging.warning("there is more data to decode. Probably the image "
                             + "is not properly generated. (%s != %s)", idx,
-                            len(fdata))
+                            size)
         
         return data
 
@@ -114,9 +105,9 @@ class Decoder8b(Decoder):
                         width:int, w_size:int) -> bytes:
         # Create a white image
         data = bytearray(width * h)
+        view = bytes_view(fdata, 0, len(fdata))
         y = h - 1 - padding_h
         w = w - padding_w
-        idx = 0
         data_idx = 0
         
         while y>=0:
@@ -124,16 +115,12 @@ class Decoder8b(Decoder):
             data_idx = data_idx + padding_w
             
             # Get colors from BITD data
-            idx = (y * w_size)
-            
-            x = 0
-            while x < w:
-                data[data_idx] = fdata[idx]
-                data_idx = data_idx + 1
-                x = x + 1
-                if x >= w:
-                    break
-                idx = idx + 1
+            if w > 0:
+                idx = (y * w_size)
+                if idx + w > len(fdata):
+                    raise IndexError('index out of range')
+                write_bytes(data, data_idx, view[idx:idx + w])
+                data_idx = data_idx + w
                 
             if width - w  - padding_w > 0:
                 # Fill with whites up to the end of the line
@@ -143,9 +130,9 @@ class Decoder8b(Decoder):
           
         return data    
 
-    def decode(self, fdata:bytes, bmp_width: int, bmp_height: int,
-               bmp_padding_w: int, bmp_padding_h: int,
-               palette_name: str, palette_data: bytes) -> bytes:
+    def decode_bitmap(self, fdata:bytes, bmp_width: int, bmp_height: int,
+                      bmp_padding_w: int, bmp_padding_h: int,
+                      palette_name: str, palette_data: bytes) -> Bitmap:
     
         bmp_bpp = 8
         
@@ -154,16 +141,7 @@ class Decoder8b(Decoder):
             bmp_height = bmp_height - bmp_padding_h
             bmp_padding_h = 0 
         
-        # The size of the BMP file in bytes
-        size: int = bmp_width*bmp_height+(self.ncolors*4)+40+14
-        # Data offset
-        offset: int = ((self.ncolors*4)+40+14)
-        
-        self.writeBmpHeader(size, offset)
-
-        self.writeBitmapInfoHeader(bmp_width, bmp_height, bmp_bpp)
-    
-        self.writeColorPalette(palette_name, palette_data)
+        palette: bytes = self.getColorPalette(palette_name, palette_data)
     
         width = bmp_width
         if (width%4) > 0:
@@ -189,9 +167,5 @@ class Decoder8b(Decoder):
             bmp = self.decode_compressed_data(fdata, bmp_width, bmp_height,
                                        bmp_padding_w, bmp_padding_h,
                                        width, w_size)
-        
 
-    
-        self.writeData(bmp)
-        
-        return self.getBmpImage()
+        return Bitmap(bmp_width, bmp_height, bmp_bpp, width, palette, bmp)
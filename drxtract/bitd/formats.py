@@ -0,0 +1,275 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Pixel buffers of the decoded BITD images (Python only, it isn't
+# transpiled to Javascript).
+#
+
+from typing import Any, List, Optional
+from .bitmap import Bitmap
+from ..clut import palette2tables
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Alpha value of the opaque pixels
+OPAQUE = 255
+
+# 5 bits color components scaled to 8 bits
+SCALE_5BITS = bytes([int(round(v * 255 / 31)) for v in range(0, 32)])
+
+# Translation tables to get the color components of RGB 555 pixels from
+# their high and low bytes
+RED_FROM_HIGH = bytes([SCALE_5BITS[(b >> 2) & 0x1F] for b in range(0, 256)])
+GREEN_FROM_HIGH = bytes([(b & 0x03) << 3 for b in range(0, 256)])
+GREEN_FROM_LOW = bytes([b >> 5 for b in range(0, 256)])
+SCALE_LOW_5BITS = bytes([SCALE_5BITS[b & 0x1F] for b in range(0, 256)])
+
+#
+# Crop the rows of an image
+#
+# =============================================================================
+def crop_rows(data: bytes, stride: int, nrows: int, pixel_size: int, x: int,
+              y: int, width: int, height: int) -> bytes:
+    """
+    Return the pixels of an area of an image whose rows are stored from
+    bottom to top (like in a BMP file). The pixels are returned from the
+    top row to the bottom row, without padding. The area must be inside
+    the image.
+
+    Parameters
+    ----------
+    data : bytes
+        The pixels of the image.
+    stride : int
+        Number of bytes of every row.
+    nrows : int
+        Number of rows of the image.
+    pixel_size : int
+        Number of bytes of every pixel.
+    x : int
+        Left side of the area.
+    y : int
+        Top side of the area.
+    width : int
+        Width of the area.
+    height : int
+        Height of the area.
+
+    Returns
+    -------
+    bytes
+        the pixels of the area.
+
+    """
+    row_size = width * pixel_size
+    view = memoryview(data)
+    rows: List[bytes] = []
+    for row in range(y, y + height):
+        start = (nrows - 1 - row) * stride + x * pixel_size
+        rows.append(view[start:start + row_size])
+
+    return b''.join(rows)
+
+#
+# RGB 555 to RGB
+#
+# =============================================================================
+def rgb555_to_rgb(data: bytes) -> bytes:
+    """Transforms RGB 555 pixels (little endian) into RGB pixels"""
+    low = data[0::2]
+    high = data[1::2]
+    green = (int.from_bytes(high.translate(GREEN_FROM_HIGH), 'big') |
+             int.from_bytes(low.translate(GREEN_FROM_LOW), 'big')
+             ).to_bytes(len(low), 'big')
+
+    rgb = bytearray(len(low) * 3)
+    rgb[0::3] = high.translate(RED_FROM_HIGH)
+    rgb[1::3] = green.translate(SCALE_LOW_5BITS)
+    rgb[2::3] = low.translate(SCALE_LOW_5BITS)
+    return rgb
+
+#
+# BGR to RGB
+#
+# =============================================================================
+def bgr_to_rgb(data: bytes, pixel_size: int) -> bytes:
+    """Transforms BGR (or BGRA) pixels into RGB pixels"""
+    npixels = int(len(data) / pixel_size)
+    rgb = bytearray(npixels * 3)
+    rgb[0::3] = data[2::pixel_size]
+    rgb[1::3] = data[1::pixel_size]
+    rgb[2::3] = data[0::pixel_size]
+    return rgb
+
+#
+# Interleave color components
+#
+# =============================================================================
+def interleave(components: List[bytes]) -> bytes:
+    """Returns the pixels made of some color components (one byte array
+    for every component)"""
+    n = len(components)
+    pixels = bytearray(len(components[0]) * n)
+    for i in range(0, n):
+        pixels[i::n] = components[i]
+    return pixels
+
+#
+# Pixels of a bitmap
+#
+# =============================================================================
+def pixel_view(bitmap: Bitmap) -> memoryview:
+    """
+    Return a read only view of the pixels of a bitmap (without copying
+    them). The rows are stored from bottom to top with bitmap.stride bytes
+    each one and every pixel is stored as bitmap.pixel_format says.
+    """
+    return memoryview(bitmap.data)
+
+#
+# RGBA colors of the palette
+#
+# =============================================================================
+def palette_rgba(bitmap: Bitmap) -> bytes:
+    """
+    Return the palette of a bitmap as RGBA colors (4 bytes per color: red,
+    green, blue and alpha). Only the images with indexed pixels have a
+    palette.
+    """
+    ncolors = int(len(bitmap.palette) / 4)
+    return interleave([bitmap.palette[2::4], bitmap.palette[1::4],
+                       bitmap.palette[0::4], bytes([OPAQUE]) * ncolors])
+
+#
+# Transforms a bitmap into RGBA pixels
+#
+# =============================================================================
+def bitmap2rgba(bitmap: Bitmap, alpha: Optional[bytes] = None,
+                tables: Optional[List[bytes]] = None) -> bytes:
+    """
+    Return the pixels of a bitmap as RGBA pixels (the palette is applied to
+    the indexed pixels with one table translation per component).
+
+    Parameters
+    ----------
+    bitmap : Bitmap
+        The decoded image.
+    alpha : Optional[bytes]
+        The alpha mask of the image (one byte for every pixel, the rows
+        stored like in the bitmap without padding). The pixels are opaque
+        if there isn't any.
+    tables : Optional[List[bytes]]
+        The RGBA lookup tables of the palette (see palette2tables), i.e.
+        the ones of a PaletteCache. They are built from the palette of the
+        bitmap if there aren't any.
+
+    Returns
+    -------
+    bytes
+        4 bytes for every pixel (red, green, blue and alpha). The rows are
+        stored from top to bottom without padding.
+
+    Raises
+    ------
+    ValueError
+        If the bitmap has an unsupported format.
+
+    """
+    width = bitmap.width
+    height = bitmap.height
+    data = crop_rows(bitmap.data, bitmap.stride, height, int(bitmap.bpp / 8),
+                     0, 0, width, height)
+
+    if bitmap.bpp == 8:
+        if tables is None:
+            tables = palette2tables(bitmap.palette)
+        components = [data.translate(tables[0]), data.translate(tables[1]),
+                      data.translate(tables[2])]
+
+    elif bitmap.bpp == 16:
+        rgb = rgb555_to_rgb(data)
+        components = [rgb[0::3], rgb[1::3], rgb[2::3]]
+
+    elif bitmap.bpp == 24:
+        components = [data[2::3], data[1::3], data[0::3]]
+
+    else:
+        raise ValueError("Unsupported bitmap format (%s bpp)"%(bitmap.bpp))
+
+    if alpha is None and bitmap.bpp == 8:
+        components.append(data.translate(tables[3]))
+    elif alpha is None:
+        components.append(bytes([OPAQUE]) * (width * height))
+    else:
+        components.append(crop_rows(alpha, width, height, 1, 0, 0, width,
+                                    height))
+
+    return interleave(components)
+
+#
+# NumPy array of a bitmap
+#
+# =============================================================================
+def bitmap2array(bitmap: Bitmap, rgba: bool = False,
+                 alpha: Optional[bytes] = None,
+                 tables: Optional[List[bytes]] = None) -> Any:
+    """
+    Return the pixels of a bitmap as a NumPy array whose rows are ordered
+    from top to bottom.
+
+    Parameters
+    ----------
+    bitmap : Bitmap
+        The decoded image.
+    rgba : bool
+        False to get a read only view of the pixels (height x width palette
+        indexes, height x width RGB 555 values or height x width x 3 BGR
+        bytes). True to get a height x width x 4 array with the RGBA pixels.
+    alpha : Optional[bytes]
+        The alpha mask of the RGBA pixels (see bitmap2rgba).
+    tables : Optional[List[bytes]]
+        The RGBA lookup tables of the palette (see bitmap2rgba).
+
+    Returns
+    -------
+    numpy.ndarray
+        The pixels.
+
+    Raises
+    ------
+    ImportError
+        If NumPy is not installed.
+    ValueError
+        If the bitmap has an unsupported format.
+
+    """
+    if numpy is None:
+        raise ImportError("NumPy is required to get the pixels as an array")
+
+    width = bitmap.width
+    height = bitmap.height
+    if rgba:
+        return numpy.frombuffer(bitmap2rgba(bitmap, alpha, tables),
+                                dtype=numpy.uint8).reshape(height, width, 4)
+
+    if bitmap.bpp not in (8, 16, 24):
+        raise ValueError("Unsupported bitmap format (%s bpp)"%(bitmap.bpp))
+
+    # The rows are flipped and the padding is skipped without copying
+    pixel_size = int(bitmap.bpp / 8)
+    rows = numpy.frombuffer(bitmap.data, dtype=numpy.uint8,
+                            count=bitmap.stride * height).reshape(
+                                height, bitmap.stride)[::-1,
+                                                       0:width * pixel_size]
+    if bitmap.bpp == 16:
+        return rows.view('<u2')
+
+    if bitmap.bpp == 24:
+        return rows.reshape(height, width, 3)
+
+    return rows
@@ -0,0 +1,268 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+from typing import List, Optional, Tuple
+from ..lingosrc.util import translate_bytes, and_bytes, find_byte, \
+    rfind_byte
+from .bitmap import Bitmap
+
+# Alpha values of the masks
+OPAQUE = 255
+TRANSPARENT = 0
+
+# Translation table that inverts a matte pixels map into an alpha mask
+PIXELS_TO_ALPHA = bytes([OPAQUE, TRANSPARENT]) + bytes(254)
+
+#
+# 8 bits color component to 5 bits
+#
+# =============================================================================
+def component_5bits(value: int) -> int:
+    """
+    Returns the 5 bits color component (of a RGB 555 pixel) that is scaled
+    to an 8 bits color component, or -1 if there is not any.
+    """
+    for v in range(0, 32):
+        if int(round(v * 255 / 31)) == value:
+            return v
+
+    return -1
+
+#
+# Pixels that have the matte color
+#
+# =============================================================================
+def matte_pixels(bitmap: Bitmap, color: Optional[Tuple[int, int, int]] = None,
+                 index: int = -1) -> bytearray:
+    """
+    Find the pixels of a bitmap that have the matte color.
+
+    Parameters
+    ----------
+    bitmap : Bitmap
+        The decoded image.
+    color : Optional[Tuple[int, int, int]]
+        The matte color (red, green and blue).
+    index : int
+        The palette index of the matte color (only for images with a
+        palette, -1 if it isn't used).
+
+    Returns
+    -------
+    bytearray
+        One byte for every pixel (1 if it has the matte color, 0 otherwise).
+        The rows are stored like in the bitmap (from bottom to top) without
+        padding.
+
+    Raises
+    ------
+    ValueError
+        If the bitmap has an unsupported format.
+
+    """
+    width = bitmap.width
+    pixels = bytearray(width * bitmap.height)
+
+    if bitmap.bpp == 8:
+        # Palette indexes with the matte color
+        table = bytearray(256)
+        if index >= 0:
+            table[index] = 1
+        if color is not None:
+            palette = bitmap.palette
+            for i in range(0, int(len(palette) / 4)):
+                if (palette[i*4 + 2] == color[0] and
+                    palette[i*4 + 1] == color[1] and
+                    palette[i*4] == color[2]):
+                    table[i] = 1
+
+        for y in range(0, bitmap.height):
+            start = y * bitmap.stride
+            pixels[y*width:(y + 1)*width] = translate_bytes(
+                bitmap.data[start:start + width], table)
+
+    elif bitmap.bpp == 16:
+        if color is None:
+            return pixels
+
+        red = component_5bits(color[0])
+        green = component_5bits(color[1])
+        blue = component_5bits(color[2])
+        if red < 0 or green < 0 or blue < 0:
+            # The color can't be in the image
+            return pixels
+
+        # Little endian RGB 555 pixels (the upper bit is ignored)
+        value = (red << 10) | (green << 5) | blue
+        low_table = bytearray(256)
+        low_table[value & 0xFF] = 1
+        high_table = bytearray(256)
+        high_table[value >> 8] = 1
+        high_table[(value >> 8) | 0x80] = 1
+
+        for y in range(0, bitmap.height):
+            start = y * bitmap.stride
+            row = bitmap.data[start:start + width*2]
+            pixels[y*width:(y + 1)*width] = and_bytes(
+                translate_bytes(row[0::2], low_table),
+                translate_bytes(row[1::2], high_table))
+
+    elif bitmap.bpp == 24:
+        if color is None:
+            return pixels
+
+        # BGR pixels
+        tables: List[bytearray] = []
+        for component in (color[2], color[1], color[0]):
+            table = bytearray(256)
+            table[component] = 1
+            tables.append(table)
+
+        for y in range(0, bitmap.height):
+            start = y * bitmap.stride
+            row = bitmap.data[start:start + width*3]
+            pixels[y*width:(y + 1)*width] = and_bytes(
+                and_bytes(translate_bytes(row[0::3], tables[0]),
+                          translate_bytes(row[1::3], tables[1])),
+                translate_bytes(row[2::3], tables[2]))
+
+    else:
+        raise ValueError("Unsupported bitmap format (%s bpp)"%(bitmap.bpp))
+
+    return pixels
+
+#
+# Push the spans of a row
+#
+# =============================================================================
+def push_spans(todo: bytearray, stack: List[Tuple[int, int]], width: int,
+               y: int, x1: int, x2: int):
+    """Adds to the stack the first pixel of every span of pixels that have
+    to be filled between two columns of a row"""
+    row = y * width
+    x = x1
+    while x < x2:
+        start = find_byte(todo, 1, row + x, row + x2)
+        if start < 0:
+            break
+
+        stack.append((start - row, y))
+        end = find_byte(todo, 0, start, row + x2)
+        if end < 0:
+            break
+
+        x = end - row
+
+#
+# Flood fill from the borders
+#
+# =============================================================================
+def fill_background(pixels: bytes, width: int, height: int) -> bytearray:
+    """
+    Scanline flood fill of the matte pixels that are connected (4-way) to
+    the border of an image.
+
+    Parameters
+    ----------
+    pixels : bytes
+        One byte for every pixel (1 if it has the matte color, 0 otherwise).
+    width : int
+        The image width.
+    height : int
+        The image height.
+
+    Returns
+    -------
+    bytearray
+        The alpha mask (TRANSPARENT for the filled pixels, OPAQUE for the
+        other ones).
+
+    """
+    mask = bytearray([OPAQUE]) * (width * height)
+    if width <= 0 or height <= 0:
+        return mask
+
+    # Matte pixels that haven't been filled yet
+    todo = bytearray(pixels)
+
+    # The seeds are the matte pixels of the borders
+    stack: List[Tuple[int, int]] = []
+    push_spans(todo, stack, width, 0, 0, width)
+    push_spans(todo, stack, width, height - 1, 0, width)
+    for y in range(1, height - 1):
+        stack.append((0, y))
+        stack.append((width - 1, y))
+
+    while len(stack) > 0:
+        x, y = stack.pop()
+        row = y * width
+        if todo[row + x] == 0:
+            continue
+
+        # Find the span of pixels to fill in this row
+        left = rfind_byte(todo, 0, row, row + x)
+        x1 = 0 if left < 0 else left - row + 1
+        right = find_byte(todo, 0, row + x, row + width)
+        x2 = width if right < 0 else right - row
+
+        todo[row + x1:row + x2] = bytes(x2 - x1)
+        mask[row + x1:row + x2] = bytes([TRANSPARENT]) * (x2 - x1)
+
+        if y > 0:
+            push_spans(todo, stack, width, y - 1, x1, x2)
+        if y < height - 1:
+            push_spans(todo, stack, width, y + 1, x1, x2)
+
+    return mask
+
+#
+# Matte ink mask
+#
+# =============================================================================
+def matte_mask(bitmap: Bitmap, color: Optional[Tuple[int, int, int]] = None,
+               index: int = -1) -> bytearray:
+    """
+    Return the alpha mask of a bitmap where the background (the pixels with
+    the matte color that are connected to the border of the image) is
+    transparent, like the Director's matte ink.
+
+    Parameters
+    ----------
+    bitmap : Bitmap
+        The decoded image.
+    color : Optional[Tuple[int, int, int]]
+        The matte color (red, green and blue).
+    index : int
+        The palette index of the matte color (only for images with a
+        palette, -1 if it isn't used).
+
+    Returns
+    -------
+    bytearray
+        One alpha value for every pixel. The rows are stored like in the
+        bitmap (from bottom to top) without padding.
+
+    Raises
+    ------
+    ValueError
+        If the bitmap has an unsupported format.
+
+    """
+    return fill_background(matte_pixels(bitmap, color, index), bitmap.width,
+                           bitmap.height)
+
+#
+# Background transparent ink mask
+#
+# =============================================================================
+def transparent_mask(bitmap: Bitmap,
+                     color: Optional[Tuple[int, int, int]] = None,
+                     index: int = -1) -> bytes:
+    """
+    Return the alpha mask of a bitmap where every pixel with the background
+    color is transparent, like the Director's background transparent ink.
+    The parameters and the returned mask are the same as in matte_mask.
+    """
+    return translate_bytes(matte_pixels(bitmap, color, index),
+                           PIXELS_TO_ALPHA)
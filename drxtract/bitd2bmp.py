@@ -12,13 +12,109 @@ import sys
 import os
 import logging
 import json
-from .bitd import bitd2bmp
+from .bitd import bitd2bitmap, bitmap2bmp, matte_mask
+from .png import bitmap2png
 from .clut import clut2palette
+from .cache import cached
+from .options import setup_logging
 
-logging.basicConfig(level=logging.DEBUG)
+# Cast member fields used to decode the images
+BITD_FIELDS = ('width', 'height', 'depth', 'w_padding', 'h_padding',
+               'palette_txt')
 
+# Background color of the images
+MATTE_COLOR = (255, 255, 255)
 
+# ==============================================================================
+# Returns the cast member number of the custom palette of the image (if any)
+def custom_palette(castData):
+    bmp_bpp = castData['depth']
+    if bmp_bpp == 8 or bmp_bpp == 4:
+        bmp_palette = castData['palette_txt']
+    elif bmp_bpp == 2:
+        bmp_palette = 'black and white'          
+    else:
+        bmp_palette = 'none'
+    
+    # Check if the palette is a casting member number (custom palette)
+    if type(bmp_palette) == int or bmp_palette.isnumeric():
+        return str(bmp_palette)
+    
+    logging.debug('Using a default palette: %s', bmp_palette)
+    return None
+
+# ==============================================================================
+# Reads the CLUT file of a cast member
+def read_cast_member_clut(cas_dir, member):
+    # Check if the cast member exists
+    if not os.path.isdir(os.path.join(cas_dir, member)):
+        raise ValueError('Can\'t find cast member: %s'%(member))
+    
+    # Check if there is any CLUT file in the directory
+    clut_dir = os.path.join(cas_dir, member)
+    clut_file = None
+    for file in os.listdir(clut_dir):
+        if file.endswith(".CLUT"):
+            clut_file = file
+            break
+    
+    if not clut_file:
+        raise ValueError('Can\'t find any CLUT file in cast member: %s'%(
+            member))
+    
+    with open(os.path.join(clut_dir, clut_file), mode='rb') as cfile:
+        return cfile.read()
 
+# ==============================================================================
+# Returns the area of the decoded image that is saved as a PNG file
+def crop_area(castData):
+    bmp_height = castData['height']
+    bmp_width = castData['width']
+    bmp_padding_w = castData['w_padding']
+    bmp_padding_h = castData['h_padding']
+    w = bmp_width
+    h = bmp_height
+    pw = bmp_padding_w
+    ph = bmp_padding_h
+    if ph < 0:
+        h = h - bmp_padding_h
+        ph = 0
+    
+    return (pw, ph, w, h)
+
+# ==============================================================================
+# Saves a BITD file as a BMP file (and a PNG file) in a folder. The RGBA
+# lookup tables of a custom palette can be shared by all its images.
+def save_bitmap(castData, fdata, clutData, dest_dir, basename, cache=None,
+                tables=None):
+    file_name = "%s.%s"%(basename, 'bmp')
+    logging.info(u"Saving file content to: %s", file_name)
+    
+    # The image is decoded only once (and only if the BMP or the PNG file
+    # is not in the cache)
+    parts = (fdata, clutData, [castData.get(f) for f in BITD_FIELDS])
+    decoded = []
+    def decode():
+        if len(decoded) == 0:
+            decoded.append(bitd2bitmap(castData, clutData, fdata))
+        return decoded[0]
+    
+    bmp = cached(cache, 'BITD', parts, lambda: bitmap2bmp(castData, decode()))
+    with open(os.path.join(dest_dir, file_name), 'wb') as file:
+        file.write(bmp)
+    
+    # Crop the image and make the background (the white pixels connected to
+    # the border) transparent
+    def encode_png():
+        bitmap = decode()
+        x, y, w, h = crop_area(castData)
+        return bitmap2png(bitmap, x, y, w, h,
+                          alpha=matte_mask(bitmap, MATTE_COLOR),
+                          tables=tables)
+    
+    png = cached(cache, 'PNG', parts, encode_png)
+    with open(os.path.join(dest_dir, "%s.%s"%(basename, 'png')), 'wb') as file:
+        file.write(png)
 
 # ==============================================================================
 def bitd_file2bmp(castData, bitd_file):
@@ -26,62 +122,23 @@ def bitd_file2bmp(castData, bitd_file):
     
     with open(bitd_file, mode='rb') as file:
         fdata = file.read()
-        
-        file_ext = 'bmp'
 
-        bmp_bpp = castData['depth']
-        if bmp_bpp == 8:
-            bmp_palette = castData['palette_txt']
-        elif bmp_bpp == 2:
-            bmp_palette = 'black and white'          
-        else:
-            bmp_palette = 'none'
-
-        file_name = "%s.%s"%(os.path.basename(bitd_file)[:-5], file_ext)
-
-        # Check if the palette is a casting member number (custom palette)
-        if type(bmp_palette) == int or bmp_palette.isnumeric():
-            bmp_palette = str(bmp_palette)
-            
-            # Check if the cast member exists
-            base_dir = os.path.dirname(sys.argv[1])
-            if not os.path.isdir(os.path.join(base_dir, bmp_palette)):
-                logging.error('Can\'t find cast member: %s', bmp_palette)
-                sys.exit(-1)
-            
-            # Check if there is any CLUT file in the directory
-            clut_dir = os.path.join(base_dir, bmp_palette)
-            clut_file = None
-            for file in os.listdir(clut_dir):
-                if file.endswith(".CLUT"):
-                    clut_file = file
-                    break
-            
-            if not clut_file:
-                logging.error('Can\'t find any CLUT file in cast member: %s',
-                              bmp_palette)
-                sys.exit(-1)            
-            
-            with open(os.path.join(clut_dir, clut_file), mode='rb') as cfile:
-                cData = cfile.read()
-                clutData = clut2palette(cData)
-           
+        bmp_palette = custom_palette(castData)
+        if bmp_palette is not None:
+            clutData = clut2palette(read_cast_member_clut(
+                os.path.dirname(os.path.dirname(bitd_file)), bmp_palette))
             logging.debug('Using a custom palette: %s', bmp_palette)
-            
-        else:
-            logging.debug('Using a default palette: %s', bmp_palette)
-
-        logging.info(u"Saving file content to: %s", file_name)
-
-
-        bmp = bitd2bmp(castData, clutData, fdata)
-        with open(os.path.join(sys.argv[1], file_name), 'wb') as file:
-            file.write(bmp)
+        
+        save_bitmap(castData, fdata, clutData, os.path.dirname(bitd_file),
+                    os.path.basename(bitd_file)[:-5])
 
 # ==============================================================================
 def main():
+    setup_logging()
+
     if len(sys.argv) < 3:
-        print("USAGE: bitd2bmp <work directory> <bitd file name>")
+        print("USAGE: bitd2bmp <work directory> <bitd file name>"
+              + " [--log-level LEVEL]")
 
     else:
         if not os.path.isdir(sys.argv[1]):
@@ -109,45 +166,12 @@ def main():
             text = json_file.read()
             json_data = json.loads(text)
         
-        # Generate BMP image
-        bitd_file = os.path.join(sys.argv[1], sys.argv[2])
-        bitd_file2bmp(json_data, bitd_file)
-        
-        # Use ImageMagick to remove the background
-        basename = os.path.basename(bitd_file)[:-5]
-        inp_name = os.path.join(sys.argv[1], "%s.%s"%(basename, 'bmp'))
-        tmp_name = os.path.join(sys.argv[1], "%s.%s"%(basename, 'tmp.png'))
-        out_name = os.path.join(sys.argv[1], "%s.%s"%(basename, 'png'))
-        command = '-alpha off -bordercolor white -border 1 \\( +clone -fill '\
-                  'none -floodfill +0+0 white '\
-                  '-alpha extract \\) '\
-                  '-compose CopyOpacity -composite -shave 1'
-        os.system('convert %s %s %s'%(
-            inp_name, # input file
-            command, # command
-            tmp_name #output file
-        ))
-        
-        # Crop the image
-        bmp_height = json_data['height']
-        bmp_width = json_data['width']
-        bmp_padding_w = json_data['w_padding']
-        bmp_padding_h = json_data['h_padding']
-        w = bmp_width
-        h = bmp_height
-        pw = bmp_padding_w
-        ph = bmp_padding_h
-        if ph < 0:
-            h = h - bmp_padding_h
-            ph = 0
-        
-        command = '-crop %sx%s+%s+%s'%(w, h, pw, ph)
-        os.system('convert %s %s %s'%(
-            tmp_name, # input file
-            command, # command
-            out_name #output file
-        ))
+        # Generate BMP and PNG images
+        try:
+            bitd_file2bmp(json_data, os.path.join(sys.argv[1], sys.argv[2]))
+        except ValueError as e:
+            logging.error(str(e))
+            sys.exit(-1)
         
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,237 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# On-disk cache of decoded chunks. The entries are addressed by a hash of
+# the chunk payload and the decode parameters, so identical chunks of
+# different movies are decoded only once.
+#
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Change it when the output of any cached decoder changes
+CACHE_VERSION = 2
+
+# Size of the cache after an eviction (ratio of the maximum size)
+EVICTION_RATIO = 0.9
+
+STATS_FIELDS = ('hits', 'misses', 'stores', 'evictions', 'bytes_read',
+                'bytes_written')
+
+#
+# Decode cache class
+#
+# =============================================================================
+class DecodeCache:
+    """This class stores the decoded data of the chunks in a directory. When
+    the directory grows over the maximum size the least recently used
+    entries are removed.
+    The cache can be shared by several processes (each entry is written
+    into a temporary file that is renamed when it is complete)."""
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory: str = directory
+        self.max_size: int = max_size
+        """Maximum size of the cache (in bytes)"""
+
+        self.size: Optional[int] = None
+        """Estimated size of the cache (computed when it is needed)"""
+
+        self.stats: Dict[str, int] = dict.fromkeys(STATS_FIELDS, 0)
+
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, kind: str, *parts: Any) -> str:
+        """Returns the key of a decoded chunk. The parts can be bytes (i.e.
+        the chunk payload) or any JSON serializable value (the decode
+        parameters)."""
+        h = hashlib.sha256()
+        h.update(('%s:%d'%(kind, CACHE_VERSION)).encode('utf-8'))
+        for part in parts:
+            if isinstance(part, (bytes, bytearray, memoryview)):
+                data = bytes(part)
+                h.update(b'B%d:'%(len(data)))
+            else:
+                data = json.dumps(part, sort_keys=True).encode('utf-8')
+                h.update(b'J%d:'%(len(data)))
+            h.update(data)
+
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[0:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the data of an entry (or None if it isn't in the cache)"""
+        path = self._path(key)
+        try:
+            with open(path, mode='rb') as file:
+                data = file.read()
+        except OSError:
+            self.stats['misses'] += 1
+            return None
+
+        # Most recently used entry
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self.stats['hits'] += 1
+        self.stats['bytes_read'] += len(data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        """Stores an entry in the cache"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            logging.warning("Can not write cache entry: %s", path)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        self.stats['stores'] += 1
+        self.stats['bytes_written'] += len(data)
+
+        if self.size is None:
+            self.size = self.disk_size()
+        else:
+            self.size += len(data)
+
+        if self.size > self.max_size:
+            self.evict()
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """Returns the last use time, the size and the path of every entry"""
+        entries: List[Tuple[float, int, str]] = []
+        for dirpath, dirnames, filenames in os.walk(self.directory):
+            for f in filenames:
+                if f.endswith('.tmp'):
+                    continue
+                path = os.path.join(dirpath, f)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        return entries
+
+    def disk_size(self) -> int:
+        """Returns the size of all the entries"""
+        return sum(entry[1] for entry in self.entries())
+
+    def evict(self):
+        """Removes the least recently used entries"""
+        entries = sorted(self.entries())
+        size = sum(entry[1] for entry in entries)
+        limit = self.max_size * EVICTION_RATIO
+        for mtime, entry_size, path in entries:
+            if size <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= entry_size
+            self.stats['evictions'] += 1
+
+        self.size = size
+
+    def take_stats(self) -> Dict[str, int]:
+        """Returns the statistics and resets them"""
+        stats = self.stats
+        self.stats = dict.fromkeys(STATS_FIELDS, 0)
+        return stats
+
+    def merge_stats(self, stats: Dict[str, int]):
+        """Adds the statistics of other process"""
+        for field in STATS_FIELDS:
+            self.stats[field] += stats.get(field, 0)
+
+    def report(self):
+        """Prints the statistics (they are printed whatever the log level
+        is, the scripts only report them when the cache is used)"""
+        requests = self.stats['hits'] + self.stats['misses']
+        ratio = 0.0
+        if requests > 0:
+            ratio = 100.0 * self.stats['hits'] / requests
+        print(("Decode cache: %d hits, %d misses (%.1f%% hit rate), "
+               + "%d stores, %d evictions, %d bytes read, "
+               + "%d bytes written")%(self.stats['hits'],
+                                      self.stats['misses'], ratio,
+                                      self.stats['stores'],
+                                      self.stats['evictions'],
+                                      self.stats['bytes_read'],
+                                      self.stats['bytes_written']))
+
+    def __getstate__(self):
+        # The statistics of the copies start at zero
+        return (self.directory, self.max_size)
+
+    def __setstate__(self, state):
+        self.__init__(state[0], state[1])
+
+
+#
+# Decode by using the cache
+#
+# =============================================================================
+def cached(cache: Optional[DecodeCache], kind: str, parts: Tuple[Any, ...],
+           decode: Callable[[], bytes]) -> bytes:
+    """
+    Return the decoded data of a chunk from the cache, or decode it (and
+    store it into the cache) if it isn't there.
+
+    Parameters
+    ----------
+    cache : Optional[DecodeCache]
+        The cache (if None the data is always decoded).
+    kind : str
+        The kind of decoded data (i.e. 'BITD').
+    parts : Tuple[Any, ...]
+        The chunk payload and the decode parameters.
+    decode : Callable[[], bytes]
+        The function that decodes the chunk.
+
+    Returns
+    -------
+    bytes
+        the decoded data.
+
+    """
+    if cache is None:
+        return decode()
+
+    key = cache.key(kind, *parts)
+    data = cache.get(key)
+    if data is None:
+        data = decode()
+        cache.put(key, data)
+
+    return data
+
+#
+# Open decode cache
+#
+# =============================================================================
+def open_cache(directory: Optional[str],
+               max_size_mb: int) -> Optional[DecodeCache]:
+    """Returns the cache in a directory (or None if there is no directory)"""
+    if directory is None or len(directory) == 0:
+        return None
+
+    return DecodeCache(directory, max_size_mb * 1024 * 1024)
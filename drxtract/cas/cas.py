@@ -3,8 +3,11 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 from typing import List
-import struct
 import logging
+from ..lingosrc.util import RecordLayout, is_debug_enabled
+
+# CAS record (index of the casting element chunk)
+CAS_RECORD = RecordLayout("i")
 
 #
 # Reads from CAS data the basic casting information
@@ -31,13 +34,11 @@ def parse_cas_file_data(fdata: bytes) -> List[int]:
         file structure. 
         
     """
-    indx = 0
-    i = 0
-    cas_data: List[int] = []
-    while len(fdata) >= indx + 4:
-        cas_index = struct.unpack(">i", fdata[(indx):(indx+4)])[0]
-        indx = indx + 4
-        cas_data.append(cas_index)
-        logging.debug('CAS[%d] = %08x', i, cas_index)
-        i = i + 1
+    cas_data: List[int] = [fields[0] for fields in CAS_RECORD.iter_unpack(
+        '>', fdata, 0, len(fdata) // CAS_RECORD.size)]
+    
+    if is_debug_enabled():
+        for i in range(0, len(cas_data)):
+            logging.debug('CAS[%d] = %08x', i, cas_data[i])
+    
     return cas_data
@@ -12,18 +12,32 @@
 import sys
 import os
 import logging
-import re
 import json
 import base64
-from shutil import copyfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 
 from .vwcf import parse_vwcf_file_data
 from .cas import parse_cas_file_data
-from .key import parse_key_file_data
+from .key import parse_key_file_data, FileReference
 from .lctx import parse_lctx_file_data, LingoScripReference
 from .cast import parse_cast_file_data
-
-logging.basicConfig(level=logging.DEBUG)
+from .clut import clut2rgb, clut2palette, PaletteCache
+from .fmap import FontInfo
+from .lingosrc.parse import parse_lnam_file_data
+from .riffxtract import chunk_file_name
+from .chunk_source import ChunkSource, BinDirSource
+from .bitd2bmp import custom_palette, save_bitmap
+from .snd2wav import save_sound
+from .stxt2json import add_text_data, load_fontmap
+from .rte22bmp import save_rte2
+from .lscr2lingo import lscr2lingo
+from .lscr2js import lscr2js
+from .options import pop_option, pop_jobs, setup_logging
+from .cache import DecodeCache, cached, open_cache
+from .journal import Journal
+from .transcode import SoundTask, AUDIO_FORMATS, DEFAULT_AUDIO_FORMAT, \
+    PASS_THROUGH, transcode_sounds
 
 
 # Default byte order for MAC
@@ -34,76 +48,254 @@ BINDIR = 'bin'
 CASDIR = 'cas'
 
 
-if len(os.path.dirname(sys.argv[0])) == 0:
-    basepath = '%s '%(sys.executable)
-else:
-    basepath = ('%s/'%(os.path.dirname(sys.argv[0])))
-
-# ==============================================================================
-# Replace the extension in a filename
-def replace_ext(filename, new_extension):
-    f = filename
-    if '.' in f:
-        f = filename[0:filename.rfind('.')]
-        f = '%s.%s'%(f, new_extension)
-        
-    return f
-    
-
-
-# ==============================================================================
-def parse_key_file(byte_order, key_file):
-    logging.debug("Parsing key file: %s ---------------------------", key_file)
-
-    with open(key_file, mode='rb') as file:
-        fdata = file.read()
-
-        return parse_key_file_data(byte_order, fdata)
-    return {}
-
 # ==============================================================================
-def parse_cas_file(cas_file):
-    logging.debug("Parsing cas file: %s ---------------------------", cas_file)
+# Extracts the cast members of a movie into a "cas" directory
+class CastExtractor:
+    def __init__(self, source: ChunkSource, byte_order: str, directory: str,
+                 fontmap: List[FontInfo],
+                 cache: Optional[DecodeCache] = None,
+                 audio_format: str = DEFAULT_AUDIO_FORMAT):
+        self.source: ChunkSource = source
+        self.fontmap: List[FontInfo] = fontmap
+        self.cache: Optional[DecodeCache] = cache
+        self.directory: str = directory
+        self.cas_dir: str = os.path.join(directory, CASDIR)
+        self.audio_format: str = audio_format
+        
+        # Decoded sounds that have to be encoded
+        self.sounds: List[SoundTask] = []
+        
+        # Look for KEY_ and CAS_ files
+        key_file = source.find(('KEY_',))
+        cas_file = source.find(('CAS_',))
+        lctx_file = source.find(('Lctx', 'LctX'))
+        lnam_file = source.find(('Lnam',))
+        sord_file = source.find(('Sord',))
+        vwcf_file = source.find(('VWCF', 'DRCF'))
+        
+        self.lnam_file: Optional[str] = lnam_file
+        self.fmap_file: Optional[str] = source.find(('Fmap',))
+        
+        if key_file is None:
+            raise ValueError('Can not find a KEY_ file!')
 
-    with open(cas_file, mode='rb') as file:
-        fdata = file.read()
+        if cas_file is None:
+            raise ValueError('Can not find a CAS_ file!')
 
-        return parse_cas_file_data(fdata)
+        if sord_file is None:
+            raise ValueError('Can not find a Sord file!')
             
-    return []
-
-
-# ==============================================================================
-def parse_vwcf_file(vwcf_file):
-    logging.debug("Parsing vwcf file: %s -------------------------", vwcf_file)
-    with open(vwcf_file, mode='rb') as file:
-        fdata = file.read()
-
-        return parse_vwcf_file_data(fdata)
-    
-    return {}
-
-# ==============================================================================
-def parse_lctx_file(lctx_file):
-    logging.debug("Parsing lctx file: %s -------------------------", lctx_file)
-
-    with open(lctx_file, mode='rb') as file:
-        fdata = file.read()
-
-        return parse_lctx_file_data(fdata)
-    
-    return []
-# ==============================================================================
-def parse_cast_file(cast_file, kelm, dest_dir, lctx_elements, lnam_file):
-    logging.debug("Parsing cast file: %s -------------------------", cast_file)
-
-    with open(cast_file, mode='rb') as file:
-        fdata = file.read()
-
-        copyfile(cast_file, os.path.join(dest_dir, os.path.basename(cast_file)))
+        if vwcf_file is None:
+            raise ValueError('Can not find a VWCF or DRCF file!')
+        
+        if not os.path.isdir(self.cas_dir):
+            os.mkdir(self.cas_dir)
+        
+        config = parse_vwcf_file_data(source.read(vwcf_file))
+        # Write config data to JSON file
+        with open(os.path.join(self.cas_dir, 'config.json'), 'wb') as jsfile:
+            jsfile.write(json.dumps(config, indent=4, sort_keys=True).encode('utf-8'))
+        
+        self.cas_elements: List[int] = parse_cas_file_data(
+            source.read(cas_file))
+        self.key_elements: Dict[int, List[FileReference]] = \
+            parse_key_file_data(byte_order, source.read(key_file))
+        
+        self.lctx_elements: List[LingoScripReference] = []
+        if lctx_file is None:
+            logging.warning('Can not find a Lctx file!')
+        else:
+            self.lctx_elements = parse_lctx_file_data(source.read(lctx_file))
+        
+        # The names are shared by all the scripts
+        self.name_list: Optional[List[str]] = None
+        
+        # Custom palettes by cast member
+        self.palettes: PaletteCache = PaletteCache()
+        if lnam_file is None:
+            logging.warning('Can not find a Lnam file!')
+        else:
+            self.name_list = parse_lnam_file_data(source.read(lnam_file))
+
+    # ==========================================================================
+    # Returns the files related to a cast member
+    def related_files(self, elm: int) -> List[FileReference]:
+        cas_index = self.cas_elements[elm - 1]
+        if cas_index in self.key_elements:
+            return self.key_elements[cas_index]
+        
+        return []
+
+    # ==========================================================================
+    # Returns the name of the CLUT file of a cast member (custom palettes)
+    def find_clut(self, member: str) -> str:
+        elm = int(member)
+        if elm < 1 or elm > len(self.cas_elements):
+            raise ValueError('Can\'t find cast member: %s'%(member))
+        
+        for rf in self.related_files(elm):
+            f = chunk_file_name(rf['index'], rf['chunkID'])
+            if f.endswith('.CLUT') and self.source.exists(f):
+                return f
+        
+        raise ValueError('Can\'t find any CLUT file in cast member: %s'%(
+            member))
+
+    # ==========================================================================
+    # Reads the CLUT file of a cast member (custom palettes)
+    def read_clut(self, member: str) -> bytes:
+        return self.source.read(self.find_clut(member))
+
+    # ==========================================================================
+    # Returns the BMP palette of a cast member (custom palettes). The palette
+    # is converted only once for all the images that use it.
+    def custom_palette_data(self, member: str) -> bytes:
+        elm = int(member)
+        if not self.palettes.has_palette(elm):
+            cData = self.read_clut(member)
+            self.palettes.add_palette(elm, cached(self.cache, 'CLUT', (cData,),
+                                                  lambda: clut2palette(cData)))
+        
+        return self.palettes.get_palette(elm)
 
-        castData = parse_cast_file_data(fdata)
-        #logging.debug("casData: " + json.dumps(castData))
+    # ==========================================================================
+    # Returns the name of the script file of a cast member (if any)
+    def script_file(self, castData) -> Optional[str]:
+        if ('content' in castData) and ('basic' in castData['content']):
+            scridx = castData['content']['basic']['script_index']
+        else:
+            scridx = 0
+        
+        if scridx <= 0 or self.lctx_elements[scridx - 1]['index'] < 0:
+            return None
+        
+        return "%d.Lscr"%(self.lctx_elements[scridx - 1]['index'])
+
+    # ==========================================================================
+    # Returns the names of the files used to extract a cast member (the
+    # extraction must be done again when any of them changes). The sounds
+    # also depend on the audio format, that is added as an "audio:<format>"
+    # pseudo input.
+    def member_inputs(self, elm: int) -> List[str]:
+        fname = '%i.CASt'%(self.cas_elements[elm - 1])
+        inputs = [fname]
+        if not self.source.exists(fname):
+            return inputs
+        
+        castData = parse_cast_file_data(self.source.read(fname))
+        script_file = self.script_file(castData)
+        if script_file is not None:
+            inputs.append(script_file)
+            if self.lnam_file is not None:
+                inputs.append(self.lnam_file)
+        
+        for rf in self.related_files(elm):
+            f = chunk_file_name(rf['index'], rf['chunkID'])
+            inputs.append(f)
+            
+            if f.endswith('.BITD'):
+                bmp_palette = custom_palette(castData)
+                if bmp_palette is not None:
+                    inputs.append(self.find_clut(bmp_palette))
+            
+            if f.endswith('.STXT') and self.fmap_file is not None:
+                inputs.append(self.fmap_file)
+            
+            if f.endswith('.snd_'):
+                inputs.append('audio:%s'%(self.audio_format))
+        
+        return inputs
+
+    # ==========================================================================
+    # Returns the files generated by the extraction of a cast member
+    # (relative to the base directory)
+    def member_outputs(self, elm: int) -> List[str]:
+        dest_dir = os.path.join(CASDIR, str(elm))
+        if not os.path.isdir(os.path.join(self.directory, dest_dir)):
+            return []
+        
+        return [os.path.join(dest_dir, f) for f in
+                sorted(os.listdir(os.path.join(self.directory, dest_dir)))]
+
+    # ==========================================================================
+    # Decompiles the script of a cast member
+    def decompile_script(self, castData, dest_dir, script_file):
+        if self.name_list is None:
+            return
+        
+        fdata = self.source.read(script_file)
+        basename = script_file[0:script_file.rfind('.')]
+        
+        logging.debug("Decompiling lingo script: %s", script_file)
+        code = lscr2lingo(fdata, self.name_list, self.cache).encode('utf-8')
+        with open(os.path.join(dest_dir, '%s.lingo'%(basename)), 'wb') as cfile:
+            cfile.write(code)
+        castData['code'] = base64.b64encode(code).decode()
+
+        logging.debug("Transpiling lingo script: %s", script_file)
+        code = lscr2js(fdata, self.name_list, self.cache).encode('utf-8')
+        with open(os.path.join(dest_dir, '%s.js'%(basename)), 'wb') as cfile:
+            cfile.write(code)
+        castData['jscode'] = base64.b64encode(code).decode()
+
+    # ==========================================================================
+    # Converts a file related to a cast member
+    def convert(self, castData, dest_dir, f):
+        basename = f[0:f.rfind('.')]
+        
+        if f.endswith('.BITD'):
+            logging.debug("Extracting image: %s", f)
+            clutData = bytes()
+            tables = None
+            bmp_palette = custom_palette(castData)
+            if bmp_palette is not None:
+                clutData = self.custom_palette_data(bmp_palette)
+                tables = self.palettes.get_rgba_tables(int(bmp_palette))
+                logging.debug('Using a custom palette: %s', bmp_palette)
+            
+            save_bitmap(castData, self.source.read(f), clutData, dest_dir,
+                        basename, self.cache, tables)
+        
+        if f.endswith('.snd_'):
+            logging.debug("Extracting sound: %s", f)
+            save_sound(castData, self.source.read(f), dest_dir, basename,
+                       self.cache, (None if self.audio_format == PASS_THROUGH
+                                    else self.sounds))
+        
+        if f.endswith('.STXT'):
+            logging.debug("Extracting text information: %s", f)
+            add_text_data(castData, self.fontmap, self.source.read(f))
+        
+        if f.endswith('.RTE2'):
+            logging.debug("Extracting image: %s", f)
+            save_rte2(self.source.read(f), dest_dir, basename)
+        
+        if f.endswith('.CLUT'):
+            logging.debug("Extracting palette information: %s", f)
+            castData['palette'] = clut2rgb(self.source.read(f))
+
+    # ==========================================================================
+    # Extracts a cast member into its own directory and returns the errors of
+    # the files that couldn't be extracted (the other files are extracted
+    # anyway)
+    def extract_member(self, elm: int) -> List[str]:
+        # Create directory
+        dest_dir = os.path.join(self.cas_dir, str(elm))
+        if not os.path.isdir(dest_dir):
+            os.mkdir(dest_dir)
+        
+        fname = '%i.CASt'%(self.cas_elements[elm - 1])
+        if not self.source.exists(fname):
+            logging.warning('File %s for casting element %i does not '
+                            + 'exists!', fname, elm)
+            return []
+        
+        logging.info('Casting element number %i is %s file!', elm, fname)
+        
+        logging.debug("Parsing cast file: %s -------------------------", fname)
+        self.source.save(fname, dest_dir)
+        castData = parse_cast_file_data(self.source.read(fname))
+        errors: List[str] = []
 
         # Check if there is a CAST member script
         if (('content' in castData) and ('extra' in castData['content'])
@@ -113,151 +305,203 @@ def parse_cast_file(cast_file, kelm, dest_dir, lctx_elements, lnam_file):
                 cfile.write(base64.b64decode(castData['content']['extra'][0]))
 
         # Decompile script (if any)
-        if ('content' in castData) and ('basic' in castData['content']):
-            scridx = castData['content']['basic']['script_index']
-        else:
-            scridx = 0
-        if scridx > 0:
-            logging.debug("Script index: %d", scridx)
-            if scridx <= 0 or lctx_elements[scridx - 1]['index'] < 0:
-                logging.debug("Empty script file!")
+        script_file = self.script_file(castData)
+        if script_file is not None:
+            logging.debug("Script file: %s", script_file)
+
+            if self.source.exists(script_file):
+                self.source.save(script_file, dest_dir)
+                try:
+                    self.decompile_script(castData, dest_dir, script_file)
+                except Exception as e:
+                    logging.exception("Can not decompile %s", script_file)
+                    errors.append('%s: %s: %s'%(script_file,
+                                                type(e).__name__, e))
             else:
-                reference: LingoScripReference = lctx_elements[scridx - 1]
-                script_file = "%d.Lscr"%(reference['index'])
-                logging.debug("Script file: %s", script_file)
-
-                src = os.path.join(os.path.dirname(cast_file), script_file)
-                dst = os.path.join(dest_dir, script_file)
-                if os.path.isfile(src):
-                    copyfile(src, dst)
-                else:
-                    logging.warning("There is no %s file (maybe empty file)", src)
-
-                if lnam_file is not None:
-                    cmd = '%slscr2lingo %s %s %s'%(
-                        basepath, # Scripts path
-                        dest_dir, # work directory
-                        script_file, # script file name
-                        lnam_file
-                    )
-                    logging.debug("======================================================")
-                    logging.debug("Decompiling lingo script by using the command:")        
-                    logging.debug(cmd)
-                    logging.debug("------------------------------------------------------")
-                    os.system(cmd)
-                    
-                    codefile = os.path.join(dest_dir, replace_ext(script_file, 'lingo'))
-                    if os.path.isfile(codefile):
-                        logging.debug("Decompiled code file: %s", codefile)
-                        with open(codefile, mode='rb') as cfile:
-                            castData['code'] = base64.b64encode(cfile.read()).decode()
-
-                    cmd = '%slscr2js %s %s %s'%(
-                        basepath, # Scripts path
-                        dest_dir, # work directory
-                        script_file, # script file name
-                        lnam_file
-                    )
-                    logging.debug("======================================================")
-                    logging.debug("Transpiling lingo script by using the command:")        
-                    logging.debug(cmd)
-                    logging.debug("------------------------------------------------------")
-                    os.system(cmd)
-                    
-                    codefile = os.path.join(dest_dir, replace_ext(script_file, 'js'))
-                    if os.path.isfile(codefile):
-                        logging.debug("Decompiled code file: %s", codefile)
-                        with open(codefile, mode='rb') as cfile:
-                            castData['jscode'] = base64.b64encode(cfile.read()).decode()
+                logging.warning("There is no %s file (maybe empty file)",
+                                script_file)
+        
+        kelm = self.related_files(elm)
+        if len(kelm) <= 0:
+            logging.info("%s: has no related data!", fname)
+        
+        for rf in kelm:
+            f = chunk_file_name(rf['index'], rf['chunkID'])
+            logging.debug("Related file: %s", f)
+            if not self.source.exists(f):
+                logging.warning("There is no %s file (maybe empty file)", f)
+                continue
+            
+            self.source.save(f, dest_dir)
+            try:
+                self.convert(castData, dest_dir, f)
+            except Exception as e:
+                logging.exception("Can not extract %s", f)
+                errors.append('%s: %s: %s'%(f, type(e).__name__, e))
         
         # Write CAST data to JSON file
         with open(os.path.join(dest_dir, 'data.json'), 'wb') as jsfile:
             jsfile.write(json.dumps(castData, indent=4, sort_keys=True
                                     ).encode('utf-8'))
         
-        if kelm is None or len(kelm) <= 0:
-            logging.info("%s: has no related data!", cast_file)
+        return errors
+
+
+# ==============================================================================
+# Extracts a cast member and returns the error message (if it fails or any of
+# its files can't be extracted)
+def extract_member(extractor: CastExtractor, elm: int) -> Optional[str]:
+    try:
+        errors = extractor.extract_member(elm)
+    except Exception as e:
+        logging.exception("Can not extract casting element %i", elm)
+        return '%s: %s'%(type(e).__name__, e)
+    
+    if len(errors) > 0:
+        return '; '.join(errors)
+    
+    return None
+
+
+# Cast extractor of the worker processes
+worker_extractor: Optional[CastExtractor] = None
+
+def init_worker(extractor: CastExtractor):
+    global worker_extractor
+    worker_extractor = extractor
+
+def extract_worker_member(elm: int) -> Tuple[Optional[str], Dict[str, int],
+                                             List[SoundTask]]:
+    error = extract_member(worker_extractor, elm)
+    
+    # The cache statistics and the sounds to encode are sent to the main
+    # process
+    stats = {}
+    if worker_extractor.cache is not None:
+        stats = worker_extractor.cache.take_stats()
+    
+    sounds = worker_extractor.sounds
+    worker_extractor.sounds = []
+    
+    return (error, stats, sounds)
+
+
+# ==============================================================================
+# Extracts all the cast members of a movie and returns the numbers of the
+# members that couldn't be extracted. When a journal is provided the members
+# whose input files didn't change since the previous extraction are skipped.
+# The sounds are encoded at the end, with up to "jobs" ffmpeg processes.
+def extract_cast(source: ChunkSource, byte_order: str, directory: str,
+                 fontmap: List[FontInfo], jobs: int = 1,
+                 cache: Optional[DecodeCache] = None,
+                 journal: Optional[Journal] = None,
+                 audio_format: str = DEFAULT_AUDIO_FORMAT) -> List[int]:
+    extractor = CastExtractor(source, byte_order, directory, fontmap, cache,
+                              audio_format)
+    
+    nelements = len(extractor.cas_elements)
+    logging.info('There are %i elements in the casting!', nelements)
+    
+    # Palettes go first, the other members may use them
+    palettes = []
+    others = []
+    inputs: Dict[int, Optional[List[str]]] = {}
+    for elm in range(1, nelements + 1):
+        if journal is not None:
+            task = '%s/%i'%(CASDIR, elm)
+            try:
+                inputs[elm] = extractor.member_inputs(elm)
+            except Exception:
+                logging.exception("Can not find the files of casting "
+                                  + "element %i", elm)
+                inputs[elm] = None
+            
+            if (inputs[elm] is not None and
+                journal.is_current(task, inputs[elm])):
+                logging.debug("Casting element %i is up to date", elm)
+                continue
+            
+            journal.clean(task)
+        
+        if any(rf['chunkID'] == 'CLUT' for rf in extractor.related_files(elm)):
+            palettes.append(elm)
         else:
-            for rf in kelm:
-                f = "%s.%s"%(rf['index'], rf['chunkID'])
-                f = re.sub(r"[^A-Za-z0-9\-_\.]", "_", f)
-                logging.debug("Related file: %s", f)
-                src = os.path.join(os.path.dirname(cast_file), f)
-                dst = os.path.join(dest_dir, f)
-                if os.path.isfile(src):
-                    copyfile(src, dst)
-                else:
-                    logging.warning("There is no %s file (maybe empty file)", src)
-
-                if f.endswith('.BITD'):
-                    cmd = '%s/bitd2bmp %s %s'%(
-                        os.path.dirname(sys.argv[0]), # Scripts path
-                        dest_dir, # work directory
-                        f # BITD file name
-                    )
-                    logging.debug("======================================================")
-                    logging.debug("Extracting image by using the command:")        
-                    logging.debug(cmd)
-                    logging.debug("------------------------------------------------------")
-                    os.system(cmd)
-                    
-                if f.endswith('.snd_'):
-                    cmd = '%s/snd2wav %s %s'%(
-                        os.path.dirname(sys.argv[0]), # Scripts path
-                        dest_dir, # work directory
-                        f # snd file name
-                    )
-                    logging.debug("======================================================")
-                    logging.debug("Extracting sound by using the command:")        
-                    logging.debug(cmd)
-                    logging.debug("------------------------------------------------------")
-                    os.system(cmd)
-                    
-                if f.endswith('.STXT'):
-                    cmd = '%s/stxt2json %s "%s"'%(
-                        os.path.dirname(sys.argv[0]), # Scripts path
-                        dest_dir, # work directory
-                        f # stxt file name
-                    )
-                    logging.debug("======================================================")
-                    logging.debug("Extracting text information by using the command:")        
-                    logging.debug(cmd)
-                    logging.debug("------------------------------------------------------")
-                    os.system(cmd)
-
-                if f.endswith('.RTE2'):
-                    cmd = '%s/rte22bmp %s "%s"'%(
-                        os.path.dirname(sys.argv[0]), # Scripts path
-                        dest_dir, # work directory
-                        f # rte2 file name
-                    )
-                    logging.debug("======================================================")
-                    logging.debug("Extracting image by using the command:")        
-                    logging.debug(cmd)
-                    logging.debug("------------------------------------------------------")
-                    os.system(cmd)
-                        
-                if f.endswith('.CLUT'):
-                    cmd = '%s/clut2json %s %s'%(
-                        os.path.dirname(sys.argv[0]), # Scripts path
-                        dest_dir, # work directory
-                        f # CLUT file name
-                    )
-                    logging.debug("======================================================")
-                    logging.debug("Extracting palette information by using the command:")        
-                    logging.debug(cmd)
-                    logging.debug("------------------------------------------------------")
-                    os.system(cmd)
+            others.append(elm)
+    
+    errors: Dict[int, Optional[str]] = {}
+    if jobs == 1 or len(palettes) + len(others) <= 1:
+        for elm in palettes + others:
+            errors[elm] = extract_member(extractor, elm)
+    
+    else:
+        # Extract casting elements in worker processes
+        with ProcessPoolExecutor(max_workers=(jobs if jobs > 0 else None),
+                                 initializer=init_worker,
+                                 initargs=(extractor,)) as executor:
+            for elm, result in zip(palettes, executor.map(
+                    extract_worker_member, palettes)):
+                errors[elm] = result[0]
+                extractor.sounds.extend(result[2])
+                if cache is not None:
+                    cache.merge_stats(result[1])
+            
+            for elm, result in zip(others, executor.map(
+                    extract_worker_member, others, chunksize=4)):
+                errors[elm] = result[0]
+                extractor.sounds.extend(result[2])
+                if cache is not None:
+                    cache.merge_stats(result[1])
+    
+    # Encode the sounds of all the members at once (a member whose sounds
+    # can't be encoded is not complete)
+    for out_name in transcode_sounds(extractor.sounds, audio_format, jobs):
+        elm = int(os.path.basename(os.path.dirname(out_name)))
+        errors[elm] = 'Can not encode %s'%(os.path.basename(out_name))
+    extractor.sounds = []
+    
+    # Record the files generated by every member
+    if journal is not None:
+        for elm in sorted(errors.keys()):
+            if errors[elm] is None and inputs[elm] is not None:
+                journal.record('%s/%i'%(CASDIR, elm), inputs[elm],
+                               extractor.member_outputs(elm))
+        
+        journal.complete(CASDIR)
+    
+    # Report the failures in cast member order
+    failed = [elm for elm in sorted(errors.keys())
+              if errors[elm] is not None]
+    for elm in failed:
+        logging.error('Casting element %i: %s', elm, errors[elm])
+    
+    if len(failed) > 0:
+        logging.error('%i of %i casting elements could not be extracted',
+                      len(failed), nelements)
+    
+    return failed
 
 
 # ==============================================================================
 def main():
     global byte_order_type, byte_order
 
+    setup_logging()
+    jobs: int = pop_jobs('1')
+    cache = open_cache(pop_option('--cache', ''),
+                       int(pop_option('--cache-size', '1024')))
+    audio_format: str = pop_option('--audio', DEFAULT_AUDIO_FORMAT)
+
     if len(sys.argv) < 3:
-        print("USAGE: casxtract [pc|mac] <base directory>")
+        print("USAGE: casxtract [pc|mac] <base directory> [--jobs N]"
+              + " [--cache <directory> [--cache-size MB]]"
+              + " [--audio %s]"%('|'.join(AUDIO_FORMATS))
+              + " [--log-level LEVEL]")
 
     else:
+        if audio_format not in AUDIO_FORMATS:
+            logging.error(" Unknown audio format: %s", audio_format)
+            sys.exit(-1)
+
         if sys.argv[1] != 'pc' and sys.argv[1] != 'mac':
             logging.error(" First argument must be 'pc' or 'mac'")
             sys.exit(-1)
@@ -274,98 +518,22 @@ def main():
         if not os.path.isdir(bin_dir):
             logging.error(" '%s' is not a directory", bin_dir)
             sys.exit(-1)
-
-        if not os.path.isdir(os.path.join(sys.argv[2], CASDIR)):
-            os.mkdir(os.path.join(sys.argv[2], CASDIR))
-        
-        # Look for KEY_ and CAS_ files
-        key_file = None
-        cas_file = None
-        lctx_file = None
-        lnam_file = None
-        
-        sord_file = None
         
-        for f in os.listdir(bin_dir):
-            if f.endswith('KEY_'):
-                key_file = f
-            
-            if f.endswith('CAS_'):
-                cas_file = f
-                
-            if (f.endswith('Lctx') or f.endswith('LctX')):
-                lctx_file = f
-                
-            if f.endswith('Lnam'):
-                lnam_file = f
-            
-            if f.endswith('Sord'):
-                sord_file = f
-            
-            if (f.endswith('VWCF') or f.endswith('DRCF')):
-                vwcf_file = f
-                
-        if key_file is None:
-            logging.error('Can not find a KEY_ file!')
+        try:
+            failed = extract_cast(BinDirSource(bin_dir), byte_order,
+                                  sys.argv[2],
+                                  load_fontmap(os.path.join(sys.argv[2],
+                                                            'fonts.json')),
+                                  jobs, cache, None, audio_format)
+        except ValueError as e:
+            logging.error(str(e))
             sys.exit(-1)
-
-        if cas_file is None:
-            logging.error('Can not find a CAS_ file!')
-            sys.exit(-1)
-
-        if lnam_file is None:
-            logging.warning('Can not find a Lnam file!')
-        else:
-            lnam_file = os.path.join(bin_dir, lnam_file)
-            
-        if sord_file is None:
-            logging.error('Can not find a Sord file!')
-            sys.exit(-1)
-            
-        if vwcf_file is None:
-            logging.error('Can not find a VWCF or DRCF file!')
-            sys.exit(-1)
-        
-        config = parse_vwcf_file(os.path.join(bin_dir, vwcf_file))
-        # Write config data to JSON file
-        with open(os.path.join(sys.argv[2], CASDIR, 'config.json'), 'wb') as jsfile:
-            jsfile.write(json.dumps(config, indent=4, sort_keys=True).encode('utf-8'))
-        
-        cas_elements = parse_cas_file(os.path.join(bin_dir, cas_file))
-        key_elements = parse_key_file(byte_order,
-                                      os.path.join(bin_dir, key_file))
-        if lctx_file is None:
-            logging.warning('Can not find a Lctx file!')
-            lctx_elements = []
-        else:
-            lctx_elements = parse_lctx_file(os.path.join(bin_dir, lctx_file))
         
+        if cache is not None:
+            cache.report()
         
-        logging.info('There are %i elements in the casting!', len(cas_elements))
-        
-        # Extract casting elements
-        for elm in range(1, len(cas_elements)+1):
-            # Create directory
-            if not os.path.isdir(os.path.join(sys.argv[2], CASDIR, str(elm))):
-                os.mkdir(os.path.join(sys.argv[2], CASDIR, str(elm)))
-            
-            # Read CASt file
-            kelm = []
-            cas_index = (cas_elements[elm - 1])
-            if cas_index in key_elements:
-                kelm = key_elements[cas_index]
-            
-            fname = '%i.CASt'%(cas_elements[elm - 1])
-            if os.path.isfile(os.path.join(bin_dir, fname)):
-                logging.info('Casting element number %i is %s file!',
-                             elm, fname)
-                parse_cast_file(os.path.join(bin_dir, fname), kelm,
-                                os.path.join(sys.argv[2], CASDIR, str(elm)),
-                               lctx_elements, lnam_file)
-            else:
-                logging.warning('File %s for casting element %i does not '
-                                + 'exists!', fname, elm)
+        if len(failed) > 0:
+            sys.exit(-1)
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,222 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Sources of the RIFF chunks used by the extraction scripts.
+# The chunks can be read from a "bin" directory (the output of riffxtract)
+# or directly from a parsed RIFF file.
+#
+
+import os
+import logging
+from abc import ABCMeta, abstractmethod
+from shutil import copyfile
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from .riff.riff import RiffData
+from .riff.riff_chunk import Chunk
+from .riff.mmap import MemoryMAP
+from .riff.file_operations import parse_riff_file
+from .lingosrc.util import vsprintf
+from .riffxtract import CHUNKS_TO_IGNORE, chunk_file_name, save_chunk
+
+#
+# Chunk source base class
+#
+# =============================================================================
+class ChunkSource:
+    """This class represents a set of RIFF chunks. Every chunk is identified
+    by the name of the file that riffxtract saves it to (i.e. '3.CASt')."""
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def names(self) -> List[str]:
+        """Returns the names of the chunks"""
+        pass
+
+    @abstractmethod
+    def exists(self, name: str) -> bool:
+        """Returns True if there is a chunk with the given name"""
+        pass
+
+    @abstractmethod
+    def read(self, name: str) -> bytes:
+        """Returns the data of a chunk"""
+        pass
+
+    def view(self, name: str) -> bytes:
+        """Returns the data of a chunk without keeping a copy of it (if the
+        source can do it)"""
+        return self.read(name)
+
+    @abstractmethod
+    def save(self, name: str, folder: str):
+        """Saves the data of a chunk into a file (with the same name) in a
+        folder"""
+        pass
+
+    def find(self, suffixes: Tuple[str, ...]) -> Optional[str]:
+        """Returns the name of the first chunk that ends with any of the
+        suffixes (or None if there isn't any)"""
+        for name in self.names():
+            if name.endswith(suffixes):
+                return name
+
+        return None
+
+
+#
+# "bin" directory chunk source
+#
+# =============================================================================
+class BinDirSource(ChunkSource):
+    """This class reads the chunks from the files of a "bin" directory."""
+
+    def __init__(self, bin_dir: str):
+        self.bin_dir: str = bin_dir
+        self._names: List[str] = sorted(os.listdir(bin_dir))
+
+    def names(self) -> List[str]:
+        return self._names
+
+    def exists(self, name: str) -> bool:
+        return os.path.isfile(os.path.join(self.bin_dir, name))
+
+    def read(self, name: str) -> bytes:
+        logging.debug("Reading file: %s", name)
+        with open(os.path.join(self.bin_dir, name), mode='rb') as file:
+            return file.read()
+
+    def save(self, name: str, folder: str):
+        copyfile(os.path.join(self.bin_dir, name), os.path.join(folder, name))
+
+
+#
+# RIFF file chunk source
+#
+# =============================================================================
+class RiffSource(ChunkSource):
+    """This class reads the chunks of the memory map of a RIFF file.
+    The sources created by open_riff_source can be sent to other processes
+    (the file is opened again when the source is unpickled)."""
+
+    def __init__(self, riffData: RiffData, source_fd: Optional[int] = None):
+        self.riffData: RiffData = riffData
+
+        self.source_fd: Optional[int] = source_fd
+        """File descriptor of the RIFF file (used to copy the chunks)"""
+
+        self.riff_file: Optional[str] = None
+        """Path of the RIFF file (only when the source owns the file)"""
+
+        self.byte_order: str = '>'
+
+        self.movie: int = 0
+        """Number of the movie inside a projector EXE file"""
+
+        self.file: Optional[BinaryIO] = None
+
+        if riffData.mmap is None:
+            raise ValueError("Wrong MMAP location!")
+
+        mmap: MemoryMAP = riffData.mmap
+        self.resources: Dict[str, int] = {}
+        """Resource ID of every chunk name"""
+
+        for i in range(0, len(mmap.resources)):
+            resource = mmap.resources[i]
+            if ((resource.chunkID in CHUNKS_TO_IGNORE) or
+                (resource.size <= 0)):
+                continue
+
+            self.resources[chunk_file_name(i, resource.chunkID)] = i
+
+    def names(self) -> List[str]:
+        return list(self.resources.keys())
+
+    def exists(self, name: str) -> bool:
+        return name in self.resources
+
+    def chunk(self, name: str) -> Chunk:
+        """Returns the chunk with the given name
+
+        Raises
+        ------
+        ValueError
+            If the chunk ID doesn't match the name of the chunk.
+        """
+        resource_id: int = self.resources[name]
+        chunk: Chunk = self.riffData.get_by_resource_id(resource_id)
+        if chunk_file_name(resource_id, chunk.identifier) != name:
+            raise ValueError(vsprintf("Wrong resource ID (%s != %s)",
+                                      name, chunk.identifier))
+
+        return chunk
+
+    def read(self, name: str) -> bytes:
+        return self.chunk(name).data
+
+    def view(self, name: str) -> bytes:
+        return self.chunk(name).view()
+
+    def save(self, name: str, folder: str):
+        save_chunk(self.chunk(name), self.resources[name], folder,
+                   self.source_fd)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.source_fd = None
+
+    def __getstate__(self):
+        if self.riff_file is None:
+            raise TypeError("Only the sources that own the RIFF file can "
+                            + "be pickled")
+
+        return (self.riff_file, self.byte_order, self.movie)
+
+    def __setstate__(self, state):
+        other: RiffSource = open_riff_source(state[0], state[1], state[2])
+        self.__dict__.update(other.__dict__)
+
+
+#
+# Open RIFF file chunk source
+#
+# =============================================================================
+def open_riff_source(riff_file: str, byte_order: str,
+                     movie: int = 0) -> RiffSource:
+    """
+    Open a RIFF file (or a projector EXE file) as a chunk source.
+
+    Parameters
+    ----------
+    riff_file : str
+        The path to the RIFF file to open.
+    byte_order: str
+        Python's struct module byte order.
+    movie: int
+        The number of the movie inside a projector EXE file (starting at 0).
+
+    Returns
+    -------
+    RiffSource
+        a chunk source that owns the RIFF file (call close() to close it).
+
+    Raises
+    ------
+    ValueError
+        If some field inside the file is not compliant with the expected
+        file structure.
+
+    """
+    riffData: RiffData = parse_riff_file(riff_file, byte_order, movie)
+    file: BinaryIO = open(riff_file, mode='rb')
+    source: RiffSource = RiffSource(riffData, file.fileno())
+    source.riff_file = riff_file
+    source.byte_order = byte_order
+    source.movie = movie
+    source.file = file
+
+    return source
@@ -2,6 +2,7 @@
 # E-mail: system252001@yahoo.es
 # License: GNU GPL v2 (see LICENSE file for details).
 
-from .clut import clut2rgb, clut2palette
+from .clut import clut2rgb, clut2palette, palette2tables
+from .palette_cache import PaletteCache
 
-__all__ = ['clut2rgb', 'clut2palette']
+__all__ = ['clut2rgb', 'clut2palette', 'palette2tables', 'PaletteCache']
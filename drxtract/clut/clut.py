@@ -3,8 +3,27 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 from typing import List
-from ..lingosrc.util import vsprintf
+from ..lingosrc.util import read_bytes_step, write_bytes_step, hex_string, \
+    repeat_byte
 
+# Every CLUT color has 6 bytes (16 bits red, green and blue components)
+CLUT_COLOR_SIZE = 6
+
+# Number of colors of a BMP palette
+PALETTE_COLORS = 256
+
+#
+# Reads the color components of a CLUT file
+# =============================================================================
+def clut_components(fdata: bytes, ncolors: int) -> List[bytes]:
+    """
+    Returns the red, green and blue components (8 bits, one byte array for
+    every component) of the first colors of a CLUT file.
+    """
+    # The upper byte of every 16 bits component is used
+    return [read_bytes_step(fdata, 0, CLUT_COLOR_SIZE, ncolors),
+            read_bytes_step(fdata, 2, CLUT_COLOR_SIZE, ncolors),
+            read_bytes_step(fdata, 4, CLUT_COLOR_SIZE, ncolors)]
 
 #
 # Reads the palette information from a CLUT file and returns a list of colors
@@ -30,20 +49,18 @@ def clut2rgb(fdata: bytes) -> List[str]:
         file structure. 
         
     """
-    idx = 0
+    ncolors = int(len(fdata) / CLUT_COLOR_SIZE)
+    components = clut_components(fdata, ncolors)
+    
+    # Set colors in #RRGGBB format
+    rgb = bytearray(ncolors * 3)
+    for i in range(0, 3):
+        write_bytes_step(rgb, i, 3, components[i])
+    
+    digits = hex_string(rgb)
     palette = []
-    while idx < len(fdata):
-        r0 = fdata[idx]
-        idx += 2
-        g0 = fdata[idx]
-        idx += 2            
-        b0 = fdata[idx]
-        idx += 2
-        
-        # Set colors in #RRGGBB format
-        color = vsprintf('#%02x%02x%02x', r0, g0, b0)
-        palette.append(color)
-
+    for i in range(0, ncolors):
+        palette.append('#' + digits[i*6:i*6 + 6])
     
     return palette
 
@@ -62,7 +79,8 @@ def clut2palette(fdata: bytes) -> bytes:
     Returns
     -------
     bytes
-        a 256 color palette for BMP files (BGRA format).
+        a 256 color palette for BMP files (BGRA format). The colors that
+        are not in the CLUT file are black.
 
     Raises
     ------
@@ -71,24 +89,42 @@ def clut2palette(fdata: bytes) -> bytes:
         file structure. 
         
     """
-    clutData = bytearray(256*4)
-    idx = 0
-    cindx = 0
-    for _ in range(0, 256):
-        r0 = fdata[idx]
-        idx += 2
-        g0 = fdata[idx]
-        idx += 2            
-        b0 = fdata[idx]
-        idx += 2
-        
-        clutData[cindx] = b0
-        cindx += 1
-        clutData[cindx] = g0
-        cindx += 1
-        clutData[cindx] = r0
-        cindx += 1
-        clutData[cindx] = 0  # Alpha
-        cindx += 1
+    ncolors = min(int(len(fdata) / CLUT_COLOR_SIZE), PALETTE_COLORS)
+    red, green, blue = clut_components(fdata, ncolors)
+    
+    clutData = bytearray(PALETTE_COLORS*4)
+    if ncolors > 0:
+        write_bytes_step(clutData, 0, 4, blue)
+        write_bytes_step(clutData, 1, 4, green)
+        write_bytes_step(clutData, 2, 4, red)
+    # Alpha is zero
     
-    return clutData
+    return bytes(clutData)
+
+#
+# Returns the lookup tables of the RGBA colors of a BMP palette
+# =============================================================================
+def palette2tables(palette: bytes) -> List[bytes]:
+    """
+    Return the lookup tables that translate the indexes of a palette into
+    the components of its colors.
+    
+    Parameters
+    ----------
+    palette : bytes
+        A color palette (BGRA format, up to 256 colors).
+        
+    Returns
+    -------
+    List[bytes]
+        The red, green, blue and alpha tables (256 bytes each). The alpha
+        of the colors of the palette is opaque (255) and the missing
+        colors are transparent black.
+        
+    """
+    ncolors = min(int(len(palette) / 4), PALETTE_COLORS)
+    padding = bytes(PALETTE_COLORS - ncolors)
+    return [read_bytes_step(palette, 2, 4, ncolors) + padding,
+            read_bytes_step(palette, 1, 4, ncolors) + padding,
+            read_bytes_step(palette, 0, 4, ncolors) + padding,
+            repeat_byte(255, ncolors) + padding]
@@ -0,0 +1,53 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+from typing import Dict, List
+from ..lingosrc.util import get_keys
+from .clut import clut2palette, palette2tables
+
+#
+# Custom palettes of a movie.
+# 
+class PaletteCache:
+    """This class keeps the custom palettes (CLUT cast members) of a movie.
+    Every CLUT is decoded only once and the lookup tables of its colors
+    are built the first time they are used, so all the bitmaps that use
+    the same palette share them."""
+    
+    def __init__(self):
+        self.palettes: Dict[int, bytes] = {}
+        """BMP palettes (BGRA format) by cast member number"""
+        
+        self.tables: Dict[int, List[bytes]] = {}
+        """RGBA lookup tables by cast member number"""
+    
+    def has_palette(self, member: int) -> bool:
+        return member in get_keys(self.palettes)
+    
+    def add_palette(self, member: int, palette: bytes) -> bytes:
+        # The first palette of a cast member is kept
+        if not self.has_palette(member):
+            self.palettes[member] = bytes(palette)
+        
+        return self.palettes[member]
+    
+    def add_clut(self, member: int, fdata: bytes) -> bytes:
+        if not self.has_palette(member):
+            self.palettes[member] = clut2palette(fdata)
+        
+        return self.palettes[member]
+    
+    def get_palette(self, member: int) -> bytes:
+        if not self.has_palette(member):
+            raise ValueError("Can't find the palette of cast member: %s"%(
+                member))
+        
+        return self.palettes[member]
+    
+    def get_rgba_tables(self, member: int) -> List[bytes]:
+        # Red, green, blue and alpha components of every palette index
+        if member not in get_keys(self.tables):
+            self.tables[member] = palette2tables(self.get_palette(member))
+        
+        return self.tables[member]
@@ -13,8 +13,7 @@ import os
 import logging
 import json
 from .clut import clut2rgb
-
-logging.basicConfig(level=logging.DEBUG)
+from .options import setup_logging
 
 
 # ==============================================================================
@@ -30,8 +29,11 @@ def clut2json(clut_file):
 
 # ==============================================================================
 def main():
+    setup_logging()
+
     if len(sys.argv) < 3:
-        print("USAGE: clut2json <work directory> <clut file name>")
+        print("USAGE: clut2json <work directory> <clut file name>"
+              + " [--log-level LEVEL]")
 
     else:
         if not os.path.isdir(sys.argv[1]):
@@ -2,11 +2,10 @@
 # E-mail: system252001@yahoo.es
 # License: GNU GPL v2 (see LICENSE file for details).
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 from ..vwlb import Marker, parse_vwlb_data
-from ..riff import RiffData, parse_riff, InputMAP, MemoryMAP, \
-    parse_imap, parse_mmap, Chunk, MMapResource
+from ..riff import RiffData, parse_riff, MemoryMAP, Chunk, MMapResource
 from ..key import parse_key_file_data
 from ..vwcf import parse_vwcf_file_data
 from ..cas import parse_cas_file_data
@@ -16,8 +15,9 @@ from ..vwsc import parse_vwsc_file_data, vwsc_to_score
 from ..stxt import parse_stxt_data, TextData
 from ..fmap import parse_fmap_data, FontInfo
 from ..snd import snd_to_sampled, SampledSound
-from ..bitd import bitd2bmp
-from ..clut import clut2palette
+from ..bitd import bitd2bitmap, bitmap2bmp, bitmap2rgba, Bitmap
+from ..clut import PaletteCache
+from ..rte2 import rte22bitmap, rte2bitmap2bmp
 from ..lingosrc.ast import Script
 from ..lingosrc.parse.lnam import parse_lnam_file_data
 from ..lingosrc.parse.lscr import parse_lrcr_file_data
@@ -25,9 +25,6 @@ from ..lingosrc.codegen.lingo import generate_lingo_code
 from ..lingosrc.codegen.js import generate_js_code
 
 
-IMAP_FILE_FORMAT = 'imap'
-MMAP_FILE_FORMAT = 'mmap'
-
 
 #
 # DirectorFile class.
@@ -39,7 +36,7 @@ class DirectorFile:
     def __init__(self, info: Dict[str, Any], cast: List[Dict[str, Any]],
                  lingoScr: Dict[int, str], jsScr: Dict[int, str],
                  markers: List[Marker], score: Dict[str, Any],
-                 fontmap: List[FontInfo]):
+                 fontmap: List[FontInfo], palettes: PaletteCache):
         self.info = info
         self.cast = cast
         self.lingoScr = lingoScr
@@ -47,6 +44,34 @@ class DirectorFile:
         self.markers = markers
         self.score = score
         self.fontmap = fontmap
+        # Custom palettes by cast member number
+        self.palettes = palettes
+    
+    def bitmap_rgba(self, castData: Dict[str, Any],
+                    alpha: Optional[bytes] = None) -> bytes:
+        """
+        Returns the RGBA pixels of a bitmap cast member. The images with a
+        custom palette share the lookup tables of that palette.
+
+        Parameters
+        ----------
+        castData : Dict[str, Any]
+            The cast member (with its decoded pixels).
+        alpha : Optional[bytes]
+            The alpha mask of the image (see bitmap2rgba).
+
+        Returns
+        -------
+        bytes
+            4 bytes for every pixel (red, green, blue and alpha).
+
+        """
+        tables: Optional[List[bytes]] = None
+        paletteId = int(castData.get('palette', 0))
+        if paletteId > 0 and self.palettes.has_palette(paletteId):
+            tables = self.palettes.get_rgba_tables(paletteId)
+        
+        return bitmap2rgba(castData['pixels'], alpha, tables)
 
 #
 # Check if a chunk exists in the MMap resources list by its chunk ID.
@@ -123,7 +148,7 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
         Offset to the begining of the RIFF structure.
     fdata : bytes
         The bytes in the CAS file that contain the casting element index inside
-        the Director file.
+        the Director file (it can also be a memory mapped file).
         
     Returns
     -------
@@ -137,26 +162,21 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
         file structure. 
         
     """
-    # Parse the RIFF data
-    riffData: RiffData = parse_riff(fdata, rifx_offset, byte_order)
+    # Parse the RIFF data (chunk data is only copied when it is used)
+    riffData: RiffData = parse_riff(fdata, rifx_offset, byte_order, True)
     
-    # Parse the imap block
-    chunk: Chunk = riffData.chunks[0]
-    if IMAP_FILE_FORMAT != chunk.identifier:
+    # The imap and mmap blocks are parsed (and indexed) with the RIFF data
+    if riffData.imap is None:
         raise ValueError("Coudn't locate the IMAP file!")
     
-    imap: InputMAP = parse_imap(chunk.data, byte_order)
-    
-    # Get the memory map
-    chunk = riffData.get_by_offset(imap.offset - rifx_offset)
-    if MMAP_FILE_FORMAT != chunk.identifier:
+    if riffData.mmap is None:
         raise ValueError("Coudn't locate the MMAP file!")
-    mmap: MemoryMAP = parse_mmap(chunk.data, byte_order)
+    mmap: MemoryMAP = riffData.mmap
     
     # Read the KEY chunk
     logging.debug('Parse KEY* chunk')
     res = locate_chunk(mmap.resources, 'KEY*')
-    chunk = riffData.get_by_offset(res.offset - rifx_offset)
+    chunk: Chunk = riffData.get_by_offset(res.offset - rifx_offset)
     key_elements = parse_key_file_data(byte_order, chunk.data)
     
     # Read the VWCF chunk
@@ -197,8 +217,7 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
                 continue
             logging.debug("Decompile script %d", lscr_idx)
 
-            res = mmap.resources[lscr_idx]
-            chunk = riffData.get_by_offset(res.offset - rifx_offset)
+            chunk = riffData.get_by_resource_id(lscr_idx)
             lscr:Script = parse_lrcr_file_data(chunk.data, name_list)
             if lscr.cont_scr_num < 0:
                 n = lscr.scr_num
@@ -239,6 +258,7 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
     
     # Read the casting elements
     cast: List[Dict[str, Any]] = []
+    palettes: PaletteCache = PaletteCache()
     for cas_index in cas_elements:
         if cas_index == 0:
             logging.debug('Empty CAST element!')
@@ -246,8 +266,7 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
             continue
             
         # Parse CASt chunk data
-        res = mmap.resources[cas_index]
-        chunk = riffData.get_by_offset(res.offset - rifx_offset)
+        chunk = riffData.get_by_resource_id(cas_index)
         castData = parse_cast_file_data(chunk.data)
         
         # Find the related elements
@@ -260,7 +279,7 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
                 if rf['chunkID'] != res.chunkID:
                     raise ValueError("Chunk ID mismatch!")
                 
-                chunk = riffData.get_by_offset(res.offset - rifx_offset)
+                chunk = riffData.get_by_resource_id(rf_idx)
                 if res.chunkID == 'STXT':
                     text_data: TextData = parse_stxt_data(chunk.data, fontmap)
                     castData['text'] = text_data['text']
@@ -271,8 +290,9 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
                     castData['sampled_sound'] = snd_data
                 
                 elif res.chunkID == 'CLUT':
-                    clutData: bytes = clut2palette(chunk.data)
-                    castData['palette'] = clutData
+                    # The palette is decoded once for all the bitmaps
+                    castData['palette'] = palettes.add_clut(len(cast) + 1,
+                                                            chunk.data)
                 
                 elif res.chunkID == 'THUM':
                     logging.info("Thumnail are ignored!")
@@ -281,10 +301,18 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
                     clutData = bytes()
                     paletteId = int(castData['palette'])
                     if paletteId > 0:
-                        p = paletteId - 1
-                        clutData = cast[p]['palette']
-                    bmp_data: bytes = bitd2bmp(castData, clutData, chunk.data)
-                    castData['bitmap'] = bmp_data
+                        clutData = palettes.get_palette(paletteId)
+                    # The decoded pixels and their BMP image
+                    pixels: Bitmap = bitd2bitmap(castData, clutData,
+                                                 chunk.data)
+                    castData['pixels'] = pixels
+                    castData['bitmap'] = bitmap2bmp(castData, pixels)
+                    
+                elif res.chunkID == 'RTE2':
+                    # Rich text rendered as an image
+                    rte2_pixels: Bitmap = rte22bitmap(chunk.data)
+                    castData['pixels'] = rte2_pixels
+                    castData['bitmap'] = rte2bitmap2bmp(rte2_pixels)
                     
                 else:
                     raise ValueError("Unknown related element: " + res.chunkID)
@@ -295,5 +323,6 @@ def parse_dir_file_data(byte_order: str, rifx_offset, \
     
     
     # Return the DirectorFile structure
-    return DirectorFile(info, cast, lingoScr, jsScr, markers, score, fontmap)
+    return DirectorFile(info, cast, lingoScr, jsScr, markers, score, fontmap,
+                        palettes)
     
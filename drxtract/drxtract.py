@@ -11,23 +11,159 @@
 
 import sys
 import os
+import time
 import logging
+from typing import Any, Dict, List, Optional
+from .fmap import FontInfo
+from .riffxtract import BINDIR
+from .riff.file_operations import count_movies, detect_byte_order
+from .chunk_source import RiffSource, open_riff_source
+from .vwlbxtract import extract_markers
+from .fmapxtract import extract_fonts
+from .casxtract import extract_cast
+from .vwscxtract import extract_score
+from .stxt2json import load_fontmap
+from .options import pop_flag, pop_option, pop_jobs, setup_logging
+from .cache import DecodeCache, open_cache
+from .journal import Journal
+from .transcode import AUDIO_FORMATS, DEFAULT_AUDIO_FORMAT
 
-logging.basicConfig(level=logging.DEBUG)
+# ==============================================================================
+# Saves the chunks of a movie into the "bin" directory (only the chunks that
+# changed since the previous extraction) and returns the number of chunks
+def extract_chunks(source: RiffSource, bin_dir: str, journal: Journal) -> int:
+    names: List[str] = source.names()
+    for name in names:
+        task = '%s/%s'%(BINDIR, name)
+        if journal.is_current(task, [name]):
+            continue
+        
+        source.save(name, bin_dir)
+        journal.record(task, [name], [task])
+    
+    journal.complete(BINDIR)
+    return len(names)
+
+# ==============================================================================
+# Extracts the contents of a movie (or one of the movies of a projector EXE
+# file) into a directory and returns some
+# statistics about the extraction (number of chunks, failures and the time
+# spent in every step). A journal of the extraction is kept in the directory,
+# so the files generated from chunks that didn't change are not generated
+# again.
+def extract_movie(riff_file: str, byte_order: str, directory: str,
+                  jobs: int = 1,
+                  cache: Optional[DecodeCache] = None,
+                  audio_format: str = DEFAULT_AUDIO_FORMAT,
+                  movie: int = 0) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {'chunks': 0, 'failed_members': [],
+                             'errors': [], 'reused': 0, 'timings': {}}
+    timings: Dict[str, float] = stats['timings']
+    
+    # The movie is parsed only once, every step reads the chunks
+    # from the memory mapped file
+    start = time.perf_counter()
+    source: RiffSource = open_riff_source(riff_file, byte_order, movie)
+    journal = Journal(directory)
+    journal.add_resources(source)
+    timings['parse'] = time.perf_counter() - start
+    
+    def run_step(name: str, description: str, step):
+        logging.debug("======================================================")
+        logging.debug("Extracting the %s", description)
+        start = time.perf_counter()
+        try:
+            return step()
+        except ValueError as e:
+            logging.error(str(e))
+            stats['errors'].append(str(e))
+        finally:
+            timings[name] = time.perf_counter() - start
+        
+        return None
+    
+    def run_task(task: str, outputs: List[str], chunk: Optional[str],
+                 description: str, step) -> bool:
+        # The task is done again only if the chunk changed
+        inputs = [] if chunk is None else [chunk]
+        if journal.is_current(task, inputs):
+            logging.debug("The %s are up to date", description)
+            return True
+        
+        journal.clean(task)
+        done = run_step(task, description, lambda: step() or True) is not None
+        if done:
+            journal.record(task, inputs, outputs)
+        
+        # The files of the previous extraction are removed if the task fails
+        journal.complete(task)
+        return done
+    
+    try:
+        # Extract RIFF file content
+        bin_dir = os.path.join(directory, BINDIR)
+        if not os.path.isdir(bin_dir):
+            os.mkdir(bin_dir)
+        stats['chunks'] = run_step(
+            'riff', 'RIFF file content', lambda: extract_chunks(
+                source, bin_dir, journal)) or 0
+        
+        # Extract the score labels
+        run_task('markers', ['markers.json'], source.find(('VWLB',)),
+                 'score labels', lambda: extract_markers(source, directory))
+        
+        # Extract the font map
+        fontmap: List[FontInfo] = []
+        if run_task('fonts', ['fonts.json'], source.find(('Fmap',)),
+                    'font map', lambda: extract_fonts(source, directory)):
+            fontmap = load_fontmap(os.path.join(directory, 'fonts.json'))
+        
+        # Extract the casting elements
+        stats['failed_members'] = run_step(
+            'cast', 'casting elements', lambda: extract_cast(
+                source, byte_order, directory, fontmap, jobs, cache,
+                journal, audio_format)) or []
+        
+        # Extract the score
+        run_task('score', ['score.json'], source.find(('VWSC',)),
+                 'score', lambda: extract_score(source, directory))
+        
+        journal.save()
+    
+    finally:
+        source.close()
+    
+    stats['reused'] = journal.reused
+    return stats
 
 def main():   
+    setup_logging()
+
+    jobs: int = pop_jobs('1')
+    cache = open_cache(pop_option('--cache', ''),
+                       int(pop_option('--cache-size', '1024')))
+    audio_format: str = pop_option('--audio', DEFAULT_AUDIO_FORMAT)
+    all_movies: bool = pop_flag('--all')
+
     if len(sys.argv) < 4:
-        print("USAGE: drxtract [pc|mac] <file.drx> <directory>")
+        print("USAGE: drxtract [pc|mac] <file.drx> <directory> [--all]"
+              + " [--jobs N]"
+              + " [--cache <directory> [--cache-size MB]]"
+              + " [--audio %s]"%('|'.join(AUDIO_FORMATS))
+              + " [--log-level LEVEL]")
 
     else:
+        if audio_format not in AUDIO_FORMATS:
+            logging.error("Unknown audio format: %s", audio_format)
+            sys.exit(-1)
+
         if sys.argv[1] != 'pc' and sys.argv[1] != 'mac':
             logging.error("First argument must be 'pc' or 'mac'")
             sys.exit(-1)
 
-        if len(os.path.dirname(sys.argv[0])) == 0:
-            basepath = '%s '%(sys.executable)
-        else:
-            basepath = ('%s/'%(os.path.dirname(sys.argv[0])))
+        byte_order = ">"
+        if sys.argv[1] == 'pc':
+            byte_order = "<"
 
         if not os.path.isfile(sys.argv[2]):
             logging.error("'%s' is not a file", sys.argv[2])
@@ -37,63 +173,32 @@ def main():
             logging.error("'%s' is not a directory", sys.argv[3])
             sys.exit(-1)
 
-        # Extract RIFF file content
-        cmd = '%sriffxtract %s %s %s'%(
-            basepath, # Scripts path
-            sys.argv[1], # pc or mac
-            sys.argv[2], # director file
-            sys.argv[3]  # work directory
-        )
-        logging.debug("======================================================")
-        logging.debug("Extracting the RIFF file content by using the command:")
-        logging.debug(cmd)
-        logging.debug("------------------------------------------------------")
-        os.system(cmd)
-        
-        # Extract the score labels
-        cmd = '%svwlbxtract %s'%(
-            basepath, # Scripts path
-            sys.argv[3] # work directory
-        )
-        logging.debug("======================================================")
-        logging.debug("Extracting the score labels by using the command:")        
-        logging.debug(cmd)
-        logging.debug("------------------------------------------------------")
-        os.system(cmd)
-        
-        # Extract the font map
-        cmd = '%sfmapxtract %s'%(
-            basepath, # Scripts path
-            sys.argv[3] # work directory
-        )
-        logging.debug("======================================================")
-        logging.debug("Extracting the font map by using the command:")  
-        logging.debug(cmd)
-        logging.debug("------------------------------------------------------")
-        os.system(cmd)        
-        
-        # Extract the casting elements
-        cmd = '%scasxtract %s %s'%(
-            basepath, # Scripts path
-            sys.argv[1], # pc or mac
-            sys.argv[3]  # work directory
-        )
-        logging.debug("======================================================")
-        logging.debug("Extracting the casting elements by using the command:")  
-        logging.debug(cmd)
-        logging.debug("------------------------------------------------------")
-        os.system(cmd)
+        try:
+            if all_movies:
+                # Every movie goes to <directory>/<movie number>
+                nmovies: int = count_movies(sys.argv[2])
+                if nmovies == 0:
+                    logging.error("There are no movies in %s", sys.argv[2])
+                    sys.exit(-1)
+                
+                for movie in range(0, nmovies):
+                    directory = os.path.join(sys.argv[3], str(movie + 1))
+                    os.makedirs(directory, exist_ok=True)
+                    
+                    # Every movie has its own byte order
+                    extract_movie(sys.argv[2],
+                                  detect_byte_order(sys.argv[2], movie),
+                                  directory, jobs, cache, audio_format, movie)
+            
+            else:
+                extract_movie(sys.argv[2], byte_order, sys.argv[3], jobs,
+                              cache, audio_format)
+        except ValueError as e:
+            logging.error(str(e))
+            sys.exit(-1)
         
-        # Extract the score
-        cmd = '%svwscxtract %s'%(
-            basepath, # Scripts path
-            sys.argv[3] # work directory
-        )
-        logging.debug("======================================================")
-        logging.debug("Extracting the score by using the command:")  
-        logging.debug(cmd)
-        logging.debug("------------------------------------------------------")
-        os.system(cmd)
+        if cache is not None:
+            cache.report()
 
 if __name__ == '__main__':
     main()
@@ -13,12 +13,13 @@ import sys
 import os
 import logging
 import json
-from .fmap import parse_fmap_data
+from typing import List
+from .fmap import parse_fmap_data, FontInfo
+from .chunk_source import ChunkSource, BinDirSource
+from .options import setup_logging
 
 BINDIR = 'bin'
 
-logging.basicConfig(level=logging.DEBUG)
-
 # ==============================================================================
 # Reads from Fmap file the fonts information
 def parse_fmap_file(fmap_file):
@@ -28,33 +29,40 @@ def parse_fmap_file(fmap_file):
 
     return []
 
+# ==============================================================================
+# Writes the fonts information into the fonts.json file
+def extract_fonts(source: ChunkSource, directory: str) -> List[FontInfo]:
+    fmap_file = source.find(('Fmap',))
+    if fmap_file is None:
+        raise ValueError('Can not find a Fmap file!')
+    
+    fmap_elements = parse_fmap_data(source.read(fmap_file))
+    # Write font map data to JSON file
+    with open(os.path.join(directory, 'fonts.json'), 'wb') as jsfile:
+        jsfile.write(json.dumps(fmap_elements, indent=4, sort_keys=True
+                                ).encode('utf-8'))
+    
+    return fmap_elements
+
 # ==============================================================================
 def main():
+    setup_logging()
+
     if len(sys.argv) < 2:
-        print("USAGE: fmapxtract <work directory>")
+        print("USAGE: fmapxtract <work directory>"
+              + " [--log-level LEVEL]")
 
     else:
         if not os.path.isdir(sys.argv[1]):
             logging.error(" '%s' is not a directory", sys.argv[1])
             sys.exit(-1)
 
-        fmap_file = None
-        
-        for f in os.listdir(os.path.join(sys.argv[1], BINDIR)):
-            if f.endswith('Fmap'):
-                fmap_file = f
-                break
-        
-        if fmap_file is None:
-            logging.error('Can not find a Fmap file!')
+        try:
+            extract_fonts(BinDirSource(os.path.join(sys.argv[1], BINDIR)),
+                          sys.argv[1])
+        except ValueError as e:
+            logging.error(str(e))
             sys.exit(-1)
-        
-        fmap_elements = parse_fmap_file(os.path.join(sys.argv[1], BINDIR,
-                                                     fmap_file))
-        # Write font map data to JSON file
-        with open(os.path.join(sys.argv[1], 'fonts.json'), 'wb') as jsfile:
-            jsfile.write(json.dumps(fmap_elements, indent=4, sort_keys=True
-                                    ).encode('utf-8'))
 
 if __name__ == '__main__':
     main()
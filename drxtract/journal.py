@@ -0,0 +1,152 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Extraction journal. It records the fingerprint of every chunk of a movie
+# and the files generated from them, so that a new extraction of the movie
+# (i.e. after a patch) only generates again the files whose chunks changed.
+#
+
+import os
+import json
+import shutil
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Set
+from .chunk_source import ChunkSource, RiffSource
+
+JOURNAL_FILE = 'journal.json'
+
+# Change it when the extracted files change (i.e. together with the
+# CACHE_VERSION of the decode cache)
+JOURNAL_VERSION = 2
+
+#
+# Journal class
+#
+# =============================================================================
+class Journal:
+    """This class keeps the journal of the extraction of a movie. Every
+    task (i.e. a cast member) has a list of input chunks and a list of
+    output files (relative to the output directory)."""
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+
+        self.resources: Dict[str, Dict[str, Any]] = {}
+        """Fingerprint of every chunk (by chunk name)"""
+
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        """Tasks of the current extraction"""
+
+        self.old_tasks: Dict[str, Dict[str, Any]] = {}
+        """Tasks of the previous extraction"""
+
+        self.reused: int = 0
+        """Number of tasks whose output files were reused"""
+
+        self.completed: Set[str] = set()
+        """Groups of tasks (i.e. 'cas') that have been completely done"""
+
+        journal_file = os.path.join(directory, JOURNAL_FILE)
+        if os.path.isfile(journal_file):
+            try:
+                with open(journal_file, mode='r', encoding='utf-8') as jsfile:
+                    data = json.loads(jsfile.read())
+                if data.get('version') == JOURNAL_VERSION:
+                    self.old_tasks = data.get('tasks', {})
+            except ValueError:
+                logging.warning("Wrong journal file: %s", journal_file)
+
+    def add_resources(self, source: ChunkSource):
+        """Computes the fingerprint of every chunk of a source (the chunks
+        of a RIFF file are hashed from the memory map, without copying
+        them)"""
+        for name in source.names():
+            self.resources[name] = {
+                'hash': hashlib.sha1(source.view(name)).hexdigest()
+            }
+
+        if isinstance(source, RiffSource) and source.riffData.mmap:
+            resources = source.riffData.mmap.resources
+            for name, resource_id in source.resources.items():
+                resource = resources[resource_id]
+                self.resources[name]['id'] = resource_id
+                self.resources[name]['chunkID'] = resource.chunkID
+                self.resources[name]['offset'] = resource.offset
+                self.resources[name]['size'] = resource.size
+
+    def fingerprint(self, inputs: List[str]) -> Dict[str, Optional[str]]:
+        """Returns the hashes of some chunks (the inputs that aren't chunks,
+        i.e. the audio format, have no hash)"""
+        hashes: Dict[str, Optional[str]] = {}
+        for name in inputs:
+            hashes[name] = None
+            if name in self.resources:
+                hashes[name] = self.resources[name]['hash']
+
+        return hashes
+
+    def is_current(self, task: str, inputs: List[str]) -> bool:
+        """Checks if the output files of a task were generated from the same
+        chunks (and they still exist). In that case the task is kept in the
+        journal and it doesn't need to be done again."""
+        old_task = self.old_tasks.get(task)
+        if old_task is None or old_task['inputs'] != self.fingerprint(inputs):
+            return False
+
+        for output in old_task['outputs']:
+            if not os.path.exists(os.path.join(self.directory, output)):
+                return False
+
+        self.tasks[task] = old_task
+        self.reused += 1
+        return True
+
+    def clean(self, task: str):
+        """Removes the output files of the previous execution of a task"""
+        old_task = self.old_tasks.get(task)
+        if old_task is None:
+            return
+
+        for output in old_task['outputs']:
+            path = os.path.join(self.directory, output)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+            # Remove the directory of the task if it is empty now
+            folder = os.path.dirname(path)
+            if (os.path.normpath(folder) != os.path.normpath(self.directory)
+                and os.path.isdir(folder) and len(os.listdir(folder)) == 0):
+                os.rmdir(folder)
+
+    def record(self, task: str, inputs: List[str], outputs: List[str]):
+        """Records the input chunks and output files of a task"""
+        self.tasks[task] = {
+            'inputs': self.fingerprint(inputs),
+            'outputs': outputs
+        }
+
+    def complete(self, group: str):
+        """Marks a group of tasks (the tasks whose name starts with the group
+        name and a slash) as completely done"""
+        self.completed.add(group)
+
+    def save(self):
+        """Writes the journal to the output directory"""
+        # The files of the tasks that don't exist anymore are removed (only
+        # if the group of the task has been completely done)
+        for task in self.old_tasks:
+            if (task not in self.tasks and
+                task.split('/')[0] in self.completed):
+                self.clean(task)
+
+        with open(os.path.join(self.directory, JOURNAL_FILE), 'wb') as jsfile:
+            jsfile.write(json.dumps({
+                'version': JOURNAL_VERSION,
+                'resources': self.resources,
+                'tasks': self.tasks
+            }, indent=4, sort_keys=True).encode('utf-8'))
@@ -3,10 +3,16 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 from typing import List, Dict
-import struct
 import logging
-from ..riff import parse_chunk_id
-from ..lingosrc.util import get_keys, Dictionary, vsprintf
+from ..riff import decode_chunk_id
+from ..lingosrc.util import get_keys, Dictionary, vsprintf, RecordLayout, \
+    is_debug_enabled
+
+# KEY header (two unknown values and the number of elements)
+KEY_HEADER = RecordLayout("iii")
+
+# KEY record (file index, casting element index and chunk ID)
+KEY_RECORD = RecordLayout("ii4s")
 
 #
 # File reference class
@@ -16,6 +22,8 @@ class FileReference(Dictionary):
     """This class represents a reference to a
     Director File Memory MAP Resource"""
     
+    __slots__ = ()
+    
     def __init__(self, chunkID: str, index: int):
         super().__init__()
         self['chunkID'] = chunkID
@@ -50,36 +58,25 @@ def parse_key_file_data(byte_order: str,
         
     """
     key_data: Dict[int, List[FileReference]] = {}
-    indx = 0
     
     # Unknown header data
-    unk = struct.unpack(byte_order+"i", fdata[(indx):(indx+4)])[0]
-    indx = indx + 4
-    logging.debug("Unknown: %08x", unk)
-
-    unk = struct.unpack(byte_order+"i", fdata[(indx):(indx+4)])[0]
-    indx = indx + 4
-    logging.debug("Unknown: %08x", unk)
-
-    nelements = struct.unpack(byte_order+"i", fdata[(indx):(indx+4)])[0]
-    indx = indx + 4
+    unk1, unk2, nelements = KEY_HEADER.unpack_from(byte_order, fdata)
+    logging.debug("Unknown: %08x", unk1)
+    logging.debug("Unknown: %08x", unk2)
     logging.debug("Number of elements: %08x", nelements)
 
-    for _ in range(nelements-1):
-        nfile = struct.unpack(byte_order+"i", fdata[(indx+0):(indx+4)])[0]
-        cas_index = struct.unpack(byte_order+"i", fdata[(indx+4):(indx+8)])[0]
-
-        chunkId = parse_chunk_id(fdata, indx+8, byte_order)
-        indx = indx + 12
-        
+    debug: bool = is_debug_enabled()
+    for nfile, cas_index, chunkId in KEY_RECORD.iter_unpack(
+            byte_order, fdata, KEY_HEADER.size, nelements-1):
         if cas_index > 0 and nfile > 0:
             if not cas_index in get_keys(key_data):
                 key_data[cas_index] = []
 
+            chunkId = decode_chunk_id(chunkId, byte_order)
             key_data[cas_index].append(FileReference(chunkId, nfile))
 
-            key_value = vsprintf("KEY['%08x'] = '%s.%s'",
-                                 cas_index, nfile, chunkId)
-            logging.debug(key_value)
+            if debug:
+                logging.debug(vsprintf("KEY['%08x'] = '%s.%s'",
+                                       cas_index, nfile, chunkId))
 
     return key_data
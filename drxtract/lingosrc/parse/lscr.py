@@ -6,14 +6,58 @@ from typing import List, cast
 from ..ast import Script, FunctionDef, Node, LocalVariable, ParameterName
 from ..model import Context, Header
 from ..util import escape_string, unpack_float80, get_keys, get_class_name, \
-    vsprintf, get_encoding
+    vsprintf, get_encoding, is_debug_enabled, RecordLayout
 from ..opcodes import OPCODES, Opcode, BiOpcode, TriOpcode, \
     Param1Opcode, Param2Opcode, BI_OPCODES, TRI_OPCODES
 from .loop_detection import condition_detect, loop_detect
-import struct
 import logging
 
-DEBUG_OPCODES: bool = True
+DEBUG_OPCODES: bool = False
+
+# LSCR header (until the file sizes check)
+LSCR_HEADER = RecordLayout("iiiihhhhiiiiiihhiii")
+
+# LSCR header offsets:
+# $0040-$0041 uint16 Offset to the properties records block
+# $0042-$0043 uint16 Number of global var records
+# $0044-$0045 uint16 Unknown
+# $0046-$0047 uint16 Offset to the global_vars records block
+# $0048-$0049 uint16 Number of function records
+# $004A-$004B uint16 Unknown
+# $004C-$004D uint16 Offset to the function records block
+# $004E-$004F uint16 Number of constants
+# $0050-$0051 uint16 Unknown
+# $0052-$0053 uint16 Offset to the constant records block
+# $0054-$0055 uint16 Unknown
+# $0056-$0057 uint16 Size in bytes of the constants area???
+# $0058-$0059 uint16 Unknown
+# $005A-$005B uint16 Base address for constant data
+LSCR_OFFSETS = RecordLayout("hhhhhhhhhhhhhh")
+
+# Function record:
+# $0000-$0001 uint16 Namelist index for the function's name, or 0xFFFF if
+#                    there is no name(?)
+# $0002-$0003 uint16 Unknown
+# $0004-$0007 uint32 Length of the function bytecode in bytes
+# $0008-$000B uint32 Offset to the function bytecode
+# $000C-$000D uint16 Number of arguments
+# $000E-$0011 uint32 Offset of arguments name
+# $0012-$0013 uint16 Number of local variables
+# $0014-$0017 uint32 Local variables offset
+# $0018-$0019 uint16 Count (C)
+# $001A-$001D uint32 Unknown
+# $001E-$0021 uint32 Unknown
+# $0022-$0023 uint16 Unknown
+# $0024-$0025 uint16 Count (D)
+# $0026-$0029 uint32 Unknown
+LSCR_FUNCTION_RECORD = RecordLayout("hhiihihihiihhi")
+
+# Namelist index (properties, global vars, arguments and local variables)
+NAME_INDEX = RecordLayout("h")
+
+# Fields of the constant records and the constant data
+INT16 = RecordLayout("h")
+INT32 = RecordLayout("i")
 
 #
 # Parse LSCR file data
@@ -106,85 +150,36 @@ def parse_frb(fdata: bytes, header: Header, context: Context, script: Script):
     """
     
     logging.debug("====== parse LSCR func record block (code)===============")
+    debug: bool = is_debug_enabled()
     lsrc_bit_order = '>'
     idx = header.frb_offset
-    for i in range(0, header.frb_nrecords):
-
-        logging.debug("Function Record Block: %i (starts in: %x)", i, idx) 
-        # $0000-$0001  uint16  Namelist index for the function's name,
-        # or 0xFFFF if there is no name(?)
-        namelist_index = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-        idx += 2
-
-        # $0002-$0003  uint16  Unknown
-        unknown_rb0 = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-        idx += 2
-
-        # $0004-$0007  uint32  Length of the function bytecode in bytes
-        bc_length = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-        idx += 4
-
-        # $0008-$000B  uint32  Offset to the function bytecode
-        bc_off = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-        idx += 4
-
-        # $000C-$000D  uint16 Number of arguments
-        bc_narg = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-        idx += 2
-
-        # $000E-$0011  uint32  Offset of arguments name
-        argnames_off = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-        idx += 4
-
-        # $0012-$0013  uint16  Number of local variables
-        bc_nlocal = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-        idx += 2
-
-        # $0014-$0017  uint32  Local variables offset
-        localnames_off = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-        idx += 4
-
-        # $0018-$0019  uint16  Count (C)
-        count_c = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-        idx += 2
-
-        # $001A-$001D  uint32  Unknown
-        unknown_rb3 = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-        idx += 4
-
-        # $001E-$0021  uint32  Unknown
-        unknown_rb4 = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-        idx += 4
-
-        # $0022-$0023  uint16  Unknown
-        unknown_rb5 = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-        idx += 2
-
-        # $0024-$0025  uint16  Count (D)
-        count_d = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-        idx += 2
-
-        # $0026-$0029  uint32  Unknown
-        unknown_rb6 = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-        idx += 4
-
-        logging.debug("namelist_index = %x", namelist_index) 
-        logging.debug("unknown_rb0 = %x", unknown_rb0) 
-        logging.debug("bc_length = %x", bc_length) 
-        logging.debug("bc_off = %x", bc_off) 
-        logging.debug("bc_narg = %x", bc_narg) 
-        logging.debug("argnames_off = %x", argnames_off) 
-        logging.debug("bc_nlocal = %x", bc_nlocal) 
-        logging.debug("localnames_off = %x", localnames_off) 
-        logging.debug("count_c = %x", count_c) 
-        logging.debug("unknown_rb3 = %x", unknown_rb3) 
-        logging.debug("unknown_rb4 = %x", unknown_rb4) 
-        logging.debug("unknown_rb5 = %x", unknown_rb5) 
-        logging.debug("count_d = %x", count_d) 
-        logging.debug("unknown_rb6 = %x", unknown_rb6) 
-
-
-        logging.debug("Function Record Block: %i (ends in: %x)", i, idx) 
+    i = 0
+    for (namelist_index, unknown_rb0, bc_length, bc_off, bc_narg,
+         argnames_off, bc_nlocal, localnames_off, count_c, unknown_rb3,
+         unknown_rb4, unknown_rb5, count_d, unknown_rb6
+         ) in LSCR_FUNCTION_RECORD.iter_unpack(lsrc_bit_order, fdata, idx,
+                                               header.frb_nrecords):
+        if debug:
+            logging.debug("Function Record Block: %i (starts in: %x)", i, idx)
+        idx += LSCR_FUNCTION_RECORD.size
+
+        if debug:
+            logging.debug("namelist_index = %x", namelist_index)
+            logging.debug("unknown_rb0 = %x", unknown_rb0)
+            logging.debug("bc_length = %x", bc_length)
+            logging.debug("bc_off = %x", bc_off)
+            logging.debug("bc_narg = %x", bc_narg)
+            logging.debug("argnames_off = %x", argnames_off)
+            logging.debug("bc_nlocal = %x", bc_nlocal)
+            logging.debug("localnames_off = %x", localnames_off)
+            logging.debug("count_c = %x", count_c)
+            logging.debug("unknown_rb3 = %x", unknown_rb3)
+            logging.debug("unknown_rb4 = %x", unknown_rb4)
+            logging.debug("unknown_rb5 = %x", unknown_rb5)
+            logging.debug("count_d = %x", count_d)
+            logging.debug("unknown_rb6 = %x", unknown_rb6)
+            logging.debug("Function Record Block: %i (ends in: %x)", i, idx)
+        i += 1
 
         fname = 'noname'
         if namelist_index >= 0 and namelist_index < len(context.name_list):
@@ -195,23 +190,27 @@ def parse_frb(fdata: bytes, header: Header, context: Context, script: Script):
         # Read the local variable names record block
         for nl in range(0, bc_nlocal):
             idxl = 2*nl + localnames_off
-            n = struct.unpack(lsrc_bit_order+"h", fdata[idxl:idxl+2])[0]
-            logging.debug("idxl = %x n=%s", idxl, n)
-            logging.debug('localvs[%s] = "%s"', nl, context.name_list[n])
+            n = NAME_INDEX.unpack_from(lsrc_bit_order, fdata, idxl)[0]
+            if debug:
+                logging.debug("idxl = %x n=%s", idxl, n)
+                logging.debug('localvs[%s] = "%s"', nl, context.name_list[n])
             fn.local_vars.append(
                 LocalVariable(context.name_list[n], idxl))
 
         # Read the parameter names record block
         for nl in range(0, bc_narg):
             idxl = 2*nl + argnames_off
-            n = struct.unpack(lsrc_bit_order+"h", fdata[idxl:idxl+2])[0]
+            n = NAME_INDEX.unpack_from(lsrc_bit_order, fdata, idxl)[0]
             if n > 0:
-                logging.debug("idxl = %x n=%s", idxl, n)
-                logging.debug('paramns[%s] = "%s"', nl, context.name_list[n])
+                if debug:
+                    logging.debug("idxl = %x n=%s", idxl, n)
+                    logging.debug('paramns[%s] = "%s"', nl,
+                                  context.name_list[n])
                 fn.parameters.append(
                     ParameterName(context.name_list[n], idxl))
             else:
-                logging.debug("n=%s --> is factory method", n)
+                if debug:
+                    logging.debug("n=%s --> is factory method", n)
                 fn.is_method = True
                 fn.parameters.append(
                     ParameterName('me', idxl))
@@ -252,6 +251,7 @@ def parse_opcodes(fdata: bytes, context: Context, bc_off: int,
     stack: List[Node] = []
     idxc = bc_off
     index = idxc
+    debug: bool = DEBUG_OPCODES and is_debug_enabled()
     while (idxc - bc_off) < bc_length:
         opcode = int(fdata[idxc])
         idxc = idxc + 1
@@ -262,7 +262,7 @@ def parse_opcodes(fdata: bytes, context: Context, bc_off: int,
             if parse_obj.nbytes == 2:
                 opcode2 = int(fdata[idxc])
                 idxc = idxc + 1
-                if DEBUG_OPCODES:
+                if debug:
                     logging.debug("[%s] op0: %x op1: %x", index, opcode,
                                                           opcode2)
                 
@@ -277,7 +277,7 @@ def parse_opcodes(fdata: bytes, context: Context, bc_off: int,
                 opcode3 = int(fdata[idxc])
                 idxc = idxc + 1
                 
-                if DEBUG_OPCODES:
+                if debug:
                     logging.debug("[%s] op0: %x op1: %x op2: %x", index,
                                                              opcode,
                                                              opcode2,
@@ -289,12 +289,12 @@ def parse_opcodes(fdata: bytes, context: Context, bc_off: int,
                 else:
                     cast(Param2Opcode, parse_obj).param1 = opcode2
                     cast(Param2Opcode, parse_obj).param2 = opcode3
-            elif DEBUG_OPCODES:
+            elif debug:
                 logging.debug("[%s] op0: %x", index, opcode)
                     
             parse_obj.process(context, stack, fn, index)
             index = idxc
-            if DEBUG_OPCODES:
+            if debug:
                 logging.debug("-> %s", get_class_name(parse_obj))
             
         else:
@@ -332,19 +332,21 @@ def parse_frb_func_names(fdata: bytes, header: Header, context: Context):
     """
     
     logging.debug("====== parse LSCR func record block (names)===============")
+    debug: bool = is_debug_enabled()
     lsrc_bit_order = '>'    
     idx = header.frb_offset
     context.local_func_names = []
     for i in range(0, header.frb_nrecords):
         # $0000-$0001  uint16  Namelist index for the function's name,
         # or 0xFFFF if there is no name(?)
-        namelist_index = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-        idx += 42
+        namelist_index = NAME_INDEX.unpack_from(lsrc_bit_order, fdata, idx)[0]
+        idx += LSCR_FUNCTION_RECORD.size
         
         fname = 'noname'
         if namelist_index >= 0 and namelist_index < len(context.name_list):
             fname = context.name_list[namelist_index]
-        logging.debug('lfnames[%d]=%s'%(i, fname))
+        if debug:
+            logging.debug('lfnames[%d]=%s', i, fname)
         context.local_func_names.append(fname)
     
     
@@ -381,6 +383,7 @@ def parse_lrcr_prb(fdata: bytes, header: Header, name_list: List[str]
     """
     
     logging.debug("====== parse LSCR properties record block =================")
+    debug: bool = is_debug_enabled()
     lsrc_bit_order = '>'    
     pnames: List[str] = []
     if header.grb_offset != header.prb_offset:
@@ -390,14 +393,16 @@ def parse_lrcr_prb(fdata: bytes, header: Header, name_list: List[str]
         while idx < header.grb_offset:
             # $0000-$0001  uint16  Namelist index for the property's name,
             # or 0xFFFF if there is no name(?)
-            namelist_index = struct.unpack(lsrc_bit_order+"h", fdata[
-                idx:idx+2])[0]
-            idx += 2
+            namelist_index = NAME_INDEX.unpack_from(lsrc_bit_order, fdata,
+                                                    idx)[0]
+            idx += NAME_INDEX.size
 
             fname = 'noname'
             if namelist_index >= 0 and namelist_index < len(name_list):
                 fname = name_list[namelist_index]
-            logging.debug('pnames[%d]=%s (idx=%d)', i, fname, namelist_index)
+            if debug:
+                logging.debug('pnames[%d]=%s (idx=%d)', i, fname,
+                              namelist_index)
             i += 1
             pnames.append(fname)            
     
@@ -437,6 +442,7 @@ def parse_lrcr_grb(fdata: bytes, header: Header, name_list: List[str]
     """
     
     logging.debug("====== parse LSCR global vars record block ===============")
+    debug: bool = is_debug_enabled()
     lsrc_bit_order = '>'    
     gnames: List[str] = []
     if header.frb_offset != header.grb_offset:
@@ -447,14 +453,15 @@ def parse_lrcr_grb(fdata: bytes, header: Header, name_list: List[str]
         while idx < header.frb_offset:
             # $0000-$0001  uint16  Namelist index for the property's name,
             # or 0xFFFF if there is no name(?)
-            namelist_index = struct.unpack(lsrc_bit_order+"h", fdata[
-                idx:idx+2])[0]
-            idx += 2
+            namelist_index = NAME_INDEX.unpack_from(lsrc_bit_order, fdata,
+                                                    idx)[0]
+            idx += NAME_INDEX.size
 
             fname = 'noname'
             if namelist_index >= 0 and namelist_index < len(name_list):
                 fname = name_list[namelist_index]
-            logging.debug('gnames[%d]=%s'%(i, fname))
+            if debug:
+                logging.debug('gnames[%d]=%s', i, fname)
             i += 1
             gnames.append(fname)            
     
@@ -498,29 +505,32 @@ def parse_lrcr_crb(fdata: bytes, header: Header) -> List[str]:
     idx = header.crb_offset
 
     logging.debug("====== parse LSCR constants record block =================")
+    debug: bool = is_debug_enabled()
     for i in range(0, header.crb_nconstants):
-        logging.debug("idx = %s", idx)
+        if debug:
+            logging.debug("idx = %s", idx)
         if bytes_per_const == 8:
             # uint32: Value type ID 
-            logging.debug("4 bytes constant ID")
-            constant_type = struct.unpack(lsrc_bit_order+"i",
-                                          fdata[idx:idx+4])[0]
+            if debug:
+                logging.debug("4 bytes constant ID")
+            constant_type = INT32.unpack_from(lsrc_bit_order, fdata, idx)[0]
             idx += 4
         else:
             # uint16: Value type ID
-            logging.debug("2 bytes constant ID")
-            constant_type = struct.unpack(lsrc_bit_order+"h",
-                                          fdata[idx:idx+2])[0]
+            if debug:
+                logging.debug("2 bytes constant ID")
+            constant_type = INT16.unpack_from(lsrc_bit_order, fdata, idx)[0]
             idx += 2
             if constant_type == 0:
-                logging.debug("It may be a 4 bytes constant ID")
-                constant_type = struct.unpack(lsrc_bit_order+"h",
-                                              fdata[idx:idx+2])[0]
+                if debug:
+                    logging.debug("It may be a 4 bytes constant ID")
+                constant_type = INT16.unpack_from(lsrc_bit_order, fdata,
+                                                  idx)[0]
                 idx += 2
                 bytes_per_const = 8
 
         # uint32: Data address, relative to the base address given in the header 
-        constant_offset = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
+        constant_offset = INT32.unpack_from(lsrc_bit_order, fdata, idx)[0]
         idx += 4
 
         #logging.debug("constant_type = %s", constant_type) 
@@ -531,8 +541,7 @@ def parse_lrcr_crb(fdata: bytes, header: Header) -> List[str]:
             idxc = header.con_offset + constant_offset
 
             # uint32: String length
-            strlength = struct.unpack(lsrc_bit_order+"i",
-                                      fdata[idxc:idxc+4])[0] - 1
+            strlength = INT32.unpack_from(lsrc_bit_order, fdata, idxc)[0] - 1
             idxc += 4
             #logging.debug("strlength = %s", strlength) 
 
@@ -549,8 +558,7 @@ def parse_lrcr_crb(fdata: bytes, header: Header) -> List[str]:
             idxc = header.con_offset + constant_offset
             
             # uint32: Float length
-            floatlength = struct.unpack(lsrc_bit_order+"i",
-                                        fdata[idxc:idxc+4])[0]
+            floatlength = INT32.unpack_from(lsrc_bit_order, fdata, idxc)[0]
             idxc += 4
             #logging.debug("floatlength = %s", floatlength)
             
@@ -564,7 +572,8 @@ def parse_lrcr_crb(fdata: bytes, header: Header) -> List[str]:
             logging.error("Unknown constant type: %s", constant_type)
             raise ValueError("Unknown constant type!")
 
-        logging.debug("constants[%s] = %s", i, constants[i])
+        if debug:
+            logging.debug("constants[%s] = %s", i, constants[i])
         
     header.bytes_per_constant = bytes_per_const
     return constants
@@ -598,140 +607,62 @@ def parse_lrcr_file_header(fdata: bytes) -> Header:
     """
     
     lsrc_bit_order = '>'
-
-    idx = 0
-    scr_type = struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_01 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    filesize0 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    filesize1 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_04 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-    scr_num =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-    unknown_05 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2 
-    cont_scr_num =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-    unknown_06 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_07 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_08 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_09 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_10 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_11 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    factory_name_idx =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-    unknown_12 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-    unknown_13 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_14 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-    unknown_15 =  struct.unpack(lsrc_bit_order+"i", fdata[idx:idx+4])[0]
-    idx += 4
-
-    logging.debug("====== parse LSCR file header ============================")
-    logging.debug("scr_type = %08x", scr_type) 
-    logging.debug("unknown_01 = %08x", unknown_01) 
-    logging.debug("filesize0 = %s", filesize0) 
-    logging.debug("filesize1 = %s", filesize1) 
-    logging.debug("unknown_04 = %04x", unknown_04)
-    logging.debug("Script number = %s", scr_num) 
-    logging.debug("unknown_05 = %04x", unknown_05)
-    logging.debug("Continues Script number = %s", cont_scr_num)
-    logging.debug("unknown_06 = %08x", unknown_06) 
-    logging.debug("unknown_07 = %08x", unknown_07) 
-    logging.debug("unknown_08 = %08x", unknown_08) 
-    logging.debug("unknown_09 = %08x", unknown_09) 
-    logging.debug("unknown_10 = %08x", unknown_10) 
-    logging.debug("unknown_11 = %08x", unknown_11)
-    logging.debug("factory_name_idx = %d", factory_name_idx)
-    logging.debug("unknown_12 = %08x", unknown_12) 
-    logging.debug("unknown_13 = %08x", unknown_13) 
-    logging.debug("unknown_14 = %08x", unknown_14) 
-    logging.debug("unknown_15 = %08x", unknown_15) 
+    debug: bool = is_debug_enabled()
+
+    (scr_type, unknown_01, filesize0, filesize1, unknown_04, scr_num,
+     unknown_05, cont_scr_num, unknown_06, unknown_07, unknown_08,
+     unknown_09, unknown_10, unknown_11, factory_name_idx, unknown_12,
+     unknown_13, unknown_14, unknown_15) = LSCR_HEADER.unpack_from(
+         lsrc_bit_order, fdata)
+
+    if debug:
+        logging.debug("====== parse LSCR file header ========================"
+                      + "====")
+        logging.debug("scr_type = %08x", scr_type)
+        logging.debug("unknown_01 = %08x", unknown_01)
+        logging.debug("filesize0 = %s", filesize0)
+        logging.debug("filesize1 = %s", filesize1)
+        logging.debug("unknown_04 = %04x", unknown_04)
+        logging.debug("Script number = %s", scr_num)
+        logging.debug("unknown_05 = %04x", unknown_05)
+        logging.debug("Continues Script number = %s", cont_scr_num)
+        logging.debug("unknown_06 = %08x", unknown_06)
+        logging.debug("unknown_07 = %08x", unknown_07)
+        logging.debug("unknown_08 = %08x", unknown_08)
+        logging.debug("unknown_09 = %08x", unknown_09)
+        logging.debug("unknown_10 = %08x", unknown_10)
+        logging.debug("unknown_11 = %08x", unknown_11)
+        logging.debug("factory_name_idx = %d", factory_name_idx)
+        logging.debug("unknown_12 = %08x", unknown_12)
+        logging.debug("unknown_13 = %08x", unknown_13)
+        logging.debug("unknown_14 = %08x", unknown_14)
+        logging.debug("unknown_15 = %08x", unknown_15)
 
     if filesize1 != filesize0 or filesize1 != len(fdata):
         logging.error("bad filesize (%s, %s, %s)", filesize1, filesize0,
                       len(fdata)) 
         raise ValueError("Bad file size!")
 
-    # $0040-$0041 uint16 Offset to the properties records block  
-    prb_offset = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    # $0042-$0043 uint16 Number of global var records  
-    grb_nrecords =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-    unknown_18 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    # $0045-$0046 uint16 Offset to the global_vars records block  
-    grb_offset = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    logging.debug("prb_offset = %s", prb_offset) 
-    logging.debug("grb_nrecords = %s", grb_nrecords) 
-    logging.debug("unknown_18 = %s", unknown_18) 
-    logging.debug("frb_offset = %s", grb_offset) 
-
-
-    # $0048-$0049 uint16 Number of function records 
-    frb_nrecords = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    unknown_19 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    # $0052-$0053 Offset to the function records block
-    frb_offset = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    logging.debug("frb_nrecords = %s", frb_nrecords) 
-    logging.debug("unknown_19 = %s", unknown_19) 
-    logging.debug("frb_offset = %s", frb_offset) 
-
-    # $004E-$004F    uint16  Number of constants 
-    crb_nconstants = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    unknown_20 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    # $0052-$0053  uint16 Offset to the constant records block 
-    crb_offset = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    unknown_21 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    # Size in bytes of the constants area???
-    unknown_22 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    unknown_23 =  struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    # $005A-$005B uint16 Base address for constant data
-    con_offset = struct.unpack(lsrc_bit_order+"h", fdata[idx:idx+2])[0]
-    idx += 2
-
-    logging.debug("crb_nconstants = %s", crb_nconstants)
-    logging.debug("unknown_20 = %s", unknown_20)
-    logging.debug("crb_offset = %s", crb_offset)
-    logging.debug("unknown_21 = %s", unknown_21)
-    logging.debug("unknown_22 = %s", unknown_22)
-    logging.debug("unknown_23 = %s", unknown_23)
-    logging.debug("con_offset = %s", con_offset)
+    (prb_offset, grb_nrecords, unknown_18, grb_offset, frb_nrecords,
+     unknown_19, frb_offset, crb_nconstants, unknown_20, crb_offset,
+     unknown_21, unknown_22, unknown_23, con_offset) = \
+        LSCR_OFFSETS.unpack_from(lsrc_bit_order, fdata, LSCR_HEADER.size)
+
+    if debug:
+        logging.debug("prb_offset = %s", prb_offset)
+        logging.debug("grb_nrecords = %s", grb_nrecords)
+        logging.debug("unknown_18 = %s", unknown_18)
+        logging.debug("frb_offset = %s", grb_offset)
+        logging.debug("frb_nrecords = %s", frb_nrecords)
+        logging.debug("unknown_19 = %s", unknown_19)
+        logging.debug("frb_offset = %s", frb_offset)
+        logging.debug("crb_nconstants = %s", crb_nconstants)
+        logging.debug("unknown_20 = %s", unknown_20)
+        logging.debug("crb_offset = %s", crb_offset)
+        logging.debug("unknown_21 = %s", unknown_21)
+        logging.debug("unknown_22 = %s", unknown_22)
+        logging.debug("unknown_23 = %s", unknown_23)
+        logging.debug("con_offset = %s", con_offset)
 
     header = Header()
     header.scr_num = scr_num
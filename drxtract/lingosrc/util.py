@@ -4,7 +4,9 @@
 
 import struct
 import os
-from typing import Dict, KeysView, Any
+import logging
+from array import array
+from typing import Dict, KeysView, Any, Iterator, List, Tuple
 
 #
 # Utility functions.
@@ -192,9 +194,451 @@ def replace(haystack:str, needle:str, replacement:str) -> str:
 
     return haystack.replace(needle, replacement)
 
+# =============================================================================
+def is_debug_enabled() -> bool:
+    """
+    Returns True if the debug messages are logged.
+    The parsers check it before logging inside loops, so the messages
+    are not formatted when they are not going to be logged.
+        
+    Returns
+    -------
+    bool
+        True if the debug level is enabled.
+        
+    """
+
+    return logging.getLogger().isEnabledFor(logging.DEBUG)
+
+# =============================================================================
+def translate_bytes(data: bytes, table: bytes) -> bytes:
+    """
+    Returns the bytes replaced by using a translation table.
+
+    Parameters
+    ----------
+    data : bytes
+        The bytes to translate.
+    table: bytes
+        The translation table (256 bytes).
+
+    Returns
+    -------
+    bytes
+        A byte array where every byte value V is replaced by table[V].
+
+    """
+
+    return bytes(data).translate(table)
+
+# =============================================================================
+def and_bytes(data1: bytes, data2: bytes) -> bytes:
+    """
+    Returns the bitwise AND of two byte arrays of the same length.
+
+    Parameters
+    ----------
+    data1 : bytes
+        The first byte array.
+    data2: bytes
+        The second byte array.
+
+    Returns
+    -------
+    bytes
+        A byte array where every byte is data1[i] & data2[i].
+
+    """
+
+    return (int.from_bytes(data1, 'big') & int.from_bytes(data2, 'big')
+            ).to_bytes(len(data1), 'big')
+
+# =============================================================================
+def find_byte(data: bytes, value: int, start: int, end: int) -> int:
+    """
+    Returns the index of the first byte with a value in a range.
+
+    Parameters
+    ----------
+    data : bytes
+        The byte array.
+    value: int
+        The byte value to find.
+    start: int
+        The start of the range.
+    end: int
+        The end of the range (not included).
+
+    Returns
+    -------
+    int
+        The index of the byte or -1 if it isn't in the range.
+
+    """
+
+    return data.find(value, start, end)
+
+# =============================================================================
+def rfind_byte(data: bytes, value: int, start: int, end: int) -> int:
+    """
+    Returns the index of the last byte with a value in a range.
+
+    Parameters
+    ----------
+    data : bytes
+        The byte array.
+    value: int
+        The byte value to find.
+    start: int
+        The start of the range.
+    end: int
+        The end of the range (not included).
+
+    Returns
+    -------
+    int
+        The index of the byte or -1 if it isn't in the range.
+
+    """
+
+    return data.rfind(value, start, end)
+
+# =============================================================================
+def repeat_byte(value: int, n: int) -> bytes:
+    """
+    Returns a byte array with a byte value repeated N times.
+
+    Parameters
+    ----------
+    value : int
+        The byte value.
+    n: int
+        The number of times that the value will be repeated.
+
+    Returns
+    -------
+    bytes
+        The byte value repeated N times.
+
+    """
+
+    return bytes((value,)) * n
+
+# =============================================================================
+def expand_bytes(data: bytes, table: List[bytes]) -> bytes:
+    """
+    Returns the concatenation of the expansions of every byte by using a
+    lookup table (i.e. the pixels of the bits or the nibbles of a byte).
+
+    Parameters
+    ----------
+    data : bytes
+        The bytes to expand.
+    table: List[bytes]
+        The expansion of every byte value (256 entries).
+
+    Returns
+    -------
+    bytes
+        The concatenation of table[V] for every byte value V.
+
+    """
+
+    return b''.join(map(table.__getitem__, data))
+
+# =============================================================================
+def write_bytes(data: bytearray, index: int, values: bytes):
+    """
+    Writes some bytes into a byte array. It works like writing every byte
+    with data[index + i] = values[i] (a negative index is counted from the
+    end of the array) but it copies all the bytes at once.
+
+    Parameters
+    ----------
+    data : bytearray
+        The byte array where the values will be written.
+    index: int
+        The index of the first value.
+    values: bytes
+        The values to write.
+
+    Raises
+    ------
+    IndexError
+        If some value is out of the array.
+
+    """
+
+    n = len(values)
+    size = len(data)
+    if index + n > size or index < -size:
+        raise IndexError('bytearray index out of range')
+
+    if index < 0:
+        # The first values are written at the end of the array
+        k = min(-index, n)
+        data[size + index:size + index + k] = values[0:k]
+        data[0:n - k] = values[k:n]
+    else:
+        data[index:index + n] = values
+
+# =============================================================================
+def read_bytes_step(data: bytes, index: int, step: int, n: int) -> bytes:
+    """
+    Reads some bytes of a byte array that are separated by a gap. It works
+    like reading data[index + i*step] for every i from 0 to n-1 but it
+    copies all the bytes at once.
+
+    Parameters
+    ----------
+    data : bytes
+        The byte array.
+    index: int
+        The index of the first value.
+    step: int
+        The distance between two consecutive values.
+    n: int
+        The number of values.
+
+    Returns
+    -------
+    bytes
+        The values.
+
+    Raises
+    ------
+    IndexError
+        If some value is out of the array.
+
+    """
+
+    if n <= 0:
+        return bytes()
+
+    if index < 0 or index + (n - 1)*step >= len(data):
+        raise IndexError('index out of range')
+
+    return bytes(data[index:index + (n - 1)*step + 1:step])
+
+# =============================================================================
+def write_bytes_step(data: bytearray, index: int, step: int, values: bytes):
+    """
+    Writes some bytes into a byte array leaving a gap between them. It works
+    like writing every byte with data[index + i*step] = values[i] but it
+    copies all the bytes at once.
+
+    Parameters
+    ----------
+    data : bytearray
+        The byte array where the values will be written.
+    index: int
+        The index of the first value.
+    step: int
+        The distance between two consecutive values.
+    values: bytes
+        The values to write.
+
+    Raises
+    ------
+    IndexError
+        If some value is out of the array.
+
+    """
+
+    n = len(values)
+    if index < 0 or index + (n - 1)*step >= len(data):
+        raise IndexError('bytearray index out of range')
+
+    data[index:index + (n - 1)*step + 1:step] = values
+
+# =============================================================================
+def bytes_view(data: bytes, start: int, end: int) -> bytes:
+    """
+    Returns a range of a byte array without copying it (a memoryview that
+    references the original bytes).
+
+    Parameters
+    ----------
+    data : bytes
+        The byte array.
+    start: int
+        The start of the range.
+    end: int
+        The end of the range (not included). It is clipped to the array
+        size, like in a slice.
+
+    Returns
+    -------
+    bytes
+        The bytes of the range.
+
+    """
+
+    return memoryview(data)[start:end]
+
+# =============================================================================
+def swap_bytes_16(data: bytes, index: int, n: int) -> bytes:
+    """
+    Reads some 16 bits words of a byte array and swaps the two bytes of
+    every word (big endian to little endian or vice versa). It works like
+    reading the words one by one, but it converts all of them at once.
+
+    Parameters
+    ----------
+    data : bytes
+        The byte array.
+    index: int
+        The index of the first word.
+    n: int
+        The number of words.
+
+    Returns
+    -------
+    bytes
+        The swapped words (2*n bytes). It is a memoryview of a new array,
+        so the original bytes are not modified.
+
+    Raises
+    ------
+    IndexError
+        If some word is out of the array.
+
+    """
+
+    if n <= 0:
+        return bytes()
+
+    if index < 0 or index + n*2 > len(data):
+        raise IndexError('index out of range')
+
+    words = array('h')
+    words.frombytes(memoryview(data)[index:index + n*2])
+    words.byteswap()
+    return memoryview(words).cast('B')
+
+# =============================================================================
+def join_bytes(chunks: List[bytes]) -> bytes:
+    """
+    Returns the concatenation of some byte arrays. A single byte array is
+    returned as it is (without copying it).
+
+    Parameters
+    ----------
+    chunks : List[bytes]
+        The byte arrays.
+
+    Returns
+    -------
+    bytes
+        The concatenated bytes.
+
+    """
+
+    if len(chunks) == 1:
+        return chunks[0]
+
+    return b''.join(chunks)
+
+# =============================================================================
+def hex_string(data: bytes) -> str:
+    """
+    Returns the bytes as a string of hexadecimal digits (two lowercase
+    digits per byte).
+
+    Parameters
+    ----------
+    data : bytes
+        The bytes.
+
+    Returns
+    -------
+    str
+        The hexadecimal digits.
+
+    """
+
+    return bytes(data).hex()
+
+# =============================================================================
+class RecordLayout:
+    """This class represents the layout of a fixed size record (a struct
+    module format without byte order). The format is compiled only once
+    for every byte order, so the parsers define their layouts at module
+    level and read whole tables of records with them."""
+    
+    __slots__ = ('fmt', 'size', 'structs')
+    
+    def __init__(self, fmt: str):
+        self.fmt: str = fmt
+        self.structs: Dict[str, struct.Struct] = {
+            '>': struct.Struct('>' + fmt),
+            '<': struct.Struct('<' + fmt)
+        }
+        self.size: int = self.structs['>'].size
+        """Size of the record in bytes"""
+    
+    def unpack_from(self, byte_order: str, fdata: bytes,
+                    offset: int = 0) -> Tuple:
+        """
+        Unpacks the record that starts at an offset.
+        
+        Parameters
+        ----------
+        byte_order : str
+            Python's struct module byte order.
+        fdata : bytes
+            The bytes that contain the record.
+        offset: int
+            The offset to the record.
+            
+        Returns
+        -------
+        Tuple
+            The values of the record fields.
+            
+        """
+        return self.structs[byte_order].unpack_from(fdata, offset)
+    
+    def iter_unpack(self, byte_order: str, fdata: bytes, offset: int,
+                    count: int) -> Iterator[Tuple]:
+        """
+        Unpacks a table of consecutive records.
+        
+        Parameters
+        ----------
+        byte_order : str
+            Python's struct module byte order.
+        fdata : bytes
+            The bytes that contain the table.
+        offset: int
+            The offset to the first record.
+        count: int
+            The number of records.
+            
+        Returns
+        -------
+        Iterator[Tuple]
+            The values of the fields of every record.
+            
+        Raises
+        ------
+        struct.error
+            If there is not enough data for all the records.
+            
+        """
+        end = offset + self.size * max(count, 0)
+        if end > len(fdata):
+            raise struct.error('unpack requires a buffer of %d bytes'%(
+                end - offset))
+        
+        return self.structs[byte_order].iter_unpack(
+            memoryview(fdata)[offset:end])
+
 # =============================================================================
 class Dictionary(dict):
     """This class is a wrapper for dict"""
     
+    __slots__ = ()
+    
     def __init__(self, **kwargs):
         super().__init__(self, **kwargs)
@@ -13,17 +13,29 @@
 import sys
 import os
 import logging
-from .lingosrc.parse import parse_lnam_file, parse_lrcr_file
+from typing import List
+from .lingosrc.parse import parse_lnam_file, parse_lrcr_file_data
 from .lingosrc.ast import Script
 from .lingosrc.codegen import generate_js_code
+from .cache import cached
+from .options import setup_logging
 
-logging.basicConfig(level=logging.DEBUG)
+# =============================================================================
+# Transpiles the data of a LSCR file to JavaScript
+def lscr2js(fdata: bytes, name_list: List[str], cache=None) -> str:
+    def decode() -> bytes:
+        script: Script = parse_lrcr_file_data(fdata, name_list)
+        return generate_js_code(script).encode('utf-8')
+    
+    return cached(cache, 'Lscr.js', (fdata, name_list), decode).decode('utf-8')
 
 # =============================================================================
 def main():
+    setup_logging()
+
     if len(sys.argv) < 4:
         print("USAGE: lscr2js <work directory> <lscr file name>"
-            + " <lnam file path>")
+            + " <lnam file path> [--log-level LEVEL]")
 
     else:
         if not os.path.isdir(sys.argv[1]):
@@ -50,15 +62,9 @@ def main():
         # Parse the LNAM and LSCR files into an AST
         name_list = parse_lnam_file(sys.argv[3])
 
-        script: Script =  parse_lrcr_file(
-            os.path.join(sys.argv[1], sys.argv[2]),
-            name_list)
+        with open(os.path.join(sys.argv[1], sys.argv[2]), mode='rb') as file:
+            jscode: str = lscr2js(file.read(), name_list)
         
-        jscode: str = generate_js_code(script)
-        
-        #print("========================\n")
-        #print(jscode)
-
         # Save file
         file_ext = "js"
         lscr_file = os.path.join(sys.argv[1], sys.argv[2])
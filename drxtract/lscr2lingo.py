@@ -13,17 +13,29 @@
 import sys
 import os
 import logging
-from .lingosrc.parse import parse_lnam_file, parse_lrcr_file
+from typing import List
+from .lingosrc.parse import parse_lnam_file, parse_lrcr_file_data
 from .lingosrc.ast import Script
 from .lingosrc.codegen import generate_lingo_code
+from .cache import cached
+from .options import setup_logging
 
-logging.basicConfig(level=logging.DEBUG)
+# =============================================================================
+# Decompiles the data of a LSCR file
+def lscr2lingo(fdata: bytes, name_list: List[str], cache=None) -> str:
+    def decode() -> bytes:
+        script: Script = parse_lrcr_file_data(fdata, name_list)
+        return generate_lingo_code(script).encode('utf-8')
+    
+    return cached(cache, 'Lscr.lingo', (fdata, name_list), decode).decode('utf-8')
 
 # =============================================================================
 def main():
+    setup_logging()
+
     if len(sys.argv) < 4:
         print("USAGE: lscr2lingo <work directory> <lscr file name>"
-            + " <lnam file path>")
+            + " <lnam file path> [--log-level LEVEL]")
 
     else:
         if not os.path.isdir(sys.argv[1]):
@@ -50,15 +62,9 @@ def main():
         # Parse the LNAM and LSCR files into an AST
         name_list = parse_lnam_file(sys.argv[3])
 
-        script: Script =  parse_lrcr_file(
-            os.path.join(sys.argv[1], sys.argv[2]),
-            name_list)
-        
-        lingo: str = generate_lingo_code(script)
+        with open(os.path.join(sys.argv[1], sys.argv[2]), mode='rb') as file:
+            lingo: str = lscr2lingo(file.read(), name_list)
         
-        #print("========================\n")
-        #print(lingo)
-
         # Save file
         file_ext = "lingo"
         lscr_file = os.path.join(sys.argv[1], sys.argv[2])
@@ -69,5 +75,3 @@ def main():
             
 if __name__ == '__main__':
     main()
-
-        
\ No newline at end of file
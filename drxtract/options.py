@@ -0,0 +1,131 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Command line options shared by the scripts.
+# Options are removed from sys.argv so the scripts keep reading their
+# positional arguments as usual.
+# 
+
+import sys
+import logging
+from typing import List, Optional
+
+# Default log level of the scripts
+DEFAULT_LOG_LEVEL = 'WARNING'
+
+# ==============================================================================
+def pop_flag(name: str, argv: Optional[List[str]] = None) -> bool:
+    """
+    Removes a flag (i.e. "--all") from the command line arguments.
+    
+    Parameters
+    ----------
+    name : str
+        The flag name.
+    argv : List[str]
+        The command line arguments (sys.argv by default).
+        
+    Returns
+    -------
+    bool
+        True if the flag was present.
+        
+    """
+    if argv is None:
+        argv = sys.argv
+    
+    found: bool = False
+    while name in argv[1:]:
+        argv.remove(name)
+        found = True
+    
+    return found
+
+# ==============================================================================
+def pop_option(name: str, default: str,
+               argv: Optional[List[str]] = None) -> str:
+    """
+    Removes an option with a value (i.e. "--jobs 4" or "--jobs=4") from the
+    command line arguments.
+    
+    Parameters
+    ----------
+    name : str
+        The option name.
+    default : str
+        The value to return when the option is not present.
+    argv : List[str]
+        The command line arguments (sys.argv by default).
+        
+    Returns
+    -------
+    str
+        The option value.
+        
+    """
+    if argv is None:
+        argv = sys.argv
+    
+    value: str = default
+    i = 1
+    while i < len(argv):
+        if argv[i] == name and i + 1 < len(argv):
+            value = argv[i + 1]
+            del argv[i:i+2]
+        elif argv[i].startswith(name + '='):
+            value = argv[i][len(name) + 1:]
+            del argv[i]
+        else:
+            i += 1
+    
+    return value
+
+# ==============================================================================
+def pop_jobs(default: str, argv: Optional[List[str]] = None) -> int:
+    """
+    Removes the "--jobs" option (i.e. "--jobs 4") from the command line
+    arguments and returns its value. The script exits if it is not a
+    number of processes (0 for one per CPU).
+    
+    Parameters
+    ----------
+    default : str
+        The value to use when the option is not present.
+    argv : List[str]
+        The command line arguments (sys.argv by default).
+        
+    Returns
+    -------
+    int
+        The number of processes.
+        
+    """
+    value: str = pop_option('--jobs', default, argv)
+    if not value.isdigit():
+        logging.error("Wrong number of jobs: %s", value)
+        sys.exit(-1)
+    
+    return int(value)
+
+# ==============================================================================
+def setup_logging(argv: Optional[List[str]] = None):
+    """
+    Removes the "--log-level" option (i.e. "--log-level DEBUG") from the
+    command line arguments and configures the logging with that level.
+    
+    Parameters
+    ----------
+    argv : List[str]
+        The command line arguments (sys.argv by default).
+        
+    """
+    name: str = pop_option('--log-level', DEFAULT_LOG_LEVEL, argv).upper()
+    level = logging.getLevelName(name)
+    if not isinstance(level, int):
+        logging.basicConfig(level=DEFAULT_LOG_LEVEL)
+        logging.error("Unknown log level: %s", name)
+        sys.exit(-1)
+    
+    logging.basicConfig(level=level)
@@ -0,0 +1,8 @@
+# ---------------------------------------------------------------------------------------------------------------
+#      BB    GG    RR    AA
+BW_PALETTE = (
+  255, 255, 255, 0, # white  
+  0, 0, 0, 0        # black  
+)
+
+__all__ = ['BW_PALETTE']
@@ -0,0 +1,150 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+import struct
+from typing import Dict
+from ..lingosrc.util import get_keys, repeat_string, read_bytes_step, \
+    write_bytes_step
+from .blackWhite import BW_PALETTE
+from .systemMac16 import SYSTEM_MAC_16COLORS_PALETTE
+from .systemWin16 import SYSTEM_WINDOWS_16COLORS_PALETTE
+from .grayscale import GRAYSCALE_256COLORS_PALETTE
+from .metallic import METALLIC_256COLORS_PALETTE
+from .ntsc import NTSC_256COLORS_PALETTE
+from .pastels import PASTELS_256COLORS_PALETTE
+from .rainbow import RAINBOW_256COLORS_PALETTE
+from .systemMac import SYSTEM_MAC_256COLORS_PALETTE
+from .systemWinDir4 import SYSTEM_WINDOWS_DIR4_256COLORS_PALETTE
+from .systemWin import SYSTEM_WINDOWS_256COLORS_PALETTE
+from .vivid import VIVID_256COLORS_PALETTE
+from .web216 import WEB_256COLORS_PALETTE
+
+#
+# Built-in color palettes.
+# The palettes are only packed when they are used for the first time.
+#
+
+# Colors of every palette (by bits per pixel and name)
+PALETTES: Dict[int, Dict[str, tuple]] = {
+    1: {
+        'black and white': BW_PALETTE
+    },
+    4: {
+        'systemMac': SYSTEM_MAC_16COLORS_PALETTE,
+        'systemWin': SYSTEM_WINDOWS_16COLORS_PALETTE
+    },
+    8: {
+        'grayscale': GRAYSCALE_256COLORS_PALETTE,
+        'metallic': METALLIC_256COLORS_PALETTE,
+        'ntsc': NTSC_256COLORS_PALETTE,
+        'pastels': PASTELS_256COLORS_PALETTE,
+        'rainbow': RAINBOW_256COLORS_PALETTE,
+        'systemMac': SYSTEM_MAC_256COLORS_PALETTE,
+        'systemWinDir4': SYSTEM_WINDOWS_DIR4_256COLORS_PALETTE,
+        'systemWin': SYSTEM_WINDOWS_256COLORS_PALETTE,
+        'vivid': VIVID_256COLORS_PALETTE,
+        'web216': WEB_256COLORS_PALETTE
+    }
+}
+
+# Palette used when the name of a palette is unknown
+DEFAULT_PALETTES: Dict[int, str] = {
+    1: 'black and white',
+    4: 'systemWin',
+    8: 'systemWin'
+}
+
+# Palettes that are already loaded (BGRA and RGB colors)
+loaded_palettes: Dict[str, bytes] = {}
+loaded_rgb_palettes: Dict[str, bytes] = {}
+
+# =============================================================================
+def has_palette(nbits: int, name: str) -> bool:
+    """
+    Returns True if there is a built-in palette with that name.
+
+    Parameters
+    ----------
+    nbits : int
+        Bits per pixel of the images that use the palette.
+    name: str
+        Palette name (the palette_txt of the cast member).
+
+    Returns
+    -------
+    bool
+        True if the palette exists.
+
+    """
+    return (nbits in get_keys(PALETTES) and
+            name in get_keys(PALETTES[nbits]))
+
+# =============================================================================
+def get_palette(nbits: int, name: str) -> bytes:
+    """
+    Returns a built-in palette.
+
+    Parameters
+    ----------
+    nbits : int
+        Bits per pixel of the images that use the palette.
+    name: str
+        Palette name (the palette_txt of the cast member).
+
+    Returns
+    -------
+    bytes
+        4 bytes per color: blue, green, red and zero (like in a BMP file).
+
+    Raises
+    ------
+    ValueError
+        If there isn't any palette with that name.
+
+    """
+    if not has_palette(nbits, name):
+        raise ValueError("Unknown palette: %s (%s bits)"%(name, nbits))
+
+    key = "%s/%s"%(nbits, name)
+    if key not in get_keys(loaded_palettes):
+        colors = PALETTES[nbits][name]
+        loaded_palettes[key] = struct.pack(repeat_string('B', len(colors)),
+                                           *colors)
+
+    return loaded_palettes[key]
+
+# =============================================================================
+def get_palette_rgb(nbits: int, name: str) -> bytes:
+    """
+    Returns a built-in palette as RGB colors.
+
+    Parameters
+    ----------
+    nbits : int
+        Bits per pixel of the images that use the palette.
+    name: str
+        Palette name (the palette_txt of the cast member).
+
+    Returns
+    -------
+    bytes
+        3 bytes per color: red, green and blue.
+
+    Raises
+    ------
+    ValueError
+        If there isn't any palette with that name.
+
+    """
+    key = "%s/%s"%(nbits, name)
+    if key not in get_keys(loaded_rgb_palettes):
+        palette = get_palette(nbits, name)
+        ncolors = int(len(palette) / 4)
+        rgb = bytearray(ncolors * 3)
+        write_bytes_step(rgb, 0, 3, read_bytes_step(palette, 2, 4, ncolors))
+        write_bytes_step(rgb, 1, 3, read_bytes_step(palette, 1, 4, ncolors))
+        write_bytes_step(rgb, 2, 3, read_bytes_step(palette, 0, 4, ncolors))
+        loaded_rgb_palettes[key] = bytes(rgb)
+
+    return loaded_rgb_palettes[key]
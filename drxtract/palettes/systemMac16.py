@@ -0,0 +1,23 @@
+# ---------------------------------------------------------------------------------------------------------------
+#      BB    GG    RR    AA
+SYSTEM_MAC_16COLORS_PALETTE = (
+  255, 255, 255, 0, # white
+  0, 255, 255, 0,   # yellow
+  0, 160, 255, 0,   # orange
+  0, 0, 255, 0,     # red
+  255, 0, 255, 0,   # magenta
+  128, 0, 128, 0,   # purple
+  255, 0, 0, 0,     # blue
+  255, 255, 0, 0,   # cyan
+
+  0, 128, 0, 0,     # green
+  0, 100, 0, 0,     # dark green
+  42, 42, 165, 0,   # brown
+  140, 180, 210, 0, # tan
+  211, 211, 211, 0, # light gray
+  128, 128, 128, 0, # gray
+  169, 169, 169, 0, # dark gray
+  0, 0, 0, 0        # black
+ )
+
+__all__ = ['SYSTEM_MAC_16COLORS_PALETTE']
@@ -0,0 +1,23 @@
+# ---------------------------------------------------------------------------------------------------------------
+#      BB    GG    RR    AA
+SYSTEM_WINDOWS_16COLORS_PALETTE = (
+  255, 255, 255, 0, # white
+  255, 255, 0, 0,   # aqua
+  255, 0, 255, 0,   # fuchsia
+  255, 0, 0, 0,     # blue
+  0, 255, 255, 0,   # yellow
+  0, 255, 0, 0,     # lime
+  0, 0, 255, 0,     # red
+  128, 128, 128, 0, # gray
+
+  192, 192, 192, 0, # silver
+  128, 128, 0, 0,   # teal
+  128, 0, 128, 0,   # purple
+  128, 0, 0, 0,     # navy
+  0, 128, 128, 0,   # olive
+  0, 128, 0, 0,     # green
+  0, 0, 128, 0,     # maroon
+  0, 0, 0, 0        # black
+ )
+
+__all__ = ['SYSTEM_WINDOWS_16COLORS_PALETTE']
@@ -0,0 +1,10 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+from .png import encode_png, COLOR_TYPE_RGB, COLOR_TYPE_INDEXED, \
+    COLOR_TYPE_RGBA
+from .bitmap2png import bitmap2png
+
+__all__ = ['encode_png', 'bitmap2png', 'COLOR_TYPE_RGB',
+           'COLOR_TYPE_INDEXED', 'COLOR_TYPE_RGBA']
@@ -0,0 +1,136 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Transforms the decoded BITD images into PNG images.
+#
+
+import struct
+from typing import List, Optional, Tuple
+from ..bitd import Bitmap
+from ..clut import palette2tables
+from ..bitd.formats import crop_rows, rgb555_to_rgb, bgr_to_rgb, \
+    interleave
+from .png import encode_png, COLOR_TYPE_INDEXED, COLOR_TYPE_RGB, \
+    COLOR_TYPE_RGBA
+
+# Alpha value of the opaque pixels
+OPAQUE = 255
+
+#
+# Transforms a bitmap into a PNG image
+#
+# =============================================================================
+def bitmap2png(bitmap: Bitmap, x: int = 0, y: int = 0,
+               width: Optional[int] = None, height: Optional[int] = None,
+               transparent: Optional[Tuple[int, int, int]] = None,
+               alpha: Optional[bytes] = None,
+               tables: Optional[List[bytes]] = None) -> bytes:
+    """
+    Encode an area of a decoded BITD image as a PNG image. The images with
+    a palette are encoded as indexed PNG images and the other ones as RGB
+    images (or RGBA images if there is an alpha mask). The area is clipped
+    to the image size (like the ImageMagick crop operator does).
+
+    Parameters
+    ----------
+    bitmap : Bitmap
+        The decoded image.
+    x : int
+        Left side of the area (crop).
+    y : int
+        Top side of the area (crop).
+    width : Optional[int]
+        Width of the area (None to get up to the right side of the image).
+    height : Optional[int]
+        Height of the area (None to get up to the bottom of the image).
+    transparent : Optional[Tuple[int, int, int]]
+        The color (red, green and blue) that will be transparent (if any).
+    alpha : Optional[bytes]
+        The alpha mask of the image (one byte for every pixel, the rows
+        stored like in the bitmap without padding). If some pixel of the
+        area isn't opaque the image is encoded as an RGBA image.
+    tables : Optional[List[bytes]]
+        The RGBA lookup tables of the palette (see palette2tables), i.e.
+        the ones of a PaletteCache. They are built from the palette of the
+        bitmap if there aren't any.
+
+    Returns
+    -------
+    bytes
+        a byte array with the PNG image.
+
+    Raises
+    ------
+    ValueError
+        If the area is empty or the bitmap has an unsupported format.
+
+    """
+    # The area is clipped to the image (the offsets can be negative)
+    right = bitmap.width if width is None else min(x + width, bitmap.width)
+    bottom = bitmap.height if height is None else min(y + height,
+                                                      bitmap.height)
+    x = max(x, 0)
+    y = max(y, 0)
+    width = right - x
+    height = bottom - y
+
+    if width <= 0 or height <= 0:
+        raise ValueError("Empty image area (%sx%s+%s+%s)"%(width, height,
+                                                           x, y))
+
+    data = crop_rows(bitmap.data, bitmap.stride, bitmap.height,
+                     int(bitmap.bpp / 8), x, y, width, height)
+
+    # Alpha values of the area (only if some pixel is transparent)
+    if alpha is not None:
+        alpha = crop_rows(alpha, bitmap.width, bitmap.height, 1, x, y, width,
+                          height)
+        if alpha.count(OPAQUE) == len(alpha):
+            alpha = None
+
+    if bitmap.bpp == 8 and alpha is not None:
+        if tables is None:
+            tables = palette2tables(bitmap.palette)
+        return encode_png(width, height, COLOR_TYPE_RGBA,
+                          interleave([data.translate(tables[0]),
+                                      data.translate(tables[1]),
+                                      data.translate(tables[2]),
+                                      alpha]))
+
+    if bitmap.bpp == 8:
+        # Palette colors are stored as blue, green, red and zero
+        ncolors = int(len(bitmap.palette) / 4)
+        palette = bgr_to_rgb(bitmap.palette[0:ncolors*4], 4)
+        transparency = b''
+        if transparent is not None:
+            palette_alpha = bytearray([OPAQUE]) * ncolors
+            for i in range(0, ncolors):
+                if tuple(palette[i*3:i*3+3]) == transparent:
+                    palette_alpha[i] = 0
+            if 0 in palette_alpha:
+                transparency = bytes(palette_alpha)
+
+        return encode_png(width, height, COLOR_TYPE_INDEXED, data, palette,
+                          transparency)
+
+    if bitmap.bpp == 16:
+        rgb = rgb555_to_rgb(data)
+
+    elif bitmap.bpp == 24:
+        rgb = bgr_to_rgb(data, 3)
+
+    else:
+        raise ValueError("Unsupported bitmap format (%s bpp)"%(bitmap.bpp))
+
+    if alpha is not None:
+        return encode_png(width, height, COLOR_TYPE_RGBA,
+                          interleave([rgb[0::3], rgb[1::3], rgb[2::3],
+                                      alpha]))
+
+    transparency = b''
+    if transparent is not None:
+        transparency = struct.pack('>HHH', *transparent)
+
+    return encode_png(width, height, COLOR_TYPE_RGB, rgb, b'', transparency)
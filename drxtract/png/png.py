@@ -0,0 +1,127 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# PNG image encoder.
+# https://www.w3.org/TR/png/
+#
+
+import zlib
+import struct
+from typing import List
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PNG color types
+COLOR_TYPE_RGB = 2
+COLOR_TYPE_INDEXED = 3
+COLOR_TYPE_RGBA = 6
+
+# Bytes per pixel of every color type (8 bits per sample)
+BYTES_PER_PIXEL = {
+    COLOR_TYPE_RGB: 3,
+    COLOR_TYPE_INDEXED: 1,
+    COLOR_TYPE_RGBA: 4
+}
+
+#
+# Write a PNG chunk
+#
+# =============================================================================
+def png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """
+    Return a PNG chunk (length, type, data and CRC).
+
+    Parameters
+    ----------
+    chunk_type : bytes
+        The chunk type (i.e. b'IHDR').
+    data : bytes
+        The chunk data.
+
+    Returns
+    -------
+    bytes
+        the chunk bytes.
+
+    """
+    return (struct.pack('>I', len(data)) + chunk_type + data
+            + struct.pack('>I', zlib.crc32(chunk_type + data) & 0xFFFFFFFF))
+
+#
+# Encode a PNG image
+#
+# =============================================================================
+def encode_png(width: int, height: int, color_type: int, data: bytes,
+               palette: bytes = b'', transparency: bytes = b'') -> bytes:
+    """
+    Encode an image as a PNG file (8 bits per sample).
+
+    Parameters
+    ----------
+    width : int
+        The image width.
+    height : int
+        The image height.
+    color_type : int
+        The PNG color type (COLOR_TYPE_RGB, COLOR_TYPE_INDEXED or
+        COLOR_TYPE_RGBA).
+    data : bytes
+        The pixels (from the top row to the bottom row, without padding).
+    palette : bytes
+        The color palette of indexed images (3 bytes per color: red, green
+        and blue).
+    transparency : bytes
+        The contents of the tRNS chunk (the alpha value of every palette
+        color, or the transparent color of RGB images). Empty if there is
+        no tRNS chunk.
+
+    Returns
+    -------
+    bytes
+        a byte array with the PNG image.
+
+    Raises
+    ------
+    ValueError
+        If the image size doesn't match the data size or the palette is
+        missing.
+
+    """
+    if color_type not in BYTES_PER_PIXEL:
+        raise ValueError("Unsupported PNG color type (%s)"%(color_type))
+
+    if width <= 0 or height <= 0:
+        raise ValueError("Wrong image size (%sx%s)"%(width, height))
+
+    row_size = width * BYTES_PER_PIXEL[color_type]
+    if len(data) != row_size * height:
+        raise ValueError("Wrong image data size (%s != %s)"%(
+            len(data), row_size * height))
+
+    if color_type == COLOR_TYPE_INDEXED and len(palette) == 0:
+        raise ValueError("Indexed PNG images need a palette")
+
+    # Every row starts with the filter type (none)
+    rows: List[bytes] = []
+    view = memoryview(data)
+    for y in range(0, height):
+        rows.append(b'\x00')
+        rows.append(view[y*row_size:(y+1)*row_size])
+
+    chunks: List[bytes] = [PNG_SIGNATURE,
+                           png_chunk(b'IHDR', struct.pack('>IIBBBBB', width,
+                                                          height, 8,
+                                                          color_type, 0, 0,
+                                                          0))]
+    if len(palette) > 0:
+        chunks.append(png_chunk(b'PLTE', bytes(palette)))
+
+    if len(transparency) > 0:
+        chunks.append(png_chunk(b'tRNS', bytes(transparency)))
+
+    chunks.append(png_chunk(b'IDAT', zlib.compress(b''.join(rows))))
+    chunks.append(png_chunk(b'IEND', b''))
+
+    return b''.join(chunks)
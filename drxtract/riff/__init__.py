@@ -2,11 +2,15 @@
 # E-mail: system252001@yahoo.es
 # License: GNU GPL v2 (see LICENSE file for details).
 
-from .riff_chunk import parse_chunk_id, Chunk
-from .riff import RiffData, parse_riff, find_riff_in_exe
+from .riff_chunk import parse_chunk_id, decode_chunk_id, Chunk
+from .riff import RiffData, parse_riff, find_riff_in_exe, find_riffs_in_exe, \
+    EmbeddedRiff, get_riff_byte_order
 from .imap import InputMAP, parse_imap
 from .mmap import MemoryMAP, parse_mmap, MMapResource
+from .file_operations import map_file, parse_riff_file, open_riff_file, \
+    RiffFileReader, copy_range, detect_byte_order, count_movies
 
-__all__ = ['parse_chunk_id', 'Chunk', 'RiffData', 'parse_riff',
+__all__ = ['parse_chunk_id', 'decode_chunk_id', 'Chunk', 'RiffData', 'parse_riff',
            'InputMAP', 'parse_imap', 'MemoryMAP', 'parse_mmap',
-           'MMapResource', 'find_riff_in_exe']
+           'MMapResource', 'find_riff_in_exe', 'find_riffs_in_exe',
+           'EmbeddedRiff', 'get_riff_byte_order']
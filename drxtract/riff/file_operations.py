@@ -0,0 +1,394 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+import os
+import mmap
+import errno
+import struct
+import logging
+from typing import BinaryIO, List, Callable
+from ..lingosrc.util import vsprintf
+from .riff_chunk import Chunk, parse_chunk_id
+from .imap import InputMAP, parse_imap
+from .mmap import MemoryMAP, MMapResource, parse_mmap
+from .riff import RiffData, EmbeddedRiff, parse_riff, find_riff_in_exe, \
+    find_riffs_in_exe, get_riff_byte_order, RIFX_FILE_FORMAT, \
+    MV93_FILE_TYPE, IMAP_FILE_FORMAT, MMAP_FILE_FORMAT
+
+#
+# Map a file into memory
+# 
+# =============================================================================
+def map_file(file_path: str) -> mmap.mmap:
+    """
+    Map a file into memory (read only access).
+    
+    Parameters
+    ----------
+    file_path : str
+        The path to the file to map.
+        
+    Returns
+    -------
+    mmap
+        a memory mapped file object.
+        
+    Raises
+    ------
+    ValueError
+        If the file is empty.
+        
+    """
+    with open(file_path, mode='rb') as file:
+        # The map remains valid after closing the file
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+# Errors that mean "this copy method can't be used with these files"
+UNSUPPORTED_COPY_ERRNOS = tuple(
+    getattr(errno, name) for name in ('ENOSYS', 'EXDEV', 'EINVAL', 'EBADF',
+                                      'EOPNOTSUPP', 'ENOTSUP', 'ENOTSOCK',
+                                      'EPERM')
+    if hasattr(errno, name))
+
+# Size of the buffer used when the kernel can't copy the data
+COPY_BUFFER_SIZE = 1024 * 1024
+
+def _copy_loop(copy: Callable[[int, int], int], offset: int,
+               length: int) -> int:
+    copied: int = 0
+    try:
+        while copied < length:
+            n: int = copy(offset + copied, length - copied)
+            if n <= 0:
+                # End of the source file
+                break
+            copied += n
+    
+    except OSError as e:
+        if e.errno not in UNSUPPORTED_COPY_ERRNOS:
+            raise
+    
+    return copied
+
+def _copy_file_range(src_fd: int, dst_fd: int, offset: int,
+                     length: int) -> int:
+    if not hasattr(os, 'copy_file_range'):
+        return 0
+    
+    return _copy_loop(lambda pos, size: os.copy_file_range(
+        src_fd, dst_fd, size, pos), offset, length)
+
+def _sendfile(src_fd: int, dst_fd: int, offset: int, length: int) -> int:
+    if not hasattr(os, 'sendfile'):
+        return 0
+    
+    return _copy_loop(lambda pos, size: os.sendfile(
+        dst_fd, src_fd, pos, size), offset, length)
+
+def _copy_buffered(src_fd: int, dst_fd: int, offset: int,
+                   length: int) -> int:
+    if not hasattr(os, 'pread'):
+        return 0
+    
+    def copy(pos: int, size: int) -> int:
+        buffer: bytes = os.pread(src_fd, min(size, COPY_BUFFER_SIZE), pos)
+        view: memoryview = memoryview(buffer)
+        while len(view) > 0:
+            view = view[os.write(dst_fd, view):]
+        return len(buffer)
+    
+    return _copy_loop(copy, offset, length)
+
+#
+# Copy a range of bytes from a file to other file
+# 
+# =============================================================================
+def copy_range(src_fd: int, dst_fd: int, offset: int, length: int) -> int:
+    """
+    Copy a range of bytes from a file into the current position of other
+    file. The data is copied by the kernel (copy_file_range or sendfile)
+    when the platform and the file systems allow it, otherwise it is copied
+    by using a buffer.
+    The current position of the source file is not modified, so the same
+    source file can be used by several threads at the same time.
+    
+    Parameters
+    ----------
+    src_fd : int
+        The file descriptor of the source file.
+    dst_fd : int
+        The file descriptor of the destination file.
+    offset : int
+        Position of the data inside the source file.
+    length : int
+        Number of bytes to copy.
+        
+    Returns
+    -------
+    int
+        the number of bytes copied (less than length when the source
+        file is shorter than expected or the platform doesn't support
+        any of the copy methods).
+        
+    """
+    copied: int = 0
+    for copy in (_copy_file_range, _sendfile, _copy_buffered):
+        copied += copy(src_fd, dst_fd, offset + copied, length - copied)
+        if copied >= length:
+            break
+    
+    return copied
+
+#
+# Detect the byte order of a RIFF file
+# 
+# =============================================================================
+def detect_byte_order(riff_file: str, movie: int = 0) -> str:
+    """
+    Detect the byte order of a RIFF file (or a movie of a projector EXE
+    file) from its header.
+    
+    Parameters
+    ----------
+    riff_file : str
+        The path to the RIFF file.
+    movie: int
+        The number of the movie inside a projector EXE file (starting at 0).
+        
+    Returns
+    -------
+    str
+        Python's struct module byte order.
+        
+    Raises
+    ------
+    TypeError
+        If the file doesn't contain RIFF data.
+        
+    """
+    content: mmap.mmap = map_file(riff_file)
+    try:
+        if riff_file.upper().endswith('.EXE'):
+            riffs: List[EmbeddedRiff] = find_riffs_in_exe(content)
+            if len(riffs) <= movie:
+                raise TypeError("There is no RIFF data in the EXE file")
+            return riffs[movie].byte_order
+        
+        return get_riff_byte_order(content)
+    
+    finally:
+        content.close()
+
+#
+# Count the movies of a RIFF file
+# 
+# =============================================================================
+def count_movies(riff_file: str) -> int:
+    """
+    Returns the number of movies of a projector EXE file (1 for any other
+    file).
+    
+    Parameters
+    ----------
+    riff_file : str
+        The path to the RIFF file.
+        
+    Returns
+    -------
+    int
+        The number of movies.
+        
+    """
+    if not riff_file.upper().endswith('.EXE'):
+        return 1
+    
+    with map_file(riff_file) as content:
+        return len(find_riffs_in_exe(content))
+
+#
+# Parse RIFF file
+# 
+# =============================================================================
+def parse_riff_file(riff_file: str, byte_order: str,
+                    movie: int = 0) -> RiffData:
+    """
+    Parse a RIFF file (or a projector EXE file) without reading it into
+    memory. The file is memory mapped and the chunks only reference it, so
+    the chunk data is read from the file when it is needed.
+    
+    Parameters
+    ----------
+    riff_file : str
+        The path to the RIFF file to parse.
+    byte_order: str
+        Python's struct module byte order.
+    movie: int
+        The number of the movie inside a projector EXE file (starting at 0).
+        
+    Returns
+    -------
+    RiffData
+        an object that contains the data.
+        
+    Raises
+    ------
+    ValueError
+        If some field inside the file is not compliant with the expected
+        file structure.
+        
+    """
+    content: mmap.mmap = map_file(riff_file)
+    if riff_file.upper().endswith('.EXE'):
+        # Find the DRX headers inside the EXE file (every movie is parsed
+        # up to its end, not into the movies after it)
+        riffs: List[EmbeddedRiff] = find_riffs_in_exe(content)
+        if movie < len(riffs):
+            return parse_riff(content, riffs[movie].offset, byte_order, True,
+                              riffs[movie].size)
+        
+        if movie > 0:
+            content.close()
+            raise ValueError(vsprintf("There is no movie %d in the EXE file",
+                                      movie + 1))
+    
+    return parse_riff(content, 0, byte_order, True)
+
+#
+# RIFF file reader class
+# 
+# =============================================================================
+class RiffFileReader:
+    """This class reads the chunks of a RIFF file on demand. Only the input
+    map and the memory map are read when the file is opened, any other chunk
+    is read (by seeking to its offset) when it is requested."""
+    
+    def __init__(self, file: BinaryIO, byte_order: str, offset: int = 0):
+        self.file: BinaryIO = file
+        self.byte_order: str = byte_order
+        
+        self.offset: int = offset
+        """Offset to the RIFF data (> 0 in case of EXE file)"""
+        
+        header: bytes = self._read(offset, 12)
+        if len(header) < 12:
+            raise ValueError("Unexpected end of file!")
+        
+        file_format: str = parse_chunk_id(header, 0, byte_order)
+        if RIFX_FILE_FORMAT != file_format:
+            raise TypeError(vsprintf("File format is not %s",
+                                     RIFX_FILE_FORMAT))
+        
+        mv93_format: str = parse_chunk_id(header, 8, byte_order)
+        if MV93_FILE_TYPE != mv93_format:
+            raise TypeError(vsprintf("Data format is not %s",
+                                     MV93_FILE_TYPE))
+        
+        # The input map is the first chunk
+        chunk: Chunk = self.read_chunk(offset + 12)
+        if IMAP_FILE_FORMAT != chunk.identifier:
+            raise ValueError("Coudn't locate the IMAP file!")
+        self.imap: InputMAP = parse_imap(chunk.data, byte_order)
+        
+        # The input map knows where the memory map is
+        chunk = self.read_chunk(self.imap.offset)
+        if MMAP_FILE_FORMAT != chunk.identifier:
+            raise ValueError("Coudn't locate the MMAP file!")
+        self.mmap: MemoryMAP = parse_mmap(chunk.data, byte_order)
+
+    def _read(self, position: int, length: int) -> bytes:
+        self.file.seek(position)
+        return self.file.read(length)
+
+    def read_chunk(self, position: int) -> Chunk:
+        """Reads the chunk that starts at the given file position"""
+        header: bytes = self._read(position, 8)
+        if len(header) < 8:
+            raise IndexError('Offset not found')
+        
+        identifier: str = parse_chunk_id(header, 0, self.byte_order)
+        size: int = struct.unpack(self.byte_order+"i", header[4:8])[0]
+        logging.debug("Read %s chunk (%d bytes) at %d", identifier, size,
+                      position)
+        
+        return Chunk(identifier, self.file.read(max(0, size)))
+
+    def find_resources(self, chunkID: str) -> List[int]:
+        """Returns the IDs of the resources of the given type"""
+        ids: List[int] = []
+        for i in range(0, len(self.mmap.resources)):
+            if self.mmap.resources[i].chunkID == chunkID:
+                ids.append(i)
+        
+        return ids
+
+    def get_by_resource_id(self, resource_id: int) -> Chunk:
+        """Reads the chunk of a memory map resource"""
+        if resource_id < 0 or resource_id >= len(self.mmap.resources):
+            raise IndexError('Resource not found')
+        
+        resource: MMapResource = self.mmap.resources[resource_id]
+        chunk: Chunk = self.read_chunk(resource.offset)
+        if resource.chunkID != chunk.identifier:
+            raise ValueError(vsprintf("Wrong resource ID (%s != %s)",
+                                      resource.chunkID, chunk.identifier))
+        
+        return chunk
+
+    def get_by_chunk_id(self, chunkID: str) -> Chunk:
+        """Reads the chunk of the first resource of the given type"""
+        ids: List[int] = self.find_resources(chunkID)
+        if len(ids) == 0:
+            raise ValueError("Couldn't locate the resource with Chunk ID: "
+                             + chunkID)
+        
+        return self.get_by_resource_id(ids[0])
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+#
+# Open RIFF file
+# 
+# =============================================================================
+def open_riff_file(riff_file: str, byte_order: str) -> RiffFileReader:
+    """
+    Open a RIFF file (or a projector EXE file) to read its chunks on demand.
+    
+    Parameters
+    ----------
+    riff_file : str
+        The path to the RIFF file to open.
+    byte_order: str
+        Python's struct module byte order.
+        
+    Returns
+    -------
+    RiffFileReader
+        an object that reads the chunks from the file.
+        
+    Raises
+    ------
+    ValueError
+        If some field inside the file is not compliant with the expected
+        file structure.
+        
+    """
+    rifx_offset: int = 0
+    if riff_file.upper().endswith('.EXE'):
+        # Try to find DRX header inside the EXE file
+        with map_file(riff_file) as content:
+            rifx_offset = find_riff_in_exe(content)
+    
+    file: BinaryIO = open(riff_file, mode='rb')
+    try:
+        return RiffFileReader(file, byte_order, rifx_offset)
+    except Exception:
+        file.close()
+        raise
@@ -2,10 +2,17 @@
 # E-mail: system252001@yahoo.es
 # License: GNU GPL v2 (see LICENSE file for details).
 
-import struct
 import logging
-from typing import List
-from .riff_chunk import parse_chunk_id
+from typing import List, Tuple
+from .riff_chunk import decode_chunk_id
+from ..lingosrc.util import is_debug_enabled, RecordLayout
+
+# Memory MAP header
+MMAP_HEADER = RecordLayout("hhiiiii")
+
+# Memory MAP resource record (chunkID, size, offset, flags, unused and
+# nextResourceID)
+MMAP_RESOURCE = RecordLayout("4siihhi")
 
 #
 # Memory MAP resource class
@@ -14,6 +21,9 @@ from .riff_chunk import parse_chunk_id
 class MMapResource:
     """This class represents a Director File Memory MAP Resource"""
     
+    __slots__ = ('chunkID', 'size', 'offset', 'flags', 'unused',
+                 'nextResourceID')
+    
     def __init__(self, chunkID: str, size: int, offset: int, flags: int,
                  unused: int, nextResourceID: int):
         self.chunkID: str = chunkID
@@ -68,26 +78,30 @@ def parse_mmap_resource(fdata: bytes, offset: int, byte_order: str
         
         
     """
-    logging.debug("--------------------------")
-    chunkID: str = parse_chunk_id(fdata, offset, byte_order)
-    logging.debug("chunkID: %s", chunkID)
+    return new_mmap_resource(MMAP_RESOURCE.unpack_from(byte_order, fdata,
+                                                       offset),
+                             byte_order, is_debug_enabled())
 
-    size: int = struct.unpack(byte_order+"i", fdata[(offset+4):(offset+8)])[0]
-    logging.debug("size: %s", size)
-
-    off: int = struct.unpack(byte_order+"i", fdata[(offset+8):(offset+12)])[0]
-    logging.debug("offset: %s", off)   
-    
-    flag: int = struct.unpack(byte_order+"h", fdata[(offset+12):(offset+14)])[0]
-    logging.debug("flags: %s", flag)  
-
-    unus: int = struct.unpack(byte_order+"h", fdata[(offset+14):(offset+16)])[0]
-    logging.debug("unused: %s", unus)  
+#
+# Create a Memory MAP resource from the fields of its record
+# 
+# =============================================================================
+def new_mmap_resource(fields: Tuple, byte_order: str,
+                      debug: bool) -> MMapResource:
+    """Returns the MMapResource of the fields of a resource record"""
+    resource = MMapResource(decode_chunk_id(fields[0], byte_order), fields[1],
+                            fields[2], fields[3], fields[4], fields[5])
     
-    nrID: int = struct.unpack(byte_order+"i", fdata[(offset+16):(offset+20)])[0]
-    logging.debug("nextResourceID: %s", nrID)  
+    if debug:
+        logging.debug("--------------------------")
+        logging.debug("chunkID: %s", resource.chunkID)
+        logging.debug("size: %s", resource.size)
+        logging.debug("offset: %s", resource.offset)
+        logging.debug("flags: %s", resource.flags)
+        logging.debug("unused: %s", resource.unused)
+        logging.debug("nextResourceID: %s", resource.nextResourceID)
     
-    return MMapResource(chunkID, size, off, flag, unus, nrID)
+    return resource
 
 #
 # Parse a Memory MAP file data
@@ -113,7 +127,7 @@ def parse_mmap(fdata: bytes, byte_order: str) -> MemoryMAP:
     """
     logging.debug("==================================")
     logging.debug(" Parse memory map: %d bytes", len(fdata))
-    content = struct.unpack(byte_order+"hhiiiii", fdata[0:24])
+    content = MMAP_HEADER.unpack_from(byte_order, fdata)
     logging.debug("MMAP[0] Property size: %s", content[0])
     logging.debug("MMAP[1] Resource size: %s", content[1])
     logging.debug("MMAP[2] Max resources count: %d", content[2])
@@ -125,11 +139,12 @@ def parse_mmap(fdata: bytes, byte_order: str) -> MemoryMAP:
     mmap = MemoryMAP(content[0], content[1], content[2], content[3],
                      content[4], content[5], content[6])
     
-    offset = 24
-    for _ in range(0, mmap.usedResourceCount):
-        resource = parse_mmap_resource(fdata, offset, byte_order)
-        mmap.resources.append(resource)
-        offset += 20
+    # The resource records follow the header
+    debug: bool = is_debug_enabled()
+    for fields in MMAP_RESOURCE.iter_unpack(byte_order, fdata,
+                                            MMAP_HEADER.size,
+                                            mmap.usedResourceCount):
+        mmap.resources.append(new_mmap_resource(fields, byte_order, debug))
     
     return mmap
 
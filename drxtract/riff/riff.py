@@ -4,9 +4,11 @@
 
 import struct
 import logging
-from typing import List
+from typing import List, Dict, Optional
 from .riff_chunk import parse_chunk, Chunk, parse_chunk_id
-from ..lingosrc.util import vsprintf
+from .imap import InputMAP, parse_imap
+from .mmap import MemoryMAP, parse_mmap
+from ..lingosrc.util import vsprintf, get_keys
 
 MV93_FILE_TYPE = 'MV93'
 RIFX_FILE_FORMAT = 'RIFX'
@@ -18,6 +20,8 @@ JUNK_FILE_FORMAT = 'junk'
 RIFX_LE_HEADER = 'XFIR'
 MV93_LE_HEADER = '39VM'
 
+PE_SIGNATURE = 'PE'.encode('ascii') + bytes(2)
+
 #
 # RIFF data class
 # 
@@ -28,22 +32,52 @@ class RiffData:
     def __init__(self, byte_order: str):
         self.byte_order: str = byte_order
         self.chunks : List[Chunk] = []
+        
+        self.offset: int = 0
+        """Offset to the RIFF data (> 0 in case of EXE file)"""
+        
+        self.offsets: Dict[int, Chunk] = {}
+        """Chunks indexed by its offset (relative to the RIFF start)"""
+        
+        self.resources: Dict[int, Chunk] = {}
+        """Chunks indexed by its memory map resource ID"""
+        
+        self.imap: Optional[InputMAP] = None
+        """Input map (if any)"""
+        
+        self.mmap: Optional[MemoryMAP] = None
+        """Memory map (if any)"""
+
+    def add_chunk(self, chunk: Chunk, offset: int):
+        self.chunks.append(chunk)
+        self.offsets[offset] = chunk
 
     def get_by_offset(self, offset: int) -> Chunk:
-        index: int = 12
-        for c in self.chunks:
-            if index == offset:
-                return c
-            l = len(c.data)
-            index += 8 + l + (l%2)
+        if offset in get_keys(self.offsets):
+            return self.offsets[offset]
             
         raise IndexError('Offset not found')
 
+    def index_resources(self, mmap: MemoryMAP, rifx_offset: int):
+        self.mmap = mmap
+        self.resources = {}
+        for i in range(0, len(mmap.resources)):
+            offset = mmap.resources[i].offset - rifx_offset
+            if offset in get_keys(self.offsets):
+                self.resources[i] = self.offsets[offset]
+
+    def get_by_resource_id(self, resource_id: int) -> Chunk:
+        if resource_id in get_keys(self.resources):
+            return self.resources[resource_id]
+            
+        raise IndexError('Resource not found')
+
 #
 # Parse Input MAP file data
 # 
 # =============================================================================
-def parse_riff(fdata: bytes, offset: int, byte_order: str) -> RiffData:
+def parse_riff(fdata: bytes, offset: int, byte_order: str,
+               lazy: bool = False, size: int = -1) -> RiffData:
     """
     Parse a RIFF file data and return its content.
     
@@ -55,6 +89,12 @@ def parse_riff(fdata: bytes, offset: int, byte_order: str) -> RiffData:
         Offset to the RIFF file (> 0 in case of EXE file).
     byte_order: str
         Python's struct module byte order.
+    lazy: bool
+        If True the chunks keep a reference to fdata instead of a copy
+        of their data (see parse_chunk).
+    size: int
+        Size of the RIFF data (including the header) when fdata contains
+        more data after it (i.e. several movies inside an EXE file).
         
     Returns
     -------
@@ -79,7 +119,10 @@ def parse_riff(fdata: bytes, offset: int, byte_order: str) -> RiffData:
     file_length = struct.unpack(byte_order+"i", fdata[offset+4:offset+8])[0]
     logging.info(" File contains %s bytes of information.", file_length)
     
-    if len(fdata) != file_length + 8 + offset:
+    end: int = len(fdata)
+    if size > 0:
+        end = min(end, offset + size)
+    elif len(fdata) != file_length + 8 + offset:
         logging.warning(" Using %d as file length", len(fdata))
     
     # Check Macromedia Director MV93 header
@@ -91,15 +134,211 @@ def parse_riff(fdata: bytes, offset: int, byte_order: str) -> RiffData:
         raise TypeError(err)
     
     riffData : RiffData = RiffData(byte_order)
+    riffData.offset = offset
     index = offset + 12
-    while index < len(fdata):
-        chunk: Chunk = parse_chunk(fdata, index, byte_order)
-        riffData.chunks.append(chunk)
-        padding = (len(chunk.data) % 2)
-        index = index + 8 + len(chunk.data) + padding
+    while index < end:
+        chunk: Chunk = parse_chunk(fdata, index, byte_order, lazy, end)
+        riffData.add_chunk(chunk, index - offset)
+        padding = (chunk.length % 2)
+        index = index + 8 + chunk.length + padding
+    
+    # Index the memory map resources (when possible)
+    if (len(riffData.chunks) > 0 and
+        riffData.chunks[0].identifier == IMAP_FILE_FORMAT):
+        imap: InputMAP = parse_imap(riffData.chunks[0].data, byte_order)
+        riffData.imap = imap
+        mmap_offset = imap.offset - offset
+        if (mmap_offset in get_keys(riffData.offsets) and
+            riffData.offsets[mmap_offset].identifier == MMAP_FILE_FORMAT):
+            mmap: MemoryMAP = parse_mmap(riffData.offsets[mmap_offset].data,
+                                         byte_order)
+            riffData.index_resources(mmap, offset)
+        else:
+            logging.warning(" Couldn't locate the memory map")
     
     return riffData
 
+#
+# Embedded RIFF data class
+# 
+# =============================================================================
+class EmbeddedRiff:
+    """This class represents a RIFF file embedded inside an EXE file"""
+    
+    def __init__(self, offset: int, size: int, byte_order: str):
+        self.offset: int = offset
+        """Offset to the RIFF data"""
+        
+        self.size: int = size
+        """Size of the RIFF data (including the RIFF header)"""
+        
+        self.byte_order: str = byte_order
+        """Python's struct module byte order"""
+
+#
+# Get the offset to the data appended to a Windows PE file
+# 
+# =============================================================================
+def get_exe_overlay_offset(content: bytes) -> int:
+    """
+    Parse the section table of a Windows PE file and return the offset to the
+    data appended after the last section (the overlay), that is where the
+    projectors store the movies.
+    
+    Parameters
+    ----------
+    content : bytes
+        The bytes in the EXE file.
+        
+    Returns
+    -------
+    int
+        the offset to the overlay or 0 if it is not a PE file.
+        
+    """
+    if (len(content) < 64 or
+        content[0:2].decode('ascii', errors="replace") != 'MZ'):
+        return 0
+    
+    pe_offset: int = struct.unpack("<i", content[60:64])[0]
+    if (pe_offset <= 0 or pe_offset + 24 > len(content) or
+        content[pe_offset:pe_offset+4] != PE_SIGNATURE):
+        # Not a PE file (maybe a 16 bits NE file)
+        return 0
+    
+    nsections: int = struct.unpack("<H", content[pe_offset+6:pe_offset+8])[0]
+    opt_size: int = struct.unpack("<H", content[pe_offset+20:pe_offset+22])[0]
+    index: int = pe_offset + 24 + opt_size
+    overlay_offset: int = 0
+    for _ in range(0, nsections):
+        if index + 40 > len(content):
+            break
+        
+        raw_size, raw_pointer = struct.unpack("<II", content[index+16:index+24])
+        overlay_offset = max(overlay_offset, raw_pointer + raw_size)
+        index += 40
+    
+    if overlay_offset > len(content):
+        return 0
+    
+    logging.debug("PE overlay offset: %d", overlay_offset)
+    return overlay_offset
+
+#
+# Finds all the RIFF data inside a Windows EXE file
+# 
+# =============================================================================
+def find_riffs_in_exe(content: bytes, use_overlay: bool = True
+                      ) -> List[EmbeddedRiff]:
+    """
+    Scan a Windows EXE file and return all the RIFF data structures inside it.
+    The file is scanned only once (the content is never copied), so it can be
+    a mmap object.
+    
+    Parameters
+    ----------
+    content : bytes
+        The bytes in the EXE file.
+    use_overlay : bool
+        If True and it is a PE file, the scan starts in the data appended to
+        the executable (and falls back to a full scan if nothing is found).
+        
+    Returns
+    -------
+    List[EmbeddedRiff]
+        the RIFF data structures found in the file.
+        
+    """
+    start: int = 0
+    if use_overlay:
+        start = get_exe_overlay_offset(content)
+    
+    # RIFF header, data format and byte order
+    headers = [
+        (RIFX_LE_HEADER.encode('ascii'), MV93_LE_HEADER, '<'),
+        (RIFX_FILE_FORMAT.encode('ascii'), MV93_FILE_TYPE, '>')
+    ]
+    
+    riffs: List[EmbeddedRiff] = []
+    next_hit: List[int] = [-1, -1]
+    index: int = start
+    while index < len(content):
+        # Find the nearest RIFF header
+        nearest: int = -1
+        for i in range(0, len(headers)):
+            if next_hit[i] != -2 and next_hit[i] < index:
+                next_hit[i] = content.find(headers[i][0], index)
+                if next_hit[i] < 0:
+                    # There are no more headers of this type
+                    next_hit[i] = -2
+            
+            if next_hit[i] >= 0 and (nearest < 0 or
+                                     next_hit[i] < next_hit[nearest]):
+                nearest = i
+        
+        if nearest < 0:
+            break
+        
+        hit: int = next_hit[nearest]
+        data_format: str = content[hit+8:hit+12].decode('ascii',
+                                                        errors="replace")
+        if data_format != headers[nearest][1]:
+            # False positive
+            index = hit + 4
+            continue
+        
+        byte_order: str = headers[nearest][2]
+        size: int = struct.unpack(byte_order+"i", content[hit+4:hit+8])[0] + 8
+        if size <= 12 or hit + size > len(content):
+            logging.warning("Bad RIFF data size (%d) at %d", size, hit)
+            size = len(content) - hit
+        
+        logging.info("RIFF data found at %d (%d bytes)", hit, size)
+        riffs.append(EmbeddedRiff(hit, size, byte_order))
+        index = hit + size
+    
+    if len(riffs) == 0 and start > 0:
+        logging.warning("No RIFF data in the overlay, scanning the whole file")
+        return find_riffs_in_exe(content, False)
+    
+    return riffs
+
+#
+# Get the byte order of a RIFF file from its header
+# 
+# =============================================================================
+def get_riff_byte_order(content: bytes, offset: int = 0) -> str:
+    """
+    Check the header of a RIFF file and return its byte order ('RIFX' for
+    big endian files and 'XFIR' for little endian files).
+    
+    Parameters
+    ----------
+    content : bytes
+        The bytes in the file.
+    offset : int
+        The offset to the RIFF data.
+        
+    Returns
+    -------
+    str
+        Python's struct module byte order.
+        
+    Raises
+    ------
+    TypeError
+        If the data doesn't start with a RIFF header.
+        
+    """
+    header: bytes = bytes(content[offset:offset+4])
+    if header == RIFX_FILE_FORMAT.encode('ascii'):
+        return '>'
+    
+    if header == RIFX_LE_HEADER.encode('ascii'):
+        return '<'
+    
+    raise TypeError(vsprintf("File format is not %s", RIFX_FILE_FORMAT))
+
 #
 # Tries to find the RIFF start offset inside a Windows EXE file
 # 
@@ -120,17 +359,9 @@ def find_riff_in_exe(content: bytes) -> int:
         
     """
     rifx_offset: int = 0
-    index: int = content.find(RIFX_LE_HEADER.encode('ascii'))
-    found: bool = False
-    while index >= 0 and not found:
-        rifx_offset += index
-        content = content[index:]
-        if content[8:12].decode('ascii', errors="replace") == MV93_LE_HEADER:
-            found = True
-        else:
-            content = content[4:]
-            rifx_offset += 4
-            index = content.find(RIFX_LE_HEADER.encode('ascii'))
+    riffs: List[EmbeddedRiff] = find_riffs_in_exe(content)
+    if len(riffs) > 0:
+        rifx_offset = riffs[0].offset
     logging.info("Use %s as RIFX index inside EXE", rifx_offset)
     
     return rifx_offset
@@ -4,6 +4,7 @@
 
 import struct
 import logging
+from typing import Any, Optional
 
 #
 # RIFF chunk class
@@ -13,9 +14,42 @@ import logging
 class Chunk:
     """This class represents a RIFF chunk"""
     
-    def __init__(self, identifier: str, data: bytes):
+    def __init__(self, identifier: str, data: bytes, source: Any = None,
+                 position: int = 0, length: int = 0):
         self.identifier: str = identifier
-        self.data: bytes = data
+        
+        self.source: Any = source
+        """Buffer that contains the chunk data (lazy chunks only)"""
+        
+        self.position: int = position
+        """Position of the chunk data inside the source buffer"""
+        
+        self.length: int = length
+        """Length of the chunk data"""
+        
+        self._data: Optional[bytes] = data
+        if source is None:
+            self.length = len(data)
+        else:
+            self._data = None
+
+    @property
+    def data(self) -> bytes:
+        """The chunk data (lazy chunks copy it from the source the first
+        time, use view() to read it without copying)"""
+        if self._data is None:
+            self._data = bytes(self.source[self.position:(self.position +
+                                                          self.length)])
+        
+        return self._data
+
+    def view(self) -> memoryview:
+        """Returns a read only view of the chunk data (without copying it)"""
+        if self.source is None:
+            return memoryview(self._data).toreadonly()
+        
+        return memoryview(self.source).toreadonly()[
+            self.position:(self.position + self.length)]
 
 
 #
@@ -43,8 +77,38 @@ def parse_chunk_id(riff_data: bytes, position: int, byte_order: str) -> str:
         
         
     """
-    index: int = position
-    block_type = struct.unpack("cccc", riff_data[index:(index+4)])
+    return decode_chunk_id(riff_data[position:(position+4)], byte_order)
+
+#
+# Decode ASCII identifier
+# 
+# =============================================================================
+def decode_chunk_id(block_type: bytes, byte_order: str) -> str:
+    """
+    Decode the 4 bytes of a RIFF file chunk ASCII identifier (i.e. a field
+    of a record unpacked with the "4s" format) as printable ASCII chars.
+    
+    Parameters
+    ----------
+    block_type : bytes
+        The 4 bytes of the identifier.
+    byte_order : str
+        Python's struct module byte order.
+        
+    Returns
+    -------
+    str
+        a 4 ASCII chars ID.
+        
+    Raises
+    ------
+    ValueError
+        If there are not 4 bytes.
+        
+    """
+    if len(block_type) != 4:
+        raise ValueError("Wrong chunk ID length!")
+    
     identifier: str = ''
     start = 0
     stop = 4
@@ -56,7 +120,7 @@ def parse_chunk_id(riff_data: bytes, position: int, byte_order: str) -> str:
         
     i = start
     while i != stop:
-        c = block_type[i].decode('ascii')
+        c = block_type[i:(i+1)].decode('ascii')
         if c >= ' ' and c <= 'z':
             identifier = identifier + c
         else:
@@ -70,7 +134,8 @@ def parse_chunk_id(riff_data: bytes, position: int, byte_order: str) -> str:
 # Parse RIFF chunk
 # 
 # =============================================================================
-def parse_chunk(riff_data: bytes, position: int, byte_order: str) -> Chunk:
+def parse_chunk(riff_data: bytes, position: int, byte_order: str,
+                lazy: bool = False, end: int = -1) -> Chunk:
     """
     Parse a RIFF file chunk and return its content.
     
@@ -82,6 +147,12 @@ def parse_chunk(riff_data: bytes, position: int, byte_order: str) -> Chunk:
         The start position of the chunk to parse.
     byte_order : str
         Python's struct module byte order.
+    lazy : bool
+        If True the chunk data is not copied, the chunk only keeps a
+        reference to riff_data (that may be a mmap object).
+    end : int
+        The end of the RIFF data (-1 for the end of riff_data). The chunk
+        data is clipped to it.
         
     Returns
     -------
@@ -98,6 +169,14 @@ def parse_chunk(riff_data: bytes, position: int, byte_order: str) -> Chunk:
         (position+4):(position+8)])[0]
     logging.info(" Block size: %d", block_size)
 
+    # Do not read past the end of the data
+    if end < 0:
+        end = len(riff_data)
+    block_size = max(0, min(block_size, end - position - 8))
+    
+    if lazy:
+        return Chunk(bt, bytes(), riff_data, position + 8, block_size)
+    
     block_data : bytes = riff_data[(position+8):(position + 8 + block_size)]
     
     return Chunk(bt, block_data)
@@ -14,12 +14,14 @@ import sys
 import os
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from .lingosrc.util import vsprintf
-from .riff.riff import parse_riff, find_riff_in_exe, RiffData, Chunk
-from .riff.imap import InputMAP, parse_imap
-from .riff.mmap import MemoryMAP, parse_mmap
-
-logging.basicConfig(level=logging.DEBUG)
+from .riff.riff import RiffData, Chunk, EmbeddedRiff, parse_riff, \
+    find_riffs_in_exe
+from .riff.file_operations import parse_riff_file, map_file, copy_range
+from .riff.mmap import MemoryMAP
+from .options import pop_flag, pop_jobs, setup_logging
 
 # Save all blocks (for investigation purposes)
 SAVE_ALL_BLOCKS = False
@@ -41,18 +43,150 @@ JUNK_FILE_FORMAT = 'junk'
 CHUNKS_TO_IGNORE = (RIFX_FILE_FORMAT, IMAP_FILE_FORMAT, MMAP_FILE_FORMAT,
                     FREE_FILE_FORMAT, JUNK_FILE_FORMAT)
 
+#
+# Name of the file of a RIFF chunk
+# 
+# =============================================================================
+def chunk_file_name(number: int, chunkID: str) -> str:
+    file_name =  vsprintf("%s.%s", number, chunkID)
+    return re.sub(r"[^A-Za-z0-9\-_\.]", "_", file_name)
+
 #
 # Saves a RIFF chunk into a file in a folder
 # 
 # =============================================================================
-def save_chunk(chunk: Chunk, number: int, folder: str):
-    file_name =  vsprintf("%s.%s", number, chunk.identifier)
-    file_name = re.sub(r"[^A-Za-z0-9\-_\.]", "_", file_name)
+def save_chunk(chunk: Chunk, number: int, folder: str,
+               source_fd: Optional[int] = None):
+    file_name = chunk_file_name(number, chunk.identifier)
     logging.debug("FILE: Saving chunk content to: %s", file_name)
     
     with open(os.path.join(folder, file_name), 'wb') as file:
-        file.write(chunk.data)
-        file.close()
+        copied: int = 0
+        if source_fd is not None and chunk.source is not None:
+            # Let the kernel copy the data from the source file
+            copied = copy_range(source_fd, file.fileno(), chunk.position,
+                                chunk.length)
+        
+        if copied < chunk.length:
+            file.write(chunk.view()[copied:])
+
+#
+# Saves the RIFF chunks referenced by the memory map into a folder
+# 
+# =============================================================================
+def extract_riff(riffData: RiffData, folder: str,
+                 source_fd: Optional[int] = None) -> int:
+    """
+    Save the chunks of a RIFF file into a folder.
+    
+    Parameters
+    ----------
+    riffData : RiffData
+        The RIFF data.
+    folder: str
+        The output folder.
+    source_fd: Optional[int]
+        File descriptor of the file memory mapped by riffData. When it is
+        provided the chunks are copied from that file to the output files
+        without reading them into memory.
+        
+    Returns
+    -------
+    int
+        the number of saved chunks.
+
+    Raises
+    ------
+    ValueError
+        If some field inside the file is not compliant with the expected
+        file structure. 
+        
+    """
+    nchunks: int = 0
+    if SAVE_ALL_BLOCKS:
+        for i in range(0, len(riffData.chunks)):
+            chunk: Chunk = riffData.chunks[i]
+            save_chunk(chunk, i+1, folder, source_fd)
+            nchunks += 1
+        
+        return nchunks
+    
+    # The imap and mmap blocks are parsed with the RIFF data
+    if riffData.imap is None:
+        raise ValueError(vsprintf("The first chunk is not an IMAP chunk: %s",
+                                  riffData.chunks[0].identifier))
+    
+    if riffData.mmap is None:
+        raise ValueError("Wrong MMAP location!")
+
+    mmap: MemoryMAP = riffData.mmap
+    idx = -1
+    for resource in mmap.resources:
+        idx += 1
+        if ((resource.chunkID in CHUNKS_TO_IGNORE) or
+            (resource.size <= 0)):
+            continue
+        
+        chunk = riffData.get_by_resource_id(idx)
+        if resource.chunkID != chunk.identifier:
+            raise ValueError(vsprintf("Wrong resource ID (%s != %s)", 
+                                      resource.chunkID, chunk.identifier))
+        
+        save_chunk(chunk, idx, folder, source_fd)
+        nchunks += 1
+    
+    return nchunks
+
+#
+# Saves every movie inside a projector into its own folder
+# 
+# =============================================================================
+def extract_all_riffs(riff_file: str, directory: str, jobs: int) -> int:
+    """
+    Save the chunks of all the movies inside a file (i.e. a projector) into
+    <directory>/<movie number>/bin folders. The file is read only once.
+    
+    Parameters
+    ----------
+    riff_file : str
+        The path to the file.
+    directory: str
+        The output directory.
+    jobs: int
+        Number of movies extracted at the same time (0 means automatic).
+        
+    Returns
+    -------
+    int
+        the number of movies.
+
+    Raises
+    ------
+    ValueError
+        If some field inside the file is not compliant with the expected
+        file structure. 
+        
+    """
+    with map_file(riff_file) as content, open(riff_file, mode='rb') as source:
+        riffs: List[EmbeddedRiff] = find_riffs_in_exe(content)
+        logging.info("There are %d movies in %s", len(riffs), riff_file)
+        
+        def extract(number: int, riff: EmbeddedRiff) -> int:
+            folder: str = os.path.join(directory, str(number), BINDIR)
+            os.makedirs(folder, exist_ok=True)
+            riffData: RiffData = parse_riff(content, riff.offset,
+                                            riff.byte_order, True, riff.size)
+            return extract_riff(riffData, folder, source.fileno())
+        
+        with ThreadPoolExecutor(max_workers=(jobs if jobs > 0 else None)
+                                ) as executor:
+            futures = [executor.submit(extract, i + 1, riffs[i])
+                       for i in range(0, len(riffs))]
+            for i in range(0, len(futures)):
+                nchunks: int = futures[i].result()
+                logging.info("Movie %d: %d chunks saved", i + 1, nchunks)
+    
+    return len(riffs)
 
 #
 # Main method
@@ -61,8 +195,14 @@ def save_chunk(chunk: Chunk, number: int, folder: str):
 def main():
     global byte_order_type, byte_order
 
+    setup_logging()
+    all_movies: bool = pop_flag('--all')
+    jobs: int = pop_jobs('0')
+
     if len(sys.argv) < 4:
-        print("USAGE: riffxtract [pc|mac] <file.drx> <directory>")
+        print("USAGE: riffxtract [pc|mac] <file.drx> <directory>"
+              + " [--all [--jobs N]]"
+              + " [--log-level LEVEL]")
 
     else:
         if sys.argv[1] != 'pc' and sys.argv[1] != 'mac':
@@ -81,58 +221,29 @@ def main():
             logging.error("'%s' is not a directory", sys.argv[3])
             sys.exit(-1)
 
-        # Create bin directory (when necessary)
-        if not os.path.isdir(os.path.join(sys.argv[3], BINDIR)):
-            os.mkdir(os.path.join(sys.argv[3], BINDIR))
-
-        logging.debug("Try to parse %s file.", sys.argv[2])
-        riffData: RiffData = RiffData(byte_order)
-        rifx_offset: int = 0
-        with open(sys.argv[2], mode='rb') as file:
-            fileContent: bytes = file.read()
-            if sys.argv[2].upper().endswith('.EXE'):
-                # Try to find DRX header inside the EXE file
-                rifx_offset = find_riff_in_exe(fileContent)
+        try:
+            if all_movies:
+                # Every movie goes to <directory>/<movie number>/bin
+                if extract_all_riffs(sys.argv[2], sys.argv[3], jobs) == 0:
+                    logging.error("There are no movies in %s", sys.argv[2])
+                    sys.exit(-1)
+                return
             
-            riffData = parse_riff(fileContent, rifx_offset, byte_order)
-
-        output_folder: str = os.path.join(sys.argv[3], BINDIR)
-        if SAVE_ALL_BLOCKS:
-            for i in range(0, len(riffData.chunks)):
-                chunk: Chunk = riffData.chunks[i]
-                save_chunk(chunk, i+1, output_folder)
-                
-        else:
-            # Parse the imap block
-            chunk: Chunk = riffData.chunks[0]
-            if chunk.identifier != IMAP_FILE_FORMAT:
-                logging.error("The first chunk is not an IMAP chunk: %s",
-                              chunk.identifier)
-                sys.exit(-1)
+            # Create bin directory (when necessary)
+            if not os.path.isdir(os.path.join(sys.argv[3], BINDIR)):
+                os.mkdir(os.path.join(sys.argv[3], BINDIR))
+    
+            logging.debug("Try to parse %s file.", sys.argv[2])
+            # The file is memory mapped, chunks are read only when saved
+            riffData: RiffData = parse_riff_file(sys.argv[2], byte_order)
             
-            imap: InputMAP = parse_imap(chunk.data, byte_order)
-            chunk = riffData.get_by_offset(imap.offset - rifx_offset)
-            if chunk.identifier != MMAP_FILE_FORMAT:
-                logging.error("Wrong MMAP location!")
-                sys.exit(-1)
-
-            mmap: MemoryMAP = parse_mmap(chunk.data, byte_order)
-            idx = -1
-            for resource in mmap.resources:
-                idx += 1
-                if ((resource.chunkID in CHUNKS_TO_IGNORE) or
-                    (resource.size <= 0)):
-                    continue
-                
-                offset: int = resource.offset
-                chunk = riffData.get_by_offset(offset - rifx_offset)
-                if resource.chunkID != chunk.identifier:
-                    logging.error("Wrong resource ID (%s != %s)", 
-                                  resource.chunkID, chunk.identifier)
-                    sys.exit(-1)
-                
-                save_chunk(chunk, idx, output_folder)
-                
+            with open(sys.argv[2], mode='rb') as source:
+                extract_riff(riffData, os.path.join(sys.argv[3], BINDIR),
+                             source.fileno())
+        
+        except ValueError as e:
+            logging.error(str(e))
+            sys.exit(-1)
 
         
 if __name__ == '__main__':
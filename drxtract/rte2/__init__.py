@@ -0,0 +1,9 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+from .rte2 import parse_rte2_header, rte22bitmap, rte22bmp, \
+    rte2bitmap2bmp
+
+__all__ = ['parse_rte2_header', 'rte22bitmap', 'rte22bmp',
+           'rte2bitmap2bmp']
@@ -0,0 +1,205 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+import struct
+import logging
+from typing import Dict, Any
+from ..lingosrc.util import RecordLayout, repeat_byte, repeat_string, \
+    write_bytes
+from ..bitd import Bitmap
+from ..bitd.decoder4b import Decoder4b
+
+# RTE2 header: width, height, unknown0, bpp and unknown1 (big endian)
+RTE2_HEADER = RecordLayout("hhBBB")
+
+# Palette of the RTE2 images (only the last color is white)
+RTE2_PALETTE = (
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  0, 0, 0, 0,       # black
+  255, 255, 255, 0 # white
+ )
+
+# Palette index of the background
+WHITE = 15
+
+# The RTE2 images are 4 bits images (one palette index per byte)
+ENCODER = Decoder4b()
+
+#
+# Parses the header of a RTE2 file
+# =============================================================================
+def parse_rte2_header(fdata: bytes) -> Dict[str, Any]:
+    """
+    Parse the header of a RTE2 (rich text image) file.
+    
+    Parameters
+    ----------
+    fdata : bytes
+        The bytes in the RTE2 file.
+        
+    Returns
+    -------
+    Dict[str, Any]
+        The width, height and bpp of the image.
+
+    Raises
+    ------
+    ValueError
+        If the file is too short to contain the header.
+        
+    """
+    if len(fdata) < RTE2_HEADER.size:
+        raise ValueError("Bad RTE2 header length (%s)"%(len(fdata)))
+    
+    width, height, unknown0, bpp, unknown1 = RTE2_HEADER.unpack_from(
+        '>', fdata, 0)
+    logging.debug("width = %s", width)
+    logging.debug("height = %s", height)
+    logging.debug("unknown0 = %s", unknown0)
+    logging.debug("bpp = %s", bpp)
+    logging.debug("unknown1 = %s", unknown1)
+    
+    return {
+        'width': width,
+        'height': height,
+        'bpp': bpp
+    }
+
+#
+# Decodes the RTE2 data
+# =============================================================================
+def rte22bitmap(fdata: bytes) -> Bitmap:
+    """
+    Parse a RTE2 file and return its decoded pixels.
+    
+    Parameters
+    ----------
+    fdata : bytes
+        The bytes in the RTE2 file.
+        
+    Returns
+    -------
+    Bitmap
+        the decoded image (one palette index per byte, the background is
+        white).
+
+    Raises
+    ------
+    ValueError
+        If some field inside the file is not compliant with the expected
+        file structure. 
+        
+    """
+    header = parse_rte2_header(fdata)
+    bmp_width: int = header['width']
+    bmp_height: int = header['height']
+    
+    width = bmp_width
+    if (width%4) > 0:
+        # The image width must be divisible by four
+        width = width + 4 - (width%4)
+    
+    # Create a white image
+    data = bytearray(repeat_byte(WHITE, width*bmp_height))
+    
+    # Every run is a (length, palette index) pair. A zero length
+    # run jumps to the next row.
+    size = len(fdata)
+    x = 0
+    y = bmp_height - 1
+    idx = RTE2_HEADER.size
+    while (idx < size) and (y>=0):
+        run_length = fdata[idx]
+        idx = idx + 1
+        if idx >= size:
+            break
+        run_value = fdata[idx]
+        idx = idx + 1
+        
+        if run_length == 0:
+            x = 0
+            y -= 1
+            continue
+        
+        n = min(run_length, width - x)
+        if n < run_length:
+            logging.error("Painting out of image! (x=%s y=%s col=%s)",
+                          x + n - 1, y, run_value)
+        
+        write_bytes(data, y*width + x, repeat_byte(run_value, n))
+        x += n
+        
+        if x >= width:
+            x = 0
+            y -= 1
+    
+    if idx != size:
+        logging.warning("there is more data to decode. Probably the image "
+                        + "is not properly generated. (%s != %s)", idx, size)
+    
+    palette = struct.pack(repeat_string('B', len(RTE2_PALETTE)),
+                          *RTE2_PALETTE)
+    return Bitmap(bmp_width, bmp_height, 8, width, palette, data)
+
+#
+# Transforms a RTE2 file into a BMP image
+# =============================================================================
+def rte22bmp(fdata: bytes) -> bytes:
+    """
+    Parse a RTE2 file and return its content as a bitmap image.
+    
+    Parameters
+    ----------
+    fdata : bytes
+        The bytes in the RTE2 file.
+        
+    Returns
+    -------
+    bytes
+        a byte array with the BMP image.
+
+    Raises
+    ------
+    ValueError
+        If some field inside the file is not compliant with the expected
+        file structure. 
+        
+    """
+    return rte2bitmap2bmp(rte22bitmap(fdata))
+
+#
+# Transforms a decoded RTE2 image into a BMP image
+# =============================================================================
+def rte2bitmap2bmp(bitmap: Bitmap) -> bytes:
+    """
+    Return a decoded RTE2 image as a bitmap image.
+    
+    Parameters
+    ----------
+    bitmap: Bitmap
+        The decoded image.
+        
+    Returns
+    -------
+    bytes
+        a byte array with the BMP image.
+        
+    """
+    return ENCODER.encodeBmp(bitmap)
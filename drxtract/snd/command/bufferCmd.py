@@ -5,7 +5,8 @@
 
 from .cmd import SoundCmd
 from ..sampled import SampledSound
-from ...lingosrc.util import unpack_float80
+from ...lingosrc.util import unpack_float80, is_debug_enabled, \
+    bytes_view, swap_bytes_16
 import logging
 import struct
 
@@ -41,13 +42,16 @@ class BufferCmd(SoundCmd):
         #   sampleArea: PACKED ARRAY[0..0] OF Byte;
         # END;
         # 
+        debug: bool = is_debug_enabled()
         samplePtr = int(struct.unpack('>i', fdata[idx:idx+4])[0])
         idx += 4
-        logging.debug("samplePtr = %d", samplePtr)                             
+        if debug:
+            logging.debug("samplePtr = %d", samplePtr)
     
         to_be_defined = int(struct.unpack('>i',fdata[idx:idx+4])[0])
         idx += 4
-        logging.debug("to_be_defined = %d", to_be_defined)
+        if debug:
+            logging.debug("to_be_defined = %d", to_be_defined)
     
         sampleRateInt =  int(struct.unpack('>h', fdata[idx:idx+2])[0])
         idx += 2
@@ -55,23 +59,28 @@ class BufferCmd(SoundCmd):
         sampleRateDec =  int(struct.unpack('>h', fdata[idx:idx+2])[0])
         idx += 2
         
-        logging.debug("sampleRate = %d.%d", sampleRateInt, sampleRateDec)
+        if debug:
+            logging.debug("sampleRate = %d.%d", sampleRateInt, sampleRateDec)
         
         loopStart = int(struct.unpack('>i', fdata[idx:idx+4])[0])
         idx += 4
-        logging.debug("loopStart = %s", loopStart)
+        if debug:
+            logging.debug("loopStart = %s", loopStart)
     
         loopEnd = int(struct.unpack('>i', fdata[idx:idx+4])[0])
         idx += 4
-        logging.debug("loopEnd = %d", loopEnd)                            
+        if debug:
+            logging.debug("loopEnd = %d", loopEnd)
     
         encode = int(fdata[idx])
         idx += 1
-        logging.debug("encode = %d", encode)
+        if debug:
+            logging.debug("encode = %d", encode)
     
         baseFrequency = int(fdata[idx])
         idx += 1
-        logging.debug("baseFrequency = %d", baseFrequency)
+        if debug:
+            logging.debug("baseFrequency = %d", baseFrequency)
         
         if samplePtr != 0:
             raise ValueError("samplePtr must be NIL")
@@ -114,46 +123,56 @@ class BufferCmd(SoundCmd):
             
             num_frames = int(struct.unpack('>i', fdata[idx:idx+4])[0])
             idx += 4
-            logging.debug("num_frames = %d", num_frames)
+            if debug:
+                logging.debug("num_frames = %d", num_frames)
             
             length = int(num_frames * sound.num_channels)
             
             aiff_sample_rate = unpack_float80(fdata[idx:idx+10])
             idx += 10
-            logging.debug("aiff_sample_rate = %s", aiff_sample_rate)         
+            if debug:
+                logging.debug("aiff_sample_rate = %s", aiff_sample_rate)
             
             marker_chunk = int(struct.unpack('>i', fdata[idx:idx+4])[0])
             idx += 4
-            logging.debug("marker_chunk = %d", marker_chunk)
+            if debug:
+                logging.debug("marker_chunk = %d", marker_chunk)
             
             instruments_chunk = int(struct.unpack('>i', fdata[idx:idx+4])[0])
             idx += 4
-            logging.debug("instruments_chunk = %d", instruments_chunk)
+            if debug:
+                logging.debug("instruments_chunk = %d", instruments_chunk)
             
             aes_recording = int(struct.unpack('>i', fdata[idx:idx+4])[0])
             idx += 4
-            logging.debug("aes_recording = %d", aes_recording)  
+            if debug:
+                logging.debug("aes_recording = %d", aes_recording)
                  
             bps =  int(struct.unpack('>h', fdata[idx:idx+2])[0])
             idx += 2
-            logging.debug("bps = %d", bps)
+            if debug:
+                logging.debug("bps = %d", bps)
             sound.bits_per_sample = bps
                           
             future_use1 =  int(struct.unpack('>h', fdata[idx:idx+2])[0])
             idx += 2
-            logging.debug("future_use1 = %d", future_use1)                       
+            if debug:
+                logging.debug("future_use1 = %d", future_use1)
                           
             future_use2 = int(struct.unpack('>i', fdata[idx:idx+4])[0])
             idx += 4
-            logging.debug("future_use2 = %d", future_use2)                      
+            if debug:
+                logging.debug("future_use2 = %d", future_use2)
                        
             future_use3 = int(struct.unpack('>i', fdata[idx:idx+4])[0])
             idx += 4
-            logging.debug("future_use3 = %d", future_use3)
+            if debug:
+                logging.debug("future_use3 = %d", future_use3)
                           
             future_use4 = int(struct.unpack('>i', fdata[idx:idx+4])[0])
             idx += 4
-            logging.debug("future_use4 = %d", future_use4)
+            if debug:
+                logging.debug("future_use4 = %d", future_use4)
 
             
         
@@ -162,23 +181,13 @@ class BufferCmd(SoundCmd):
         
         
         if sound.bits_per_sample == 8:
-            # 8 bits per sample
-            return fdata[idx:idx+length]
+            # 8 bits per sample (unsigned, like in the WAV files)
+            return bytes_view(fdata, idx, idx + length)
             
         elif sound.bits_per_sample == 16:
             # 16 bit per sample
             # Convert from big endian word to little endian word
-            data = bytearray(length * 2)
-
-            for i in range(0, length*2, 2):
-                index_l = idx + i
-                index_h = idx + i + 1
-                l = i
-                h = i + 1
-                data[l] = fdata[index_h]
-                data[h] = fdata[index_l]
-
-            return bytes(data)
+            return swap_bytes_16(fdata, idx, length)
             
         else:
             raise ValueError("Unsupported bits per sample!")
@@ -11,11 +11,20 @@ import struct
 import logging
 from typing import List
 from enum import Enum
-from ..lingosrc.util import vsprintf
+from ..lingosrc.util import vsprintf, RecordLayout, is_debug_enabled
 
 # Mac bit order
 mac_bit_order = '>'
 
+# Number of records of a table
+RECORD_COUNT = RecordLayout("h")
+
+# Sound command record (command, param1 and param2)
+SOUND_COMMAND = RecordLayout("Hhi")
+
+# Data type record (data type and init options)
+DATA_TYPE = RecordLayout("hi")
+
 #
 # Sound initialization parameters enumeration.
 # https://www.burgerbecky.com/burgerlib/docs/Sound_Manager.pdf
@@ -143,26 +152,18 @@ def parse_snd_commands(fdata: bytes, idx: int, sndData: SndFormat):
         file structure. 
         
     """
-    nsound_cmds =  int(struct.unpack(mac_bit_order+"h", fdata[idx:idx+2])[0])
-    idx += 2
+    nsound_cmds = RECORD_COUNT.unpack_from(mac_bit_order, fdata, idx)[0]
+    idx += RECORD_COUNT.size
     logging.debug("nsound_cmds = %s", nsound_cmds)
 
     # Parse the sound commands
-    for _ in range(0, nsound_cmds):
-        command =  int(struct.unpack(mac_bit_order+"h", fdata[idx:idx+2])[0])
-        idx += 2
-        
-        if command < 0:
-            command = (0xFFFF + command) + 1
-        logging.debug("command = %s", command)
-        
-        param1 =  int(struct.unpack(mac_bit_order+"h", fdata[idx:idx+2])[0])
-        idx += 2
-        logging.debug("param1 = %s", param1)                             
-    
-        param2 = int(struct.unpack(mac_bit_order+"i", fdata[idx:idx+4])[0])
-        idx += 4
-        logging.debug("param2 = %s", param2)
+    debug: bool = is_debug_enabled()
+    for command, param1, param2 in SOUND_COMMAND.iter_unpack(
+            mac_bit_order, fdata, idx, nsound_cmds):
+        if debug:
+            logging.debug("command = %s", command)
+            logging.debug("param1 = %s", param1)
+            logging.debug("param2 = %s", param2)
         
         sndData.commands.append(SoundCommand(command, param1, param2))
 
@@ -195,18 +196,14 @@ def parse_snd_fmt1(fdata: bytes) -> SndFormat1:
     sndData = SndFormat1()
     idx = 2
     
-    ndata_types =  int(struct.unpack(mac_bit_order+"h", fdata[idx:idx+2])[0])
-    idx += 2
+    ndata_types = RECORD_COUNT.unpack_from(mac_bit_order, fdata, idx)[0]
+    idx += RECORD_COUNT.size
     logging.debug("ndata_types = %s", ndata_types)
     
-    for _ in range(0, ndata_types):
-        data_type =  int(struct.unpack(mac_bit_order+"h", fdata[idx:idx+2])[0])
-        idx += 2
+    for data_type, init_options in DATA_TYPE.iter_unpack(
+            mac_bit_order, fdata, idx, ndata_types):
+        idx += DATA_TYPE.size
         logging.debug("data_type = %s", data_type)
-        
-        init_options = int(struct.unpack(mac_bit_order+"i",
-                                         fdata[idx:idx+4])[0])
-        idx += 4
         logging.debug("init_options = %s", init_options)
         
         dt: DataType = DataType()
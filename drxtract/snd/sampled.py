@@ -24,4 +24,5 @@ class SampledSound:
         """Sample rate"""
 
         self.samples: bytes = bytes()
-        """Sound samples"""
+        """Sound samples (little endian words if they are 16 bits). It can be
+        a memoryview that references the SND file data."""
@@ -6,8 +6,8 @@
 # Classes to generate a sampled sound from SND files.
 #
 
-import io
-from ..lingosrc.util import vsprintf, get_keys
+from typing import List
+from ..lingosrc.util import vsprintf, get_keys, join_bytes
 from .format import parse_snd_fmt, SndFormat
 from .command import SOUND_COMMANDS, SoundCmd
 from .sampled import SampledSound
@@ -39,7 +39,7 @@ def snd_to_sampled(fdata : bytes) ->  SampledSound:
         
     """
     sndData: SndFormat = parse_snd_fmt(fdata)
-    bytesIo: io.BytesIO = io.BytesIO()
+    chunks: List[bytes] = []
     sound: SampledSound = SampledSound()
     
     
@@ -49,14 +49,16 @@ def snd_to_sampled(fdata : bytes) ->  SampledSound:
         logging.debug("Processing command: %d", command)
         if command in get_keys(SOUND_COMMANDS):
             soundCmd:SoundCmd = SOUND_COMMANDS[command]
-            bytesIo.write(soundCmd.get_frames(sound, cmd.param1, cmd.param2,
-                                              fdata))
+            frames = soundCmd.get_frames(sound, cmd.param1, cmd.param2,
+                                         fdata)
+            if len(frames) > 0:
+                chunks.append(frames)
             
         else:
             msg = vsprintf('Unsupported sound command: %d', cmd.command)
             raise ValueError(msg)
 
-    sound.samples = bytesIo.getvalue()
-    bytesIo.close()
+    # A single buffer command references the samples of the file data
+    sound.samples = join_bytes(chunks)
     
     return sound
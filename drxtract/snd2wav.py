@@ -5,7 +5,8 @@
 # License: GNU GPL v2 (see LICENSE file for details).
 
 #
-# Script to convert a Machintosh "snd " file to Microsoft WAV (and then to MP3).
+# Script to convert a Machintosh "snd " file to Microsoft WAV (and then to MP3
+# or to another format with ffmpeg).
 # More info: https://developer.apple.com/library/archive/documentation/mac/Sound/Sound-60.html
 # 
 
@@ -14,17 +15,73 @@ import os
 import logging
 import wave
 import json
+import struct
+from typing import List, Optional
 from .snd import snd_to_sampled, SampledSound
+from .cache import cached
+from .options import pop_option, setup_logging
+from .transcode import SoundTask, AUDIO_FORMATS, DEFAULT_AUDIO_FORMAT, \
+    transcode_sounds
 
-logging.basicConfig(level=logging.DEBUG)
+
+# ==============================================================================
+# Saves a "snd " file as a WAV file in a folder and adds the sound information
+# to the cast member data. The decoded sound is added to the list of sounds
+# to encode (if any), so it can be transcoded later.
+def save_sound(castData, fdata, dest_dir, basename, cache=None,
+               sounds: Optional[List[SoundTask]] = None):
+    # Parse SND file (the samples aren't copied if there is no cache)
+    if cache is None:
+        sound: SampledSound = snd_to_sampled(fdata)
+    
+    else:
+        def decode():
+            decoded: SampledSound = snd_to_sampled(fdata)
+            return struct.pack('>iii', decoded.bits_per_sample,
+                               decoded.sample_rate,
+                               decoded.num_channels) + decoded.samples
+        
+        data = cached(cache, 'snd_', (fdata,), decode)
+        sound = SampledSound()
+        sound.bits_per_sample, sound.sample_rate, sound.num_channels = \
+            struct.unpack('>iii', data[0:12])
+        sound.samples = memoryview(data)[12:]
+    
+    # Add sound file information
+    castData['sampleSize'] = sound.bits_per_sample
+    castData['sampleRate'] = sound.sample_rate
+    castData['channelCount'] = sound.num_channels
+    
+    # Generate wave file
+    wav_name = "%s.%s"%(basename, 'wav')
+    
+    wavef = wave.open(os.path.join(dest_dir, wav_name),'w')
+    wavef.setnchannels(sound.num_channels)
+    wavef.setsampwidth(int(sound.bits_per_sample/8)) 
+    wavef.setframerate(sound.sample_rate)
+    
+    wavef.writeframesraw(sound.samples)
+    wavef.writeframes(b'')
+    wavef.close()
+    
+    if sounds is not None:
+        sounds.append((sound, os.path.join(dest_dir, basename)))
 
 
 # ==============================================================================
 def main():
+    setup_logging()
+    audio_format: str = pop_option('--audio', DEFAULT_AUDIO_FORMAT)
+
     if len(sys.argv) < 3:
-        print("USAGE: snd2wav <work directory> <snd_ file name>")
+        print("USAGE: snd2wav <work directory> <snd_ file name>"
+              + " [--audio %s]"%('|'.join(AUDIO_FORMATS))
+              + " [--log-level LEVEL]")
 
     else:
+        if audio_format not in AUDIO_FORMATS:
+            logging.error(" Unknown audio format: %s", audio_format)
+            sys.exit(-1)
 
         if not os.path.isdir(sys.argv[1]):
             logging.error(" '%s' is not a directory", sys.argv[1])
@@ -44,48 +101,25 @@ def main():
         with open(snd_file, mode='rb') as file:
             fdata = file.read()
             
-            # Parse SND file
-            sound: SampledSound = snd_to_sampled(fdata)
-            
             # Get cast file data
             castData = {}
             with open(os.path.join(sys.argv[1], 'data.json'), mode='r',
                       encoding='utf-8') as jsfile:
                 text = jsfile.read()
                 castData = json.loads(text)
-                
-            # Add sound file information
-            castData['sampleSize'] = sound.bits_per_sample
-            castData['sampleRate'] = sound.sample_rate
-            castData['channelCount'] = sound.num_channels
+            
+            sounds: List[SoundTask] = []
+            save_sound(castData, fdata, sys.argv[1],
+                       os.path.basename(snd_file)[:-5], None, sounds)
+            failed = transcode_sounds(sounds, audio_format)
               
             # Write CAST data to JSON file
             with open(os.path.join(sys.argv[1], 'data.json'), 'wb') as jsfile:
                 jsfile.write(json.dumps(castData, indent=4, sort_keys=True)
                              .encode('utf-8'))
-            
-            # Generate wave file
-            wav_name = "%s.%s"%(os.path.basename(snd_file)[:-5], 'wav')
-            mp3_name = "%s.%s"%(os.path.basename(snd_file)[:-5], 'mp3')
-            
-            wavef = wave.open(os.path.join(sys.argv[1], wav_name),'w')
-            wavef.setnchannels(sound.num_channels)
-            wavef.setsampwidth(int(sound.bits_per_sample/8)) 
-            wavef.setframerate(sound.sample_rate)
-            
-            wavef.writeframesraw(sound.samples)
-            wavef.writeframes(b'')
-            wavef.close()
-            
-
-            # Transform it to mp3            
-            in_name = os.path.join(sys.argv[1], wav_name)
-            out_name = os.path.join(sys.argv[1], mp3_name)
-            
-            os.system('ffmpeg -y -i %s -acodec libmp3lame %s'%(
-                in_name, # input file
-                out_name #output file
-            )) 
+        
+        if len(failed) > 0:
+            sys.exit(-1)
         
 if __name__ == '__main__':
     main()
@@ -13,8 +13,16 @@ import os
 import logging
 import json
 from .stxt import parse_stxt_data, TextData
+from .options import setup_logging
 
-logging.basicConfig(level=logging.DEBUG)
+
+# ==============================================================================
+# Adds the text and its format to the cast member data
+def add_text_data(castData, fontmap, fdata):
+    txtData: TextData = parse_stxt_data(fdata, fontmap)
+    
+    castData['text'] = txtData['text']
+    castData['txt_format'] = txtData['txt_format']
 
 
 # ==============================================================================
@@ -22,10 +30,7 @@ def stxt2json(castData, fontmap, stxt_file):
     with open(stxt_file, mode='rb') as file:
         fdata = file.read()
         
-        txtData: TextData = parse_stxt_data(fdata, fontmap)
-        
-        castData['text'] = txtData['text']
-        castData['txt_format'] = txtData['txt_format']
+        add_text_data(castData, fontmap, fdata)
 
         # Write CAST data to JSON file
         dest_dir = os.path.dirname(stxt_file)        
@@ -34,10 +39,27 @@ def stxt2json(castData, fontmap, stxt_file):
                 'utf-8'))
 
 
+# ==============================================================================
+# Reads the font map from a fonts.json file
+def load_fontmap(fontfile):
+    fontmap = []
+    if os.path.isfile(fontfile):
+        with open(fontfile, mode='r', encoding='utf-8') as file:
+            text = file.read()
+            fontmap = json.loads(text)
+    else:
+        logging.warning("Fonts map not found in: %s", fontfile)
+    
+    return fontmap
+
+
 # ==============================================================================
 def main():
+    setup_logging()
+
     if len(sys.argv) < 3:
-        print("USAGE: stxt2json <work directory> <stxt file name>")
+        print("USAGE: stxt2json <work directory> <stxt file name>"
+              + " [--log-level LEVEL]")
 
     else:
         if not os.path.isdir(sys.argv[1]):
@@ -54,16 +76,8 @@ def main():
             sys.exit(-1)
 
         # Get the font map
-        fontmap = []
-        fontfile = os.path.join(os.path.dirname(os.path.dirname(sys.argv[1])),
-                                'fonts.json')
-        if os.path.isfile(fontfile):
-            with open(fontfile, mode='r', encoding='utf-8') as file:
-                text = file.read()
-                fontmap = json.loads(text)
-        else:
-            logging.warning("Fonts map not found in: %s", fontfile)
-            
+        fontmap = load_fontmap(os.path.join(
+            os.path.dirname(os.path.dirname(sys.argv[1])), 'fonts.json'))
             
         # Get cast file data
         castData = {}
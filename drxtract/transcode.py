@@ -0,0 +1,165 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Transcoding of the extracted sounds. The decoded sounds of a movie are
+# gathered and encoded at the end by a bounded pool of ffmpeg processes,
+# that read the PCM samples from their standard input.
+#
+
+import os
+import logging
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from .snd import SampledSound
+
+# Codec options of ffmpeg for every audio format
+AUDIO_CODECS: Dict[str, List[str]] = {
+    'mp3': ['-acodec', 'libmp3lame']
+}
+
+# Pass-through format (only the WAV files are generated)
+PASS_THROUGH = 'wav'
+
+AUDIO_FORMATS: List[str] = [PASS_THROUGH] + list(AUDIO_CODECS.keys())
+
+DEFAULT_AUDIO_FORMAT = 'mp3'
+
+# ffmpeg formats of the PCM samples for every sample size
+PCM_FORMATS: Dict[int, str] = {
+    8: 'u8',
+    16: 's16le'
+}
+
+# A sound to encode and the name of the output file (without extension)
+SoundTask = Tuple[SampledSound, str]
+
+# =============================================================================
+def get_ffmpeg() -> str:
+    """
+    Returns the ffmpeg program (it can be changed by using the DRX_FFMPEG
+    environment variable).
+
+    """
+    return os.environ.get('DRX_FFMPEG', 'ffmpeg')
+
+# =============================================================================
+def ffmpeg_command(sound: SampledSound, out_name: str,
+                   audio_format: str) -> List[str]:
+    """
+    Returns the ffmpeg command line that encodes the samples of a sound
+    read from the standard input.
+
+    Parameters
+    ----------
+    sound : SampledSound
+        The sound.
+    out_name : str
+        The name of the output file.
+    audio_format : str
+        The audio format (a key of AUDIO_CODECS).
+
+    Returns
+    -------
+    List[str]
+        The program and its arguments.
+
+    Raises
+    ------
+    ValueError
+        If the audio format or the sample size are not supported.
+
+    """
+    if audio_format not in AUDIO_CODECS:
+        raise ValueError("Unsupported audio format: %s"%(audio_format))
+
+    if sound.bits_per_sample not in PCM_FORMATS:
+        raise ValueError("Unsupported bits per sample: %s"%(
+            sound.bits_per_sample))
+
+    return ([get_ffmpeg(), '-y', '-loglevel', 'error',
+             '-f', PCM_FORMATS[sound.bits_per_sample],
+             '-ar', str(sound.sample_rate),
+             '-ac', str(sound.num_channels),
+             '-i', 'pipe:0'] + AUDIO_CODECS[audio_format] + [out_name])
+
+# =============================================================================
+def transcode_sound(sound: SampledSound, out_name: str,
+                    audio_format: str = DEFAULT_AUDIO_FORMAT
+                    ) -> Optional[str]:
+    """
+    Encodes a sound into a file by piping its samples into ffmpeg.
+
+    Parameters
+    ----------
+    sound : SampledSound
+        The sound.
+    out_name : str
+        The name of the output file (without extension).
+    audio_format : str
+        The audio format (a key of AUDIO_CODECS).
+
+    Returns
+    -------
+    Optional[str]
+        The error message (or None if the sound was encoded).
+
+    """
+    out_name = '%s.%s'%(out_name, audio_format)
+    try:
+        result = subprocess.run(ffmpeg_command(sound, out_name, audio_format),
+                                input=sound.samples, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE)
+    except (OSError, ValueError) as e:
+        return '%s: %s'%(type(e).__name__, e)
+
+    if result.returncode != 0:
+        return 'ffmpeg exit status %d: %s'%(
+            result.returncode, result.stderr.decode('utf-8', 'replace').strip())
+
+    return None
+
+# =============================================================================
+def transcode_sounds(sounds: List[SoundTask],
+                     audio_format: str = DEFAULT_AUDIO_FORMAT,
+                     jobs: int = 1) -> List[str]:
+    """
+    Encodes a batch of sounds. Every sound is encoded by its own ffmpeg
+    process, but only a limited number of them run at the same time.
+
+    Parameters
+    ----------
+    sounds : List[SoundTask]
+        The sounds and the names of their output files (without extension).
+    audio_format : str
+        The audio format (a key of AUDIO_CODECS, or PASS_THROUGH to skip
+        the encoding).
+    jobs : int
+        Maximum number of concurrent ffmpeg processes (0 for one per CPU).
+
+    Returns
+    -------
+    List[str]
+        The names of the files that could not be generated.
+
+    """
+    if audio_format == PASS_THROUGH or len(sounds) == 0:
+        return []
+
+    logging.info("Encoding %d sounds as %s", len(sounds), audio_format)
+    with ThreadPoolExecutor(max_workers=(jobs if jobs > 0
+                                         else os.cpu_count())) as executor:
+        errors = list(executor.map(
+            lambda task: transcode_sound(task[0], task[1], audio_format),
+            sounds))
+
+    failed: List[str] = []
+    for (_, out_name), error in zip(sounds, errors):
+        if error is not None:
+            out_name = '%s.%s'%(out_name, audio_format)
+            logging.error("Can not encode %s (%s)", out_name, error)
+            failed.append(out_name)
+
+    return failed
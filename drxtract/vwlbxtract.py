@@ -14,11 +14,11 @@ import os
 import logging
 import json
 from .vwlb import parse_vwlb_data
+from .chunk_source import ChunkSource, BinDirSource
+from .options import setup_logging
 
 BINDIR = 'bin'
 
-#logging.basicConfig(level=logging.DEBUG)
-
 
 # ==============================================================================
 # Reads from VWLB file the markers channel of the score and its frame
@@ -29,33 +29,38 @@ def parse_vwlb_file(vwlb_file):
             
     return []
 
+# ==============================================================================
+# Writes the markers channel of the score into the markers.json file
+def extract_markers(source: ChunkSource, directory: str):
+    vwlb_file = source.find(('VWLB',))
+    if vwlb_file is None:
+        raise ValueError('Can not find a VWLB file!')
+    
+    vwlb_elements = parse_vwlb_data(source.read(vwlb_file))
+    # Write markers data to JSON file
+    with open(os.path.join(directory, 'markers.json'), 'wb') as jsfile:
+        jsfile.write(json.dumps(vwlb_elements, indent=4, sort_keys=True
+                                ).encode('utf-8'))
+
 # ==============================================================================
 def main():
+    setup_logging()
+
     if len(sys.argv) < 2:
-        print("USAGE: vwlbxtract <work directory>")
+        print("USAGE: vwlbxtract <work directory>"
+              + " [--log-level LEVEL]")
 
     else:
         if not os.path.isdir(sys.argv[1]):
             logging.error(" '%s' is not a directory", sys.argv[1])
             sys.exit(-1)
 
-        vwlb_file = None
-        
-        for f in os.listdir(os.path.join(sys.argv[1], BINDIR)):
-            if f.endswith('VWLB'):
-                vwlb_file = f
-                break
-        
-        if vwlb_file is None:
-            logging.error('Can not find a VWLB file!')
+        try:
+            extract_markers(BinDirSource(os.path.join(sys.argv[1], BINDIR)),
+                            sys.argv[1])
+        except ValueError as e:
+            logging.error(str(e))
             sys.exit(-1)
-        
-        vwlb_elements = parse_vwlb_file(os.path.join(sys.argv[1], BINDIR,
-                                                     vwlb_file))
-        # Write markers data to JSON file
-        with open(os.path.join(sys.argv[1], 'markers.json'), 'wb') as jsfile:
-            jsfile.write(json.dumps(vwlb_elements, indent=4, sort_keys=True
-                                    ).encode('utf-8'))
 
 if __name__ == '__main__':
     main()
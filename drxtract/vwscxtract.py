@@ -14,6 +14,8 @@ import os
 import logging
 import json
 from .vwsc import parse_vwsc_file_data, vwsc_to_score
+from .chunk_source import ChunkSource, BinDirSource
+from .options import setup_logging
 
 BINDIR = 'bin'
 
@@ -21,8 +23,6 @@ DEBUG_MAIN_CHANNEL_INFO = False
 DEBUG_PALETTE_CHANNEL_INFO = False
 DEBUG_SPRITE_INFO = True
 
-#logging.basicConfig(level=logging.DEBUG)
-
 # ==============================================================================
 # Reads from VWSC file the score elements
 def parse_vwsc_file(vwsc_file):    
@@ -31,36 +31,41 @@ def parse_vwsc_file(vwsc_file):
         return parse_vwsc_file_data(fdata)
 
 
+# ==============================================================================
+# Writes the score into the score.json file
+def extract_score(source: ChunkSource, directory: str):
+    vwsc_file = source.find(('VWSC',))
+    if vwsc_file is None:
+        raise ValueError('Can not find a VWSC file!')
+    
+    vwsc_elements = parse_vwsc_file_data(source.read(vwsc_file))
+    
+    data = vwsc_to_score(vwsc_elements)
+    
+    # Write score data to JSON file
+    with open(os.path.join(directory, 'score.json'), 'wb') as jsfile:
+        jsfile.write(json.dumps(data, indent=4, sort_keys=True).encode(
+            'utf-8'))
+
 # ==============================================================================
 def main():
+    setup_logging()
+
     if len(sys.argv) < 2:
-        print("USAGE: vwscxtract <work directory>")
+        print("USAGE: vwscxtract <work directory>"
+              + " [--log-level LEVEL]")
 
     else:
         if not os.path.isdir(sys.argv[1]):
             logging.error(" '%s' is not a directory", sys.argv[1])
             sys.exit(-1)
 
-        vwsc_file = None
-        
-        for f in os.listdir(os.path.join(sys.argv[1], BINDIR)):
-            if f.endswith('VWSC'):
-                vwsc_file = f
-                break
-        
-        if vwsc_file is None:
-            logging.error('Can not find a VWSC file!')
+        try:
+            extract_score(BinDirSource(os.path.join(sys.argv[1], BINDIR)),
+                          sys.argv[1])
+        except ValueError as e:
+            logging.error(str(e))
             sys.exit(-1)
-        
-        vwsc_elements = parse_vwsc_file(os.path.join(sys.argv[1],
-                                                     BINDIR, vwsc_file))
-        
-        data = vwsc_to_score(vwsc_elements)
-        
-        # Write score data to JSON file
-        with open(os.path.join(sys.argv[1], 'score.json'), 'wb') as jsfile:
-            jsfile.write(json.dumps(data, indent=4, sort_keys=True).encode(
-                'utf-8'))
 
         
 if __name__ == '__main__':
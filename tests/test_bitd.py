@@ -9,11 +9,36 @@
 import unittest
 import os
 import json
+from typing import Tuple
+from concurrent.futures import ThreadPoolExecutor
 from parameterized import parameterized
 
-from drxtract.bitd import bitd2bmp
+from drxtract.bitd import bitd2bmp, bitd2bitmap, Bitmap, matte_mask, \
+    transparent_mask, pixel_view, palette_rgba, bitmap2rgba, bitmap2array
 from drxtract.clut import clut2palette
+from drxtract.palettes import get_palette, get_palette_rgb
+from drxtract.palettes.metallic import METALLIC_256COLORS_PALETTE
+from drxtract.lingosrc.util import write_bytes
+from drxtract.bitd2bmp import custom_palette
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def top_left_rgb(bitmap: Bitmap) -> Tuple[int, int, int]:
+    """Returns the color of the top left pixel of a true color bitmap"""
+    start = (bitmap.height - 1) * bitmap.stride
+    if bitmap.bpp == 24:
+        blue, green, red = bitmap.data[start:start+3]
+    else:
+        value = bitmap.data[start] | (bitmap.data[start+1] << 8)
+        red = round(((value >> 10) & 0x1F) * 255 / 31)
+        green = round(((value >> 5) & 0x1F) * 255 / 31)
+        blue = round((value & 0x1F) * 255 / 31)
+
+    return (red, green, blue)
 
 class TestScript(unittest.TestCase):
     
@@ -89,4 +114,223 @@ class TestScript(unittest.TestCase):
         #with open(os.path.join(dir_name, "test.bmp"), mode='wb') as file:
             #file.write(bmp)
         
-            self.assertEqual(expected_bmp, bmp)
\ No newline at end of file
+            self.assertEqual(expected_bmp, bmp)
+
+    def test_bitd_from_threads(self):
+        # The decoders are shared, so every image must be decoded
+        # independently of the other ones
+        dir_names = ['apple', 'appleInPipe', 'superman', 'line', 'porteus',
+                     'postbox16b', 'postbox24b'] * 4
+        
+        def decode(dir_name: str) -> bytes:
+            with open(os.path.join(dir_name, "data.json"), mode='rb') as file:
+                castData = json.loads(file.read().decode('utf-8'))
+            
+            with open(os.path.join(dir_name, dir_name + ".BITD"),
+                      mode='rb') as file:
+                return bitd2bmp(castData, bytes(), file.read())
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            bmps = list(executor.map(decode, dir_names))
+        
+        for dir_name, bmp in zip(dir_names, bmps):
+            with open(os.path.join(dir_name, dir_name + ".bmp"),
+                      mode='rb') as file:
+                self.assertEqual(file.read(), bmp)
+
+    def test_matte_mask(self):
+        # White square with a white hole inside a black frame (from the top
+        # row to the bottom row)
+        rows = [
+            [0, 0, 0, 0, 0],
+            [0, 1, 1, 1, 0],
+            [0, 1, 0, 1, 0],
+            [0, 1, 1, 1, 0],
+        ]
+        palette = bytes([255, 255, 255, 0, 0, 0, 0, 0])
+        
+        # The bitmap rows are stored from bottom to top (8 bytes per row)
+        data = bytearray()
+        for row in reversed(rows):
+            data += bytes(row) + bytes(3)
+        bitmap = Bitmap(5, 4, 8, 8, palette, bytes(data))
+
+        # Only the white pixels connected to the border are transparent
+        expected = bytearray()
+        for y in range(3, -1, -1):
+            for x in range(0, 5):
+                if rows[y][x] == 1 or (x, y) == (2, 2):
+                    expected.append(255)
+                else:
+                    expected.append(0)
+
+        self.assertEqual(expected, matte_mask(bitmap, (255, 255, 255)))
+        self.assertEqual(expected, matte_mask(bitmap, index=0))
+
+        # Every white pixel is transparent
+        expected[(3 - 2)*5 + 2] = 0
+        self.assertEqual(expected, transparent_mask(bitmap, (255, 255, 255)))
+
+    @parameterized.expand([
+        ['postbox16b'],
+        ['postbox24b'],
+    ])
+    def test_true_color_matte_mask(self, dir_name: str):
+        with open(os.path.join(dir_name, "data.json"), mode='rb') as file:
+            castData = json.loads(file.read().decode('utf-8'))
+
+        with open(os.path.join(dir_name, dir_name + ".BITD"),
+                  mode='rb') as file:
+            bitmap = bitd2bitmap(castData, bytes(), file.read())
+
+        # Use the color of the top left pixel as the matte color
+        red, green, blue = top_left_rgb(bitmap)
+
+        mask = matte_mask(bitmap, (red, green, blue))
+        self.assertEqual(bitmap.width * bitmap.height, len(mask))
+        self.assertEqual(0, mask[(bitmap.height - 1) * bitmap.width])
+        self.assertIn(255, mask)
+        
+        # The matte pixels are a subset of the background transparent ones
+        transparent = transparent_mask(bitmap, (red, green, blue))
+        for i in range(0, len(mask)):
+            if mask[i] == 0:
+                self.assertEqual(0, transparent[i])
+
+    def test_write_bytes(self):
+        data = bytearray(6)
+        write_bytes(data, 1, b'ab')
+        self.assertEqual(b'\x00ab\x00\x00\x00', data)
+        
+        # Negative indexes are counted from the end
+        write_bytes(data, -2, b'xyz')
+        self.assertEqual(b'zab\x00xy', data)
+        
+        with self.assertRaises(IndexError):
+            write_bytes(data, 5, b'12')
+        self.assertEqual(6, len(data))
+
+    def test_4bits_bitd(self):
+        castData = {'width': 3, 'height': 2, 'depth': 4, 'w_padding': 0,
+                    'h_padding': 0, 'palette_txt': 'systemMac'}
+        
+        # Rows of 2 bytes (from the top row to the bottom row)
+        for fdata in (bytes([0x01, 0x12, 0x30, 0xFF, 0x44]),
+                      bytes([0x12, 0x30, 0x44, 0x40])):
+            bitmap = bitd2bitmap(castData, bytes(), fdata)
+            self.assertEqual(8, bitmap.bpp)
+            self.assertEqual(4, bitmap.stride)
+            self.assertEqual(bytes([4, 4, 4, 0, 1, 2, 3, 0]), bitmap.data)
+            
+            # Mac system palette: white, yellow, orange, red, magenta...
+            self.assertEqual(64, len(bitmap.palette))
+            self.assertEqual(bytes([255, 255, 255, 0, 0, 255, 255, 0]),
+                             bitmap.palette[0:8])
+        
+        # Custom palette
+        castData['palette_txt'] = '3'
+        self.assertEqual('3', custom_palette(castData))
+
+    def test_16colors_palettes(self):
+        # The colors are stored as blue, green, red and zero
+        mac = get_palette_rgb(4, 'systemMac')
+        self.assertEqual(16, len(mac) / 3)
+        self.assertEqual(bytes([255, 255, 255]), mac[0:3])
+        self.assertEqual(bytes([255, 255, 0]), mac[3:6])
+        self.assertEqual(bytes([0, 0, 0]), mac[45:48])
+        
+        win = get_palette_rgb(4, 'systemWin')
+        self.assertEqual(16, len(win) / 3)
+        self.assertEqual(bytes([0, 255, 255]), win[3:6])
+        self.assertEqual(bytes([255, 0, 0]), win[18:21])
+
+    def test_true_color_raw_bitd(self):
+        # Rows of color planes (from the top row to the bottom row)
+        castData = {'width': 2, 'height': 2, 'depth': 16, 'w_padding': 0,
+                    'h_padding': 0, 'palette_txt': 'none'}
+        bitmap = bitd2bitmap(castData, bytes(), bytes([0x7C, 0x03, 0x00, 0xE0,
+                                                       0x00, 0x00, 0x00, 0x1F]))
+        self.assertEqual(bytes([0x00, 0x00, 0x1F, 0x00,
+                                0x00, 0x7C, 0xE0, 0x03]), bitmap.data)
+        
+        castData['depth'] = 32
+        bitmap = bitd2bitmap(castData, bytes(), bytes([0, 0, 1, 2, 3, 4, 5, 6,
+                                                       0, 0, 7, 8, 9, 10, 11,
+                                                       12]))
+        self.assertEqual(24, bitmap.bpp)
+        self.assertEqual(bytes([11, 9, 7, 12, 10, 8, 5, 3, 1, 6, 4, 2]),
+                         bitmap.data)
+
+    def test_pixel_buffer(self):
+        # 3x2 image (rows stored from bottom to top, 4 bytes per row)
+        palette = bytes([255, 255, 255, 0, 0, 0, 255, 0])
+        bitmap = Bitmap(3, 2, 8, 4, palette, bytes([1, 1, 0, 9, 0, 1, 0, 9]))
+        self.assertEqual('indexed8', bitmap.pixel_format)
+        
+        view = pixel_view(bitmap)
+        self.assertTrue(view.readonly)
+        self.assertEqual(bitmap.data, view.tobytes())
+        
+        self.assertEqual(bytes([255, 255, 255, 255, 255, 0, 0, 255]),
+                         palette_rgba(bitmap))
+        
+        # RGBA rows from top to bottom
+        white = bytes([255, 255, 255, 255])
+        red = bytes([255, 0, 0, 255])
+        self.assertEqual(white + red + white + red + red + white,
+                         bitmap2rgba(bitmap))
+        
+        # The alpha mask rows are stored like in the bitmap
+        self.assertEqual(white + red + white[0:3] + bytes(1) + red + red
+                         + white, bitmap2rgba(bitmap, bytes([255] * 5 + [0])))
+
+    @parameterized.expand([
+        ['postbox16b', 'rgb555'],
+        ['postbox24b', 'bgr24'],
+    ])
+    def test_true_color_pixel_buffer(self, dir_name: str, pixel_format: str):
+        with open(os.path.join(dir_name, "data.json"), mode='rb') as file:
+            castData = json.loads(file.read().decode('utf-8'))
+
+        with open(os.path.join(dir_name, dir_name + ".BITD"),
+                  mode='rb') as file:
+            bitmap = bitd2bitmap(castData, bytes(), file.read())
+        
+        self.assertEqual(pixel_format, bitmap.pixel_format)
+        rgba = bitmap2rgba(bitmap)
+        self.assertEqual(bitmap.width * bitmap.height * 4, len(rgba))
+        
+        # Top left pixel
+        self.assertEqual(bytes(top_left_rgb(bitmap) + (255,)), rgba[0:4])
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_pixel_array(self):
+        palette = bytes([255, 255, 255, 0, 0, 0, 255, 0])
+        bitmap = Bitmap(3, 2, 8, 4, palette, bytes([1, 1, 0, 9, 0, 1, 0, 9]))
+        
+        pixels = bitmap2array(bitmap)
+        self.assertEqual((2, 3), pixels.shape)
+        self.assertEqual([[0, 1, 0], [1, 1, 0]], pixels.tolist())
+        
+        rgba = bitmap2array(bitmap, True)
+        self.assertEqual((2, 3, 4), rgba.shape)
+        self.assertEqual(bitmap2rgba(bitmap), rgba.tobytes())
+
+    def test_palette_registry(self):
+        palette = get_palette(8, 'metallic')
+        self.assertEqual(bytes(METALLIC_256COLORS_PALETTE), palette)
+        
+        # The palettes are packed only once
+        self.assertIs(palette, get_palette(8, 'metallic'))
+        
+        rgb = get_palette_rgb(8, 'metallic')
+        self.assertEqual(256 * 3, len(rgb))
+        self.assertEqual(bytes([palette[2], palette[1], palette[0]]),
+                         rgb[0:3])
+        
+        self.assertEqual(bytes([255, 255, 255, 0, 0, 0, 0, 0]),
+                         get_palette(1, 'black and white'))
+        self.assertEqual(64, len(get_palette(4, 'systemWin')))
+        
+        with self.assertRaises(ValueError):
+            get_palette(8, 'unknown')
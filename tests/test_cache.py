@@ -0,0 +1,102 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Unit test for the decode cache
+#
+
+import unittest
+import io
+import os
+import time
+import pickle
+import tempfile
+import logging
+from unittest import mock
+
+from drxtract.cache import DecodeCache, cached
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, 'cache')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_key(self):
+        cache = DecodeCache(self.directory, 1024)
+        key = cache.key('BITD', b'data', [1, 2, 'a'])
+        self.assertEqual(key, cache.key('BITD', bytearray(b'data'),
+                                        [1, 2, 'a']))
+        self.assertNotEqual(key, cache.key('snd_', b'data', [1, 2, 'a']))
+        self.assertNotEqual(key, cache.key('BITD', b'datb', [1, 2, 'a']))
+        self.assertNotEqual(key, cache.key('BITD', b'data', [1, 2, 'b']))
+        self.assertNotEqual(cache.key('BITD', b'ab', b'c'),
+                            cache.key('BITD', b'a', b'bc'))
+
+    def test_cached(self):
+        cache = DecodeCache(self.directory, 1024)
+        calls = []
+
+        def decode() -> bytes:
+            calls.append(1)
+            return b'decoded'
+
+        self.assertEqual(b'decoded', cached(cache, 'BITD', (b'x',), decode))
+        self.assertEqual(b'decoded', cached(cache, 'BITD', (b'x',), decode))
+        self.assertEqual(b'decoded', cached(None, 'BITD', (b'x',), decode))
+        self.assertEqual(2, len(calls))
+
+        stats = cache.take_stats()
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+        self.assertEqual(1, stats['stores'])
+        self.assertEqual(0, cache.stats['hits'])
+
+        # Other processes share the entries
+        copy: DecodeCache = pickle.loads(pickle.dumps(cache))
+        self.assertEqual(b'decoded', copy.get(copy.key('BITD', b'x')))
+
+    def test_report(self):
+        cache = DecodeCache(self.directory, 1024)
+        cached(cache, 'BITD', (b'x',), lambda: b'decoded')
+        cached(cache, 'BITD', (b'x',), lambda: b'decoded')
+
+        # The report is shown with the default log level of the scripts
+        root = logging.getLogger()
+        level = root.level
+        root.setLevel(logging.WARNING)
+        try:
+            with mock.patch('sys.stdout', new_callable=io.StringIO) as out:
+                cache.report()
+        finally:
+            root.setLevel(level)
+
+        self.assertIn('Decode cache: 1 hits, 1 misses (50.0% hit rate), '
+                      + '1 stores, 0 evictions', out.getvalue())
+
+    def test_eviction(self):
+        cache = DecodeCache(self.directory, 250)
+        keys = [cache.key('BITD', bytes([i])) for i in range(0, 3)]
+        for i in range(0, 2):
+            cache.put(keys[i], bytes(100))
+            os.utime(cache._path(keys[i]), (time.time() - 100 + i,
+                                            time.time() - 100 + i))
+
+        # The first entry is used, so the second one is the oldest
+        self.assertIsNotNone(cache.get(keys[0]))
+        cache.put(keys[2], bytes(100))
+
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[2]))
+        self.assertEqual(1, cache.stats['evictions'])
+        self.assertEqual(200, cache.disk_size())
+
+
+if __name__ == '__main__':
+    unittest.main()
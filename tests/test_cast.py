@@ -214,6 +214,11 @@ class TestScript(unittest.TestCase):
             self.assertEqual(expectedData['palette_txt'], bmp['palette_txt'])
 
             self.assertEqual(expected_bmp, bmp['bitmap'])
+            
+            # The BMP image is made of the decoded pixels
+            self.assertEqual(expectedData['width'], bmp['pixels'].width)
+            self.assertEqual(expected_bmp[-len(bmp['pixels'].data):],
+                             bmp['pixels'].data)
 
     @parameterized.expand([
         ['<', 'factory', 0]
@@ -11,7 +11,7 @@ import os
 import json
 from parameterized import parameterized
 
-from drxtract.clut import clut2rgb
+from drxtract.clut import clut2rgb, clut2palette, PaletteCache
 
 
 class TestScript(unittest.TestCase):
@@ -44,3 +44,36 @@ class TestScript(unittest.TestCase):
         
             self.assertEqual(castData['palette'], colors)
 
+
+    def test_palette_cache(self):
+        with open(os.path.join('mspaint', "data.json"), mode='rb') as file:
+            colors = json.loads(file.read().decode('utf-8'))['palette']
+        
+        with open(os.path.join('mspaint', "mspaint.CLUT"), mode='rb') as file:
+            fdata = file.read()
+        
+        # BMP palette (blue, green, red and zero)
+        palette = clut2palette(fdata)
+        self.assertEqual(256*4, len(palette))
+        for i in range(0, len(colors)):
+            self.assertEqual(colors[i], '#%02x%02x%02x'%(palette[i*4 + 2],
+                                                         palette[i*4 + 1],
+                                                         palette[i*4]))
+        
+        # The CLUT is decoded only once
+        cache = PaletteCache()
+        self.assertIs(cache.add_clut(3, fdata), cache.add_clut(3, bytes(6)))
+        self.assertEqual(palette, cache.get_palette(3))
+        with self.assertRaises(ValueError):
+            cache.get_palette(4)
+        
+        # Palette index to RGBA lookup tables
+        red, green, blue, alpha = cache.get_rgba_tables(3)
+        self.assertEqual(colors[5], '#%02x%02x%02x'%(red[5], green[5],
+                                                     blue[5]))
+        self.assertEqual(255, alpha[5])
+        self.assertIs(cache.get_rgba_tables(3)[0], red)
+        
+        # Short CLUTs are completed with black
+        self.assertEqual(bytes([3, 2, 1, 0]) + bytes(255*4),
+                         clut2palette(bytes([1, 0, 2, 0, 3, 0])))
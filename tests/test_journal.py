@@ -0,0 +1,133 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Unit test for the extraction journal
+#
+
+import unittest
+import os
+import tempfile
+from unittest import mock
+
+from drxtract.journal import Journal, JOURNAL_VERSION
+from drxtract.chunk_source import BinDirSource, open_riff_source
+from drxtract.drxtract import extract_movie
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+        self.bin_dir = os.path.join(self.directory, 'bin')
+        os.mkdir(self.bin_dir)
+        self.write('bin/1.CASt', b'cast 1')
+        self.write('bin/2.CASt', b'cast 2')
+        self.write('bin/3.CLUT', b'palette')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name: str, data: bytes):
+        path = os.path.join(self.directory, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, mode='wb') as file:
+            file.write(data)
+
+    def extract(self) -> Journal:
+        journal = Journal(self.directory)
+        journal.add_resources(BinDirSource(self.bin_dir))
+        for name in ('1.CASt', '2.CASt'):
+            task = 'cas/' + name[0]
+            inputs = [name, '3.CLUT']
+            if not journal.is_current(task, inputs):
+                journal.clean(task)
+                self.write(task + '/data.json', b'{}')
+                journal.record(task, inputs, [task + '/data.json'])
+
+        journal.complete('cas')
+        journal.save()
+        return journal
+
+    def test_reuse(self):
+        self.assertEqual(0, self.extract().reused)
+        self.assertEqual(2, self.extract().reused)
+
+        # Changed chunk
+        self.write('bin/2.CASt', b'cast 2 (patched)')
+        self.assertEqual(1, self.extract().reused)
+
+        # Changed dependency
+        self.write('bin/3.CLUT', b'other palette')
+        self.assertEqual(0, self.extract().reused)
+
+        # Missing output
+        os.remove(os.path.join(self.directory, 'cas/1/data.json'))
+        self.assertEqual(1, self.extract().reused)
+
+        # Journal of a previous version (the extracted files changed)
+        self.extract()
+        with mock.patch('drxtract.journal.JOURNAL_VERSION',
+                        JOURNAL_VERSION + 1):
+            self.assertEqual(0, self.extract().reused)
+
+    def test_removed_task(self):
+        self.extract()
+        os.remove(os.path.join(self.bin_dir, '2.CASt'))
+
+        journal = Journal(self.directory)
+        journal.add_resources(BinDirSource(self.bin_dir))
+        self.assertTrue(journal.is_current('cas/1', ['1.CASt', '3.CLUT']))
+        journal.complete('cas')
+        journal.save()
+
+        # The files of the members that don't exist anymore are removed
+        self.assertTrue(os.path.isdir(os.path.join(self.directory, 'cas/1')))
+        self.assertFalse(os.path.exists(os.path.join(self.directory,
+                                                     'cas/2')))
+
+    def test_riff_source(self):
+        source = open_riff_source(os.path.join(
+            os.path.dirname(__file__), 'files', 'riff', 'Lorem', 'Lorem.dir'),
+            '<')
+        try:
+            journal = Journal(self.directory)
+            journal.add_resources(source)
+            expected = Journal(self.directory)
+            expected.add_resources(BinDirSource(os.path.join(
+                os.path.dirname(__file__), 'files', 'riff', 'Lorem', 'files',
+                'bin')))
+            for name in source.names():
+                self.assertEqual(expected.resources[name]['hash'],
+                                 journal.resources[name]['hash'])
+
+                # The chunks are hashed without keeping a copy of their data
+                self.assertIsNone(source.chunk(name)._data)
+        finally:
+            source.close()
+
+    def test_failed_file(self):
+        movie = os.path.join(os.path.dirname(__file__), 'files', 'riff',
+                             'AppleGame', 'AppleGame.dir')
+        out_dir = os.path.join(self.directory, 'AppleGame')
+        os.mkdir(out_dir)
+
+        # The members with an image that can't be decoded are not complete
+        with mock.patch('drxtract.casxtract.save_bitmap',
+                        side_effect=ValueError('Wrong image')):
+            failed = extract_movie(movie, '>', out_dir, 1, None,
+                                   'wav')['failed_members']
+        self.assertTrue(len(failed) > 0)
+
+        # So they are extracted again
+        stats = extract_movie(movie, '>', out_dir, 1, None, 'wav')
+        self.assertEqual([], stats['failed_members'])
+        for elm in failed:
+            files = os.listdir(os.path.join(out_dir, 'cas', str(elm)))
+            self.assertTrue(any(f.endswith('.png') for f in files))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Unit test for the PNG encoder
+#
+
+import unittest
+import os
+import json
+import zlib
+import struct
+from typing import Dict, List, Tuple
+
+from drxtract.bitd import bitd2bitmap, Bitmap
+from drxtract.clut import PaletteCache
+from drxtract.png import encode_png, bitmap2png, COLOR_TYPE_RGB, \
+    COLOR_TYPE_INDEXED, COLOR_TYPE_RGBA
+
+
+def read_png(png: bytes) -> Tuple[Dict[bytes, bytes], List[bytes]]:
+    """Returns the chunks and the rows of pixels of a PNG image"""
+    chunks: Dict[bytes, bytes] = {}
+    idat = b''
+    idx = 8
+    while idx < len(png):
+        length = struct.unpack('>I', png[idx:idx+4])[0]
+        chunk_type = png[idx+4:idx+8]
+        data = png[idx+8:idx+8+length]
+        crc = struct.unpack('>I', png[idx+8+length:idx+12+length])[0]
+        assert crc == zlib.crc32(chunk_type + data)
+        if chunk_type == b'IDAT':
+            idat += data
+        else:
+            chunks[chunk_type] = data
+        idx += 12 + length
+
+    width, height, _, color_type = struct.unpack('>IIBB',
+                                                 chunks[b'IHDR'][0:10])
+    row_size = width * {COLOR_TYPE_INDEXED: 1, COLOR_TYPE_RGB: 3,
+                        COLOR_TYPE_RGBA: 4}[color_type]
+    pixels = zlib.decompress(idat)
+    rows = [pixels[y*(row_size+1)+1:(y+1)*(row_size+1)]
+            for y in range(0, height)]
+    return (chunks, rows)
+
+
+class TestPNG(unittest.TestCase):
+
+    def setUp(self):
+        os.chdir(os.path.join(os.path.dirname(__file__), 'files', 'bitd'))
+
+    def test_encode_png(self):
+        png = encode_png(2, 2, COLOR_TYPE_RGB, bytes(range(0, 12)))
+        self.assertEqual(b'\x89PNG\r\n\x1a\n', png[0:8])
+
+        chunks, rows = read_png(png)
+        self.assertEqual(struct.pack('>IIBBBBB', 2, 2, 8, COLOR_TYPE_RGB,
+                                     0, 0, 0), chunks[b'IHDR'])
+        self.assertEqual([bytes(range(0, 6)), bytes(range(6, 12))], rows)
+
+        with self.assertRaises(ValueError):
+            encode_png(2, 2, COLOR_TYPE_RGB, bytes(11))
+
+        with self.assertRaises(ValueError):
+            encode_png(2, 2, COLOR_TYPE_INDEXED, bytes(4))
+
+    def test_indexed_crop(self):
+        # 3x2 image (rows stored from bottom to top, 4 bytes per row)
+        palette = bytes([255, 255, 255, 0, 0, 0, 255, 0])
+        bitmap = Bitmap(3, 2, 8, 4, palette,
+                        bytes([1, 1, 0, 9, 0, 1, 0, 9]))
+
+        chunks, rows = read_png(bitmap2png(bitmap, 1, 0, 5, 2,
+                                           (255, 255, 255)))
+        self.assertEqual([bytes([1, 0]), bytes([1, 0])], rows)
+        self.assertEqual(bytes([255, 255, 255, 255, 0, 0]), chunks[b'PLTE'])
+        self.assertEqual(bytes([0, 255]), chunks[b'tRNS'])
+
+        # Negative offsets
+        chunks, rows = read_png(bitmap2png(bitmap, -1, 1, 3, 3))
+        self.assertEqual([bytes([1, 1])], rows)
+        self.assertNotIn(b'tRNS', chunks)
+
+        with self.assertRaises(ValueError):
+            bitmap2png(bitmap, 3, 0)
+
+        # Alpha mask (the rows are stored like in the bitmap)
+        chunks, rows = read_png(bitmap2png(bitmap, alpha=bytes([255, 255, 0,
+                                                                255, 255,
+                                                                255])))
+        self.assertEqual(COLOR_TYPE_RGBA, chunks[b'IHDR'][9])
+        self.assertEqual([bytes([255, 255, 255, 255, 255, 0, 0, 255,
+                                 255, 255, 255, 255]),
+                          bytes([255, 0, 0, 255, 255, 0, 0, 255,
+                                 255, 255, 255, 0])], rows)
+
+        # Lookup tables of a palette cache (shared by the images)
+        cache = PaletteCache()
+        cache.add_palette(2, bytes([0, 255, 0, 0, 255, 0, 0, 0]))
+        tables = cache.get_rgba_tables(2)
+        chunks, rows = read_png(bitmap2png(bitmap, 0, 1, alpha=bytes(
+            [255, 255, 0, 255, 255, 255]), tables=tables))
+        self.assertEqual([bytes([0, 0, 255, 255, 0, 0, 255, 255,
+                                 0, 255, 0, 0])], rows)
+        self.assertIs(tables, cache.get_rgba_tables(2))
+
+        # Opaque images don't need the alpha channel
+        chunks, rows = read_png(bitmap2png(bitmap, alpha=bytes([255]) * 6))
+        self.assertEqual(COLOR_TYPE_INDEXED, chunks[b'IHDR'][9])
+
+    def test_true_color(self):
+        for dir_name in ('postbox16b', 'postbox24b'):
+            with open(os.path.join(dir_name, "data.json"), mode='rb') as file:
+                castData = json.loads(file.read().decode('utf-8'))
+
+            with open(os.path.join(dir_name, dir_name + ".BITD"),
+                      mode='rb') as file:
+                bitmap = bitd2bitmap(castData, bytes(), file.read())
+
+            chunks, rows = read_png(bitmap2png(bitmap))
+            self.assertEqual(bitmap.height, len(rows))
+
+            # Top left pixel
+            start = (bitmap.height - 1) * bitmap.stride
+            if bitmap.bpp == 24:
+                blue, green, red = bitmap.data[start:start+3]
+            else:
+                value = bitmap.data[start] | (bitmap.data[start+1] << 8)
+                red = round(((value >> 10) & 0x1F) * 255 / 31)
+                green = round(((value >> 5) & 0x1F) * 255 / 31)
+                blue = round((value & 0x1F) * 255 / 31)
+
+            self.assertEqual(bytes([red, green, blue]), rows[0][0:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
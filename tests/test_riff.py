@@ -9,12 +9,24 @@
 import unittest
 import os
 import re
+import struct
+import tempfile
+import pickle
+import filecmp
 from parameterized import parameterized
 
-from drxtract.riff.riff import parse_riff, find_riff_in_exe, RiffData, Chunk
+from drxtract.riff.riff import parse_riff, find_riff_in_exe, RiffData, Chunk, \
+    find_riffs_in_exe, get_exe_overlay_offset, get_riff_byte_order
 from drxtract.riff.imap import InputMAP, parse_imap
 from drxtract.riff.mmap import MemoryMAP, parse_mmap
-from drxtract.lingosrc.util import vsprintf
+from drxtract.riff.file_operations import parse_riff_file, open_riff_file, \
+    copy_range, _copy_file_range, _sendfile, _copy_buffered, detect_byte_order, \
+    count_movies
+from drxtract.lingosrc.util import vsprintf, RecordLayout
+from drxtract.riff import decode_chunk_id
+from drxtract.riffxtract import extract_all_riffs
+from drxtract.chunk_source import RiffSource, BinDirSource, \
+    open_riff_source
 
 MV93_FILE_TYPE = 'MV93'
 RIFX_FILE_FORMAT = 'RIFX'
@@ -96,3 +108,306 @@ class TestScript(unittest.TestCase):
         
         self.compare_dir('<', dir_file, output_folder)
 
+
+    @parameterized.expand([
+        ['>', 'AppleGame'],
+        ['<', 'Lorem'],
+        
+    ])
+    def test_resource_index(self, byte_order: str, dir_name: str):
+        dir_file = os.path.join(dir_name, dir_name + ".dir")
+        with open(dir_file, mode='rb') as file:
+            fileContent: bytes = file.read()
+            riffData: RiffData = parse_riff(fileContent, 0, byte_order)
+            
+            self.assertIsNotNone(riffData.imap)
+            self.assertIsNotNone(riffData.mmap)
+            
+            idx = -1
+            for resource in riffData.mmap.resources:
+                idx += 1
+                if ((resource.chunkID in CHUNKS_TO_IGNORE) or
+                    (resource.size <= 0)):
+                    continue
+                
+                chunk = riffData.get_by_resource_id(idx)
+                self.assertEqual(resource.chunkID, chunk.identifier)
+                self.assertIs(chunk, riffData.get_by_offset(resource.offset))
+            
+            with self.assertRaises(IndexError):
+                riffData.get_by_offset(1)
+
+    @parameterized.expand([
+        ['>', os.path.join('AppleGame', 'AppleGame.dir')],
+        ['<', os.path.join('Lorem', 'Lorem.dir')],
+        ['<', os.path.join('Lorem_proj', 'Lorem_proj.exe')],
+        
+    ])
+    def test_lazy_chunks(self, byte_order: str, dir_file: str):
+        with open(dir_file, mode='rb') as file:
+            fileContent: bytes = file.read()
+            rifx_offset: int = 0
+            if dir_file.upper().endswith('.EXE'):
+                rifx_offset = find_riff_in_exe(fileContent)
+            expected: RiffData = parse_riff(fileContent, rifx_offset,
+                                            byte_order)
+        
+        riffData: RiffData = parse_riff_file(dir_file, byte_order)
+        self.assertEqual(expected.offset, riffData.offset)
+        self.assertEqual(len(expected.chunks), len(riffData.chunks))
+        for i in range(0, len(expected.chunks)):
+            chunk: Chunk = riffData.chunks[i]
+            self.assertEqual(expected.chunks[i].identifier, chunk.identifier)
+            self.assertEqual(expected.chunks[i].data, bytes(chunk.view()))
+            self.assertEqual(expected.chunks[i].data, chunk.data)
+            
+            # The data is copied only once
+            self.assertIs(chunk.data, chunk.data)
+        self.assertEqual(len(expected.resources), len(riffData.resources))
+
+    @parameterized.expand([
+        ['>', os.path.join('AppleGame', 'AppleGame.dir')],
+        ['<', os.path.join('Lorem', 'Lorem.dir')],
+        ['<', os.path.join('Lorem_proj', 'Lorem_proj.exe')],
+        
+    ])
+    def test_riff_file_reader(self, byte_order: str, dir_file: str):
+        expected: RiffData = parse_riff_file(dir_file, byte_order)
+        
+        with open_riff_file(dir_file, byte_order) as reader:
+            self.assertEqual(expected.offset, reader.offset)
+            self.assertEqual(len(expected.mmap.resources),
+                             len(reader.mmap.resources))
+            
+            for idx in expected.resources:
+                resource = reader.mmap.resources[idx]
+                if ((resource.chunkID in CHUNKS_TO_IGNORE) or
+                    (resource.size <= 0)):
+                    continue
+                
+                chunk: Chunk = reader.get_by_resource_id(idx)
+                self.assertEqual(expected.resources[idx].identifier,
+                                 chunk.identifier)
+                self.assertEqual(expected.resources[idx].data, chunk.data)
+            
+            chunk = reader.get_by_chunk_id('CAS*')
+            self.assertEqual('CAS*', chunk.identifier)
+            
+            with self.assertRaises(ValueError):
+                reader.get_by_chunk_id('none')
+
+    def test_find_riff_in_ne_exe(self):
+        with open(os.path.join('Lorem_proj', 'Lorem_proj.exe'),
+                  mode='rb') as file:
+            fileContent: bytes = file.read()
+        
+        # It is not a PE file
+        self.assertEqual(0, get_exe_overlay_offset(fileContent))
+        
+        riffs = find_riffs_in_exe(fileContent)
+        self.assertEqual(1, len(riffs))
+        self.assertEqual('<', riffs[0].byte_order)
+        self.assertEqual(riffs[0].offset, find_riff_in_exe(fileContent))
+        self.assertEqual(fileContent[riffs[0].offset:riffs[0].offset+4],
+                         b'XFIR')
+
+    def test_find_riffs_in_pe_exe(self):
+        with open(os.path.join('Lorem', 'Lorem.dir'), mode='rb') as file:
+            movie1: bytes = file.read()
+        with open(os.path.join('AppleGame', 'AppleGame.dir'),
+                  mode='rb') as file:
+            movie2: bytes = file.read()
+        
+        # Minimal PE file with a single section that contains a fake header
+        section = b'XFIR' + bytes(60)
+        header = bytearray(0x80)
+        header[0:2] = b'MZ'
+        header[60:64] = struct.pack('<i', 0x40)
+        header[0x40:0x44] = b'PE\0\0'
+        header[0x46:0x48] = struct.pack('<H', 1)
+        header[0x54:0x56] = struct.pack('<H', 0)
+        header += bytes(40)
+        header[0x58+16:0x58+24] = struct.pack('<II', len(section),
+                                              len(header))
+        exe = bytes(header) + section + b'RIFX' + movie1 + movie2
+        overlay = len(header) + len(section)
+        
+        self.assertEqual(overlay, get_exe_overlay_offset(exe))
+        
+        riffs = find_riffs_in_exe(exe)
+        self.assertEqual(2, len(riffs))
+        self.assertEqual(overlay + 4, riffs[0].offset)
+        self.assertEqual(len(movie1), riffs[0].size)
+        self.assertEqual('<', riffs[0].byte_order)
+        self.assertEqual(overlay + 4 + len(movie1), riffs[1].offset)
+        self.assertEqual(len(movie2), riffs[1].size)
+        self.assertEqual('>', riffs[1].byte_order)
+        
+        # The same movies are found without using the section table
+        riffs = find_riffs_in_exe(exe, False)
+        self.assertEqual([overlay + 4, overlay + 4 + len(movie1)],
+                         [r.offset for r in riffs])
+
+    def relocate(self, byte_order: str, fdata: bytes, delta: int) -> bytes:
+        """Moves the memory map offsets of a movie (as projectors do)"""
+        riffData: RiffData = parse_riff(fdata, 0, byte_order)
+        data = bytearray(fdata)
+        # The input map points to the memory map
+        idx = 12 + 8 + 4
+        mmap_offset = struct.unpack(byte_order + "i", data[idx:idx+4])[0]
+        data[idx:idx+4] = struct.pack(byte_order + "i", mmap_offset + delta)
+        # The memory map points to the resources
+        idx = mmap_offset + 8 + 24
+        for resource in riffData.mmap.resources:
+            data[idx+8:idx+12] = struct.pack(byte_order + "i",
+                                             resource.offset + delta)
+            idx += 20
+        return bytes(data)
+
+    def test_extract_all_riffs(self):
+        with open(os.path.join('Lorem_proj', 'Lorem_proj.exe'),
+                  mode='rb') as file:
+            exe: bytes = file.read()
+        with open(os.path.join('AppleGame', 'AppleGame.dir'),
+                  mode='rb') as file:
+            movie: bytes = self.relocate('>', file.read(), len(exe))
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exe_file = os.path.join(tmpdir, 'projector.exe')
+            with open(exe_file, mode='wb') as file:
+                file.write(exe + movie)
+            
+            self.assertEqual(2, extract_all_riffs(exe_file, tmpdir, 2))
+            
+            for number, dir_name in [[1, 'Lorem_proj'], [2, 'AppleGame']]:
+                expected_dir = os.path.join(dir_name, 'files', 'bin')
+                actual_dir = os.path.join(tmpdir, str(number), 'bin')
+                expected = sorted(os.listdir(expected_dir))
+                self.assertEqual(expected, sorted(os.listdir(actual_dir)))
+                _, mismatch, errors = filecmp.cmpfiles(
+                    expected_dir, actual_dir, expected, shallow=False)
+                self.assertEqual([], mismatch + errors)
+            
+            # Chunk source of the second movie
+            self.assertEqual(2, count_movies(exe_file))
+            self.assertEqual('<', detect_byte_order(exe_file, 0))
+            self.assertEqual('>', detect_byte_order(exe_file, 1))
+            source = open_riff_source(exe_file, '>', 1)
+            try:
+                expected = BinDirSource(os.path.join('AppleGame', 'files',
+                                                     'bin'))
+                self.assertEqual(expected.names(), sorted(source.names()))
+                
+                copy = pickle.loads(pickle.dumps(source))
+                try:
+                    self.assertEqual(1, copy.movie)
+                    for name in expected.names():
+                        self.assertEqual(expected.read(name),
+                                         copy.read(name))
+                finally:
+                    copy.close()
+            finally:
+                source.close()
+            
+            with self.assertRaises(ValueError):
+                parse_riff_file(exe_file, '>', 2)
+            
+            # The chunks of the first movie end where the second one starts
+            riffData: RiffData = parse_riff_file(exe_file, '<', 0)
+            for chunk in riffData.chunks:
+                self.assertTrue(chunk.position + chunk.length <= len(exe))
+
+    @parameterized.expand([
+        [copy_range],
+        [_copy_file_range],
+        [_sendfile],
+        [_copy_buffered],
+    ])
+    def test_copy_range(self, copy):
+        file_name = os.path.join('Lorem', 'Lorem.dir')
+        with open(file_name, mode='rb') as file:
+            expected: bytes = file.read()[1000:5000]
+        
+        with tempfile.TemporaryFile() as dst, \
+                open(file_name, mode='rb') as src:
+            copied: int = copy(src.fileno(), dst.fileno(), 1000, 4000)
+            if copied == 0 and copy != copy_range:
+                self.skipTest("Copy method not supported")
+            
+            self.assertEqual(4000, copied)
+            self.assertEqual(0, src.tell())
+            dst.seek(0)
+            self.assertEqual(expected, dst.read())
+
+    @parameterized.expand([
+        ['<', 'Lorem', 'Lorem.dir'],
+        ['>', 'AppleGame', 'AppleGame.dir'],
+    ])
+    def test_riff_source(self, byte_order: str, dir_name: str,
+                         file_name: str):
+        riffData: RiffData = parse_riff_file(
+            os.path.join(dir_name, file_name), byte_order)
+        source = RiffSource(riffData)
+        expected = BinDirSource(os.path.join(dir_name, 'files', 'bin'))
+        
+        self.assertEqual(expected.names(), sorted(source.names()))
+        self.assertEqual(expected.find(('KEY_',)), source.find(('KEY_',)))
+        for name in expected.names():
+            self.assertTrue(source.exists(name))
+            self.assertEqual(expected.read(name), source.read(name))
+        
+        # The chunk ID must match the name of the chunk
+        name = expected.find(('KEY_',))
+        wrong_name = name[0:name.rfind('.')] + '.CASt'
+        source.resources[wrong_name] = source.resources[name]
+        with self.assertRaises(ValueError):
+            source.read(wrong_name)
+
+    def test_riff_source_pickle(self):
+        source = open_riff_source(os.path.join('Lorem', 'Lorem.dir'), '<')
+        try:
+            copy = pickle.loads(pickle.dumps(source))
+            try:
+                self.assertEqual(source.names(), copy.names())
+                for name in source.names():
+                    self.assertEqual(source.read(name), copy.read(name))
+                self.assertNotEqual(source.source_fd, copy.source_fd)
+            finally:
+                copy.close()
+        finally:
+            source.close()
+        
+        with self.assertRaises(TypeError):
+            pickle.dumps(RiffSource(copy.riffData))
+
+    @parameterized.expand([
+        ['<', 'Lorem', 'Lorem.dir'],
+        ['>', 'AppleGame', 'AppleGame.dir'],
+        ['<', 'Lorem_proj', 'Lorem_proj.exe'],
+    ])
+    def test_detect_byte_order(self, byte_order: str, dir_name: str,
+                               file_name: str):
+        self.assertEqual(byte_order,
+                         detect_byte_order(os.path.join(dir_name, file_name)))
+        
+        with self.assertRaises(TypeError):
+            get_riff_byte_order(bytes(12))
+
+    def test_record_layout(self):
+        layout = RecordLayout("4sih")
+        self.assertEqual(10, layout.size)
+
+        data = bytes(2) + b'CASt' + struct.pack('>ih', 1, -2) \
+            + b'KEY*' + struct.pack('>ih', 3, 4)
+        self.assertEqual((b'CASt', 1, -2), layout.unpack_from('>', data, 2))
+        self.assertEqual([(b'CASt', 1, -2), (b'KEY*', 3, 4)],
+                         list(layout.iter_unpack('>', data, 2, 2)))
+        self.assertEqual([], list(layout.iter_unpack('>', data, 2, 0)))
+
+        with self.assertRaises(struct.error):
+            list(layout.iter_unpack('>', data, 2, 3))
+
+        self.assertEqual('CASt', decode_chunk_id(b'CASt', '>'))
+        self.assertEqual('CASt', decode_chunk_id(b'tSAC', '<'))
+        with self.assertRaises(ValueError):
+            decode_chunk_id(b'CAS', '>')
@@ -0,0 +1,51 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Unit test for RTE2 extraction
+#
+
+import unittest
+import struct
+
+from drxtract.rte2 import parse_rte2_header, rte22bitmap, rte22bmp
+
+
+class TestScript(unittest.TestCase):
+    
+    maxDiff = None
+
+    def test_rte2(self):
+        # 5x3 image: (length, color) runs, a zero length run ends a row
+        fdata = struct.pack('>hhBBB', 5, 3, 0, 4, 0) + bytes([
+            2, 0, 1, 7, 0, 0,
+            0, 0,
+            9, 3
+        ])
+        self.assertEqual({'width': 5, 'height': 3, 'bpp': 4},
+                         parse_rte2_header(fdata))
+        
+        bitmap = rte22bitmap(fdata)
+        self.assertEqual(5, bitmap.width)
+        self.assertEqual(3, bitmap.height)
+        self.assertEqual(8, bitmap.stride)
+        
+        # Rows from bottom to top, the background is white (15) and the
+        # runs that don't fit in the row are clipped
+        self.assertEqual(bytes([3] * 8) + bytes([15] * 8)
+                         + bytes([0, 0, 7] + [15] * 5), bitmap.data)
+        
+        # White is the last color of the palette
+        self.assertEqual(bytes([255, 255, 255, 0]), bitmap.palette[60:64])
+        
+        bmp = rte22bmp(fdata)
+        self.assertEqual(b'BM', bmp[0:2])
+        self.assertEqual(bitmap.palette + bitmap.data, bmp[54:])
+
+        with self.assertRaises(ValueError):
+            parse_rte2_header(bytes(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,6 +9,7 @@
 import unittest
 import os
 import wave
+import struct
 from parameterized import parameterized
 
 from drxtract.snd import snd_to_sampled, SampledSound
@@ -46,3 +47,24 @@ class TestScript(unittest.TestCase):
             wf.close()        
             self.assertEqual(data, sampledSound.samples)
 
+    def test_extended_16bits_stereo(self):
+        # Format 2 SND with a bufferCmd and an extended sound header
+        words = [1, -2, 0x1234, -32768]
+        snd_data = struct.pack('>hhh', 2, 0, 1) + \
+            struct.pack('>Hhi', 0x8051, 0, 14) + \
+            struct.pack('>iihhiiBBi', 0, 2, 22254, 0, 0, 0, 0xFF, 60,
+                        2) + bytes(10) + \
+            struct.pack('>iiihhiii', 0, 0, 0, 16, 0, 0, 0, 0) + \
+            struct.pack('>4h', *words)
+
+        sampledSound: SampledSound = snd_to_sampled(snd_data)
+        self.assertEqual(2, sampledSound.num_channels)
+        self.assertEqual(16, sampledSound.bits_per_sample)
+        self.assertEqual(22254, sampledSound.sample_rate)
+        self.assertEqual(struct.pack('<4h', *words),
+                         bytes(sampledSound.samples))
+
+        # Truncated samples
+        with self.assertRaises(IndexError):
+            snd_to_sampled(snd_data[:-1])
+
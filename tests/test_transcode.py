@@ -0,0 +1,138 @@
+# Author: Abraham Macias Paredes
+# E-mail: system252001@yahoo.es
+# License: GNU GPL v2 (see LICENSE file for details).
+
+#
+# Unit test for the transcoding of the sounds
+#
+
+import unittest
+import os
+import sys
+import stat
+import glob
+import tempfile
+from unittest import mock
+
+from drxtract.snd import SampledSound
+from drxtract.transcode import ffmpeg_command, transcode_sounds, \
+    PASS_THROUGH
+from drxtract.drxtract import extract_movie
+from drxtract.batchxtract import is_complete, STATUS_COMPLETE
+
+# Program that writes its arguments and its standard input into the output
+# file (the last argument), like ffmpeg does with the encoded sound
+FAKE_FFMPEG = '''#!%s
+import sys
+data = sys.stdin.buffer.read()
+with open(sys.argv[-1], 'wb') as file:
+    file.write(' '.join(sys.argv[1:-1]).encode('utf-8') + b'\\n' + data)
+'''
+
+
+def new_sound(bits_per_sample: int, num_channels: int,
+              samples: bytes) -> SampledSound:
+    sound = SampledSound()
+    sound.bits_per_sample = bits_per_sample
+    sound.num_channels = num_channels
+    sound.sample_rate = 22254
+    sound.samples = samples
+    return sound
+
+
+class TestTranscode(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+        self.ffmpeg = os.path.join(self.directory, 'ffmpeg')
+        with open(self.ffmpeg, 'w') as file:
+            file.write(FAKE_FFMPEG%(sys.executable))
+        os.chmod(self.ffmpeg, stat.S_IRWXU)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read(self, name: str) -> bytes:
+        with open(os.path.join(self.directory, name), mode='rb') as file:
+            return file.read()
+
+    def test_ffmpeg_command(self):
+        with mock.patch.dict(os.environ, {'DRX_FFMPEG': 'ffmpeg'}):
+            self.assertEqual(['ffmpeg', '-y', '-loglevel', 'error',
+                              '-f', 's16le', '-ar', '22254', '-ac', '2',
+                              '-i', 'pipe:0', '-acodec', 'libmp3lame',
+                              'sound.mp3'],
+                             ffmpeg_command(new_sound(16, 2, bytes(4)),
+                                            'sound.mp3', 'mp3'))
+
+        with self.assertRaises(ValueError):
+            ffmpeg_command(new_sound(8, 1, bytes(4)), 'sound.ogg', 'ogg')
+
+        with self.assertRaises(ValueError):
+            ffmpeg_command(new_sound(24, 1, bytes(3)), 'sound.mp3', 'mp3')
+
+    def test_transcode_sounds(self):
+        sounds = [(new_sound(8, 1, bytes([128, 129, 130])),
+                   os.path.join(self.directory, 'mono')),
+                  (new_sound(16, 2, memoryview(bytes(range(0, 8)))),
+                   os.path.join(self.directory, 'stereo')),
+                  (new_sound(24, 1, bytes(3)),
+                   os.path.join(self.directory, 'unsupported'))]
+
+        with mock.patch.dict(os.environ, {'DRX_FFMPEG': self.ffmpeg}):
+            # Only the WAV files are generated in pass-through mode
+            self.assertEqual([], transcode_sounds(sounds, PASS_THROUGH, 2))
+            self.assertEqual(['ffmpeg'], os.listdir(self.directory))
+
+            failed = transcode_sounds(sounds, 'mp3', 2)
+
+        self.assertEqual([os.path.join(self.directory, 'unsupported.mp3')],
+                         failed)
+        self.assertEqual(b'-y -loglevel error -f u8 -ar 22254 -ac 1 '
+                         + b'-i pipe:0 -acodec libmp3lame\n'
+                         + bytes([128, 129, 130]), self.read('mono.mp3'))
+        self.assertEqual(b'-y -loglevel error -f s16le -ar 22254 -ac 2 '
+                         + b'-i pipe:0 -acodec libmp3lame\n'
+                         + bytes(range(0, 8)), self.read('stereo.mp3'))
+
+        # Missing ffmpeg program
+        with mock.patch.dict(os.environ, {
+                'DRX_FFMPEG': os.path.join(self.directory, 'missing')}):
+            self.assertEqual(1, len(transcode_sounds(sounds[0:1])))
+
+    def test_audio_format_change(self):
+        movie = os.path.join(os.path.dirname(__file__), 'files', 'riff',
+                             'AppleGame', 'AppleGame.dir')
+        out_dir = os.path.join(self.directory, 'AppleGame')
+        os.mkdir(out_dir)
+
+        def count(extension: str) -> int:
+            return len(glob.glob(os.path.join(out_dir, 'cas', '*',
+                                              '*.' + extension)))
+
+        stats = extract_movie(movie, '>', out_dir, 1, None, PASS_THROUGH)
+        self.assertEqual(0, count('mp3'))
+        nsounds = count('wav')
+        self.assertTrue(nsounds > 0)
+
+        # The sounds are extracted again when the audio format changes
+        with mock.patch.dict(os.environ, {'DRX_FFMPEG': self.ffmpeg}):
+            stats = extract_movie(movie, '>', out_dir, 1, None, 'mp3')
+        self.assertEqual([], stats['failed_members'])
+        self.assertEqual(nsounds, count('mp3'))
+
+        stats = extract_movie(movie, '>', out_dir, 1, None, PASS_THROUGH)
+        self.assertEqual(0, count('mp3'))
+        self.assertEqual(nsounds, count('wav'))
+
+        # A complete batch extraction is done again with another format
+        manifest = {'status': STATUS_COMPLETE, 'audio_format': 'mp3',
+                    'input_bytes': os.stat(movie).st_size,
+                    'input_mtime': os.stat(movie).st_mtime}
+        self.assertTrue(is_complete(manifest, movie, 'mp3'))
+        self.assertFalse(is_complete(manifest, movie, PASS_THROUGH))
+
+
+if __name__ == '__main__':
+    unittest.main()